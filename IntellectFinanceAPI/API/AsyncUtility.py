@@ -0,0 +1,328 @@
+import asyncio
+import collections
+import contextvars
+import logging
+import time
+import urllib.parse
+import weakref
+
+from IntellectFinanceAPI.API.Compression import decode_body, get_request_headers
+from IntellectFinanceAPI.API.ConnectionPool import DICT_POOL_SETTINGS, get_ssl_context
+from IntellectFinanceAPI.API.DiskCache import get_disk_cache, normalize_kargs
+from IntellectFinanceAPI.API.SingleFlight import AsyncSingleFlight, get_single_flight
+from IntellectFinanceAPI.API.Tracing import new_trace, phase
+from IntellectFinanceAPI.API.Transport import get_transport
+from IntellectFinanceAPI.API.Utility import _Attempts, _check_api_key, _generate_url, _get_cached_result, _observe_error, \
+    _parse_response, _raise_if_error, _set_cached_result
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DICT_ASYNC_SETTINGS = {
+    # Max number of requests in flight at once for one client.
+    'max_concurrency': 100,
+}
+
+_CURRENT_CLIENT = contextvars.ContextVar('IntellectFinanceAPI_async_client', default=None)
+_DEFAULT_CLIENTS = weakref.WeakKeyDictionary()  # event loop -> AsyncClient
+
+_STALE_CONNECTION_ERRORS = (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class AsyncHTTPResponse:
+    def __init__(self, status, headers, body, will_close):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.will_close = will_close
+
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _read_chunked_body(reader):
+    chunks = []
+    while True:
+        size_line = await reader.readline()
+        if not size_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        size = int(size_line.split(b';', 1)[0].strip(), 16)
+        if size == 0:
+            await _read_headers(reader)  # trailers
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)  # CRLF after each chunk
+
+
+async def _read_response(reader, host=None, reused=None):
+    with phase('ttfb', host=host, reused=reused) as p:
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        version, status, _ = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        headers = await _read_headers(reader)
+        p.set(status=int(status))
+
+    will_close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+    with phase('download') as p:
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            body = await _read_chunked_body(reader)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            will_close = True
+        p.set(nbytes=len(body))
+    return AsyncHTTPResponse(int(status), headers, body, will_close)
+
+
+class AsyncConnectionPool:
+    """
+    Keep-alive connections to one host, for one event loop.
+    """
+
+    def __init__(self, host, port=None, scheme='https', max_size=10, idle_timeout=60, timeout=120):
+        self.host = host
+        self.scheme = scheme
+        self.port = port or (443 if scheme == 'https' else 80)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()  # (reader, writer, last_used_monotonic)
+
+    async def _new_connection(self):
+        ssl_context = get_ssl_context() if self.scheme == 'https' else None
+        server_hostname = self.host if ssl_context else None
+        with phase('connect', host=self.host, tls=ssl_context is not None):
+            return await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl_context, server_hostname=server_hostname), self.timeout)
+
+    async def _get(self):
+        now = time.monotonic()
+        while self._idle:
+            reader, writer, last_used = self._idle.pop()
+            if now - last_used > self.idle_timeout or reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+            return reader, writer, True
+        reader, writer = await self._new_connection()
+        return reader, writer, False
+
+    def _put(self, reader, writer):
+        self._idle.append((reader, writer, time.monotonic()))
+        while len(self._idle) > self.max_size:
+            self._idle.popleft()[1].close()
+
+    async def request(self, method, path, headers=None):
+        """
+        Send a request on a pooled connection and read the whole response.
+
+        :return: An `AsyncHTTPResponse`.
+        """
+        default_port = 443 if self.scheme == 'https' else 80
+        host = self.host if self.port == default_port else f'{self.host}:{self.port}'
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {host}', 'Connection: keep-alive']
+        lines += [f'{k}: {v}' for k, v in (headers or {}).items()]
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        while True:
+            reader, writer, reused = await self._get()
+            try:
+                writer.write(payload)
+                await writer.drain()
+                response = await asyncio.wait_for(_read_response(reader, self.host, reused), self.timeout)
+            except _STALE_CONNECTION_ERRORS:
+                writer.close()
+                if reused:
+                    logger.debug(f'Stale connection to {self.host}, reconnecting.')
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            if response.will_close:
+                writer.close()
+            else:
+                self._put(reader, writer)
+            return response
+
+    def close(self):
+        idle, self._idle = self._idle, collections.deque()
+        for _, writer, _ in idle:
+            writer.close()
+
+
+async def _run_cache_io(function, *args):
+    """
+    Run a lookup or an update of the caches. With the disk cache (a SQLite file) on, it runs in the default executor,
+    so that the event loop does not wait for the disk; the memory cache alone is read on the loop.
+    """
+    if get_disk_cache() is None:
+        return function(*args)
+    # In the context of the caller, for `bypass_memory_cache`, the trace and the metrics.
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(None, context.run, function, *args)
+
+
+class AsyncClient:
+    """
+    An asyncio client for the API. Requests share keep-alive connections, and at most `max_concurrency` of them are in
+    flight at once.
+
+    Use it as an async context manager to route the functions in `async_api_functions` through it:
+
+        async with AsyncClient(max_concurrency=200):
+            r = await async_api_functions.news_by_ticker(ticker='AAPL', start_date='2022-06-01', end_date='2022-06-30')
+
+    Outside such a block, a default client is created for each event loop.
+
+    The requests go through `transport` (see `Transport.py`), such as a `ReplayTransport`. If missing, the client
+    follows `use_transport` and `set_transport`.
+    """
+
+    def __init__(self, max_concurrency=None, retry_policy=None, transport=None):
+        self.max_concurrency = max_concurrency or DICT_ASYNC_SETTINGS['max_concurrency']
+        # If missing, the client follows `use_retry_policy` and `set_retry_policy`.
+        self.retry_policy = retry_policy
+        self.transport = transport
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._pools = {}
+        self._single_flight = AsyncSingleFlight()
+        self._tokens = []
+
+    def _get_pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        pool = self._pools.get(key)
+        if pool is None:
+            settings = dict(DICT_POOL_SETTINGS, max_size=max(DICT_POOL_SETTINGS['max_size'], self.max_concurrency))
+            pool = self._pools[key] = AsyncConnectionPool(host, port, scheme=scheme, **settings)
+        return pool
+
+    async def call_url(self, url):
+        parsed_url = urllib.parse.urlsplit(url)
+        pool = self._get_pool(parsed_url.scheme or 'https', parsed_url.hostname, parsed_url.port)
+        path = parsed_url.path or '/'
+        if parsed_url.query:
+            path += '?' + parsed_url.query
+
+        async with self._semaphore:
+            try:
+                response = await pool.request('GET', path, headers=get_request_headers())
+            except asyncio.TimeoutError as e:
+                # Before Python 3.11, `asyncio.TimeoutError` is not a `TimeoutError`, which `RetryPolicy` retries.
+                raise TimeoutError(f'Timeout calling {parsed_url.hostname}') from e
+        with phase('decompress') as p:
+            body = decode_body(response.body, response.headers)
+            p.set(nbytes=len(body))
+        return _parse_response(response.status, body)
+
+    async def call_url_with_retry(self, api_name, url):
+        """
+        The awaitable twin of `Utility._call_url_with_retry`.
+        """
+        attempts = _Attempts(api_name, self.retry_policy)
+        transport = self.transport or get_transport()
+
+        while True:
+            attempts.start()
+            try:
+                if attempts.rate_limiter is not None:
+                    await attempts.rate_limiter.async_acquire()
+                attempts.sent()
+                try:
+                    if transport is None:
+                        result_dict = await self.call_url(url)
+                    else:
+                        result_dict = await transport.async_send(url, self.call_url)
+                except Exception as e:
+                    if not attempts.retry_after_exception(e):
+                        raise
+                else:
+                    if not attempts.retry_after_result(result_dict):
+                        return result_dict
+            finally:
+                attempts.end()
+
+            await asyncio.sleep(attempts.next_delay())
+
+    async def _send_uncached_request(self, api_name, kargs):
+        url = _generate_url(api_name, kargs)
+
+        try:
+            result_dict = await self.call_url_with_retry(api_name, url)
+
+            _raise_if_error(result_dict)
+        except Exception as e:
+            _observe_error(api_name, e)
+            raise
+
+        await _run_cache_io(_set_cached_result, api_name, kargs, result_dict)
+
+        return result_dict
+
+    async def send_http_request(self, api_name, **kargs):
+        _check_api_key()
+
+        trace = new_trace(api_name)
+        if trace is None:
+            return await self._send_http_request(api_name, kargs)
+        with trace:
+            return await self._send_http_request(api_name, kargs)
+
+    async def _send_http_request(self, api_name, kargs):
+        result_dict = await _run_cache_io(_get_cached_result, api_name, kargs)
+        if result_dict is not None:
+            return result_dict
+
+        # Identical calls already in flight (from other tasks of this client) are joined instead of being sent again.
+        if get_single_flight() is None:
+            return await self._send_uncached_request(api_name, kargs)
+        return await self._single_flight.do((api_name, normalize_kargs(kargs)), lambda: self._send_uncached_request(api_name, kargs))
+
+    def close(self):
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+
+    async def __aenter__(self):
+        self._tokens.append(_CURRENT_CLIENT.set(self))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        _CURRENT_CLIENT.reset(self._tokens.pop())
+        self.close()
+
+
+def set_async_max_concurrency(max_concurrency):
+    """
+    Set the max number of in-flight requests for the default async clients created from now on.
+    """
+    DICT_ASYNC_SETTINGS['max_concurrency'] = max_concurrency
+
+
+def get_async_client():
+    """
+    Return the client of the enclosing `async with AsyncClient()` block, or the default client of the running loop.
+    """
+    client = _CURRENT_CLIENT.get()
+    if client is None:
+        loop = asyncio.get_running_loop()
+        client = _DEFAULT_CLIENTS.get(loop)
+        if client is None:
+            client = _DEFAULT_CLIENTS[loop] = AsyncClient()
+    return client
+
+
+async def async_send_http_request(api_name, **kargs):
+    """
+    The awaitable twin of `send_http_request`.
+    """
+    return await get_async_client().send_http_request(api_name, **kargs)
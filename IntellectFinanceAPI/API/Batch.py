@@ -0,0 +1,97 @@
+import concurrent.futures
+import functools
+import logging
+
+from IntellectFinanceAPI.API.RateLimiter import RateLimiter
+from IntellectFinanceAPI.API.Utility import send_http_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class BatchResult:
+    """
+    The outcome of one item in a batch. Exactly one of `result` and `error` is set.
+    """
+    __slots__ = ('index', 'kargs', 'result', 'error')
+
+    def __init__(self, index, kargs, result=None, error=None):
+        self.index = index
+        self.kargs = kargs
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        outcome = f'error={self.error!r}' if self.error is not None else 'ok'
+        return f'BatchResult(index={self.index}, kargs={self.kargs}, {outcome})'
+
+
+def _resolve_endpoint(endpoint):
+    if isinstance(endpoint, str):
+        return functools.partial(send_http_request, endpoint)
+    return endpoint
+
+
+def iter_batch_request(endpoint, list_kargs, max_workers=8, max_qps=None):
+    """
+    Call one endpoint for many sets of keyword arguments on a thread pool, and yield each `BatchResult` as soon as it
+    completes. Errors of one item do not stop the batch; they are stored in `BatchResult.error`.
+
+    :example: iter_batch_request(company_info_by_ticker, [{'ticker': 'AAPL'}, {'ticker': 'MSFT'}])
+
+    :param endpoint: An API function (such as `company_info_by_ticker`), or an API name (such as `'company_info_by_ticker'`).
+    :param list_kargs: A list of dictionaries, each is the keyword arguments of one call.
+    :param max_workers: Number of worker threads.
+    :param max_qps: Optional. Max number of calls started per second for this batch. See also `set_rate_limit`.
+    :return: A generator of `BatchResult`, in the order of completion.
+    """
+    func = _resolve_endpoint(endpoint)
+    # `burst=1` spaces the calls evenly. The process-wide limit of `set_rate_limit` still applies on top of this one.
+    rate_limiter = RateLimiter(max_qps, burst=1) if max_qps else None
+
+    def run(index, kargs):
+        if rate_limiter:
+            rate_limiter.acquire()
+        try:
+            return BatchResult(index, kargs, result=func(**kargs))
+        except Exception as e:
+            logger.debug(f'Batch item {index} failed: {e}')
+            return BatchResult(index, kargs, error=e)
+
+    items = iter(enumerate(list_kargs))
+    # Keep a bounded window of pending items, so a huge batch does not create all its futures upfront.
+    max_pending = max_workers * 2
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for index, kargs in items:
+            pending.add(executor.submit(run, index, kargs))
+            if len(pending) >= max_pending:
+                break
+
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            for index, kargs in items:
+                pending.add(executor.submit(run, index, kargs))
+                if len(pending) >= max_pending:
+                    break
+
+
+def batch_request(endpoint, list_kargs, max_workers=8, max_qps=None):
+    """
+    Same as `iter_batch_request`, but wait for the whole batch and return the results in the input order.
+
+    :example: batch_request('max_drawdown_by_ticker', [{'ticker': t, 'start_date': '2023-01-01', 'end_date': '2023-12-31'} for t in tickers])
+
+    :return: A list of `BatchResult`, one for each item of `list_kargs`.
+    """
+    list_kargs = list(list_kargs)
+    results = [None] * len(list_kargs)
+    for r in iter_batch_request(endpoint, list_kargs, max_workers=max_workers, max_qps=max_qps):
+        results[r.index] = r
+    return results
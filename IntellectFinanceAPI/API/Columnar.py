@@ -0,0 +1,153 @@
+"""
+Typed column output for time series APIs (it requires you to pip install `numpy` first).
+
+Instead of a list of dictionaries, the items are written into NumPy columns while the response is decoded: dates become
+`datetime64`, numbers become `float64`, and anything else is kept in an `object` column.
+"""
+import array
+import numbers
+import re
+
+import numpy as np
+
+from IntellectFinanceAPI.API.Streaming import stream_http_request
+
+_DATE_FIELD = re.compile(r'(^|_)(date|dt|time|pub_t)$')
+
+FLOAT = 'float64'
+DATETIME = 'datetime64'
+OBJECT = 'object'
+
+
+class _ColumnBuilder:
+    __slots__ = ('kind', 'values')
+
+    def __init__(self, kind, n_missing):
+        self.kind = kind
+        if kind == FLOAT:
+            self.values = array.array('d', [float('nan')]) * n_missing
+        else:
+            self.values = [None] * n_missing
+
+    def append(self, value):
+        if self.kind == FLOAT:
+            if value is None:
+                value = float('nan')
+            elif isinstance(value, bool) or not isinstance(value, numbers.Real):
+                # Not a number after all: keep the values as they are.
+                self.kind = OBJECT
+                self.values = self.values.tolist()
+                self.values.append(value)
+                return
+            self.values.append(value)
+        else:
+            self.values.append(value)
+
+    def append_missing(self):
+        self.values.append(float('nan') if self.kind == FLOAT else None)
+
+    def build(self, datetime_unit):
+        if self.kind == FLOAT:
+            return np.frombuffer(self.values, dtype=np.float64) if len(self.values) else np.empty(0, dtype=np.float64)
+        if self.kind == DATETIME:
+            try:
+                return np.array(self.values, dtype=f'datetime64[{datetime_unit}]')
+            except ValueError:
+                pass
+        column = np.empty(len(self.values), dtype=object)
+        column[:] = self.values
+        return column
+
+
+def _infer_kind(name, value):
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return FLOAT
+    if isinstance(value, str) and _DATE_FIELD.search(name):
+        return DATETIME
+    return OBJECT
+
+
+class ColumnarResult:
+    """
+    The items of a result as a dictionary of NumPy columns (`columns`), all of length `n_rows`.
+    """
+
+    def __init__(self, columns, n_rows, extra=None):
+        self.columns = columns
+        self.n_rows = n_rows
+        self.extra = extra or {}
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __len__(self):
+        return self.n_rows
+
+    def keys(self):
+        return self.columns.keys()
+
+    def to_pandas(self):
+        """
+        :return: A pandas `DataFrame` built on the columns (it requires `pandas`).
+        """
+        import pandas as pd
+        return pd.DataFrame(self.columns, copy=False)
+
+    def to_arrow(self):
+        """
+        :return: A `pyarrow.Table` built on the columns (it requires `pyarrow`). `object` columns are converted by Arrow.
+        """
+        import pyarrow as pa
+        return pa.table({name: column if column.dtype != object else column.tolist() for name, column in self.columns.items()})
+
+    def __repr__(self):
+        return f'ColumnarResult(n_rows={self.n_rows}, columns={ {name: str(c.dtype) for name, c in self.columns.items()} })'
+
+
+def to_columns(items, datetime_unit='s', schema=None):
+    """
+    Convert an iterable of dictionaries into typed columns in a single pass.
+
+    :param items: The items, e.g. `r['result']`, or a `StreamedResponse`.
+    :param datetime_unit: Unit of the `datetime64` columns, e.g. `D` or `s`.
+    :param schema: Optional dictionary from column name to `float64`, `datetime64` or `object`. The other columns are
+        inferred from their first value: numbers are `float64`, strings in fields named like `date`, `*_date`, `*_time`
+        or `pub_t` are `datetime64`, and the rest is `object`.
+    :return: A `ColumnarResult`.
+    """
+    schema = schema or {}
+    builders = {}
+    n_rows = 0
+    for item in items:
+        for name, value in item.items():
+            builder = builders.get(name)
+            if builder is None:
+                if value is None and name not in schema:
+                    # Wait for a real value to infer the type.
+                    continue
+                builder = builders[name] = _ColumnBuilder(schema.get(name) or _infer_kind(name, value), n_rows)
+            builder.append(value)
+        n_rows += 1
+        for builder in builders.values():
+            if len(builder.values) < n_rows:
+                builder.append_missing()
+    return ColumnarResult({name: b.build(datetime_unit) for name, b in builders.items()}, n_rows)
+
+
+def columnar_http_request(api_name, datetime_unit='s', schema=None, **kargs):
+    """
+    Same as `send_http_request`, but return the `result` items as typed NumPy columns, built while the response is
+    streamed and parsed; no intermediate list of dictionaries is kept. Made for `time_series_ticker_sentiment`,
+    `treasury_yield`, `treasury_real_yield`, `fed_fund_target_rate` or `fundamental_metrics`.
+
+    :example: columnar_http_request('treasury_yield', duration='duration_10yr', start_date='2022-01-01', end_date='2022-12-31').to_pandas()
+
+    :return: A `ColumnarResult`. The other top-level keys of the response are in its `extra`.
+    """
+    streamed_response = stream_http_request(api_name, **kargs)
+    result = to_columns(streamed_response, datetime_unit=datetime_unit, schema=schema)
+    result.extra = streamed_response.extra
+    return result
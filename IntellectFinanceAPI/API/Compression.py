@@ -0,0 +1,200 @@
+import contextvars
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Max size of a decoded (decompressed) response: a few KB of gzip can inflate to GBs.
+DEFAULT_MAX_DECODED_BYTES = 1 << 30
+
+DICT_COMPRESSION = {
+    # Ask the server for gzip/deflate compressed responses.
+    'enabled': True,
+    'max_decoded_bytes': DEFAULT_MAX_DECODED_BYTES,
+}
+
+ACCEPT_ENCODING = 'gzip, deflate'
+
+_DECODE_CHUNK_SIZE = 1 << 20
+
+_LAST_TRANSFER_STATS = contextvars.ContextVar('IntellectFinanceAPI_last_transfer_stats', default=None)
+
+
+class ResponseTooLargeError(ValueError):
+    """
+    A compressed response decodes to more than `max_decoded_bytes` (see `set_compression`).
+    """
+
+
+def set_compression(enabled=True, max_decoded_bytes=DEFAULT_MAX_DECODED_BYTES):
+    """
+    Turn on (default) or off the negotiation of compressed (gzip/deflate) responses.
+
+    :param max_decoded_bytes: Max size of a compressed response once decoded (default 1GB). A larger one raises a
+        `ResponseTooLargeError`. `None` for no limit.
+    """
+    DICT_COMPRESSION['enabled'] = enabled
+    DICT_COMPRESSION['max_decoded_bytes'] = max_decoded_bytes
+
+
+def get_request_headers():
+    if DICT_COMPRESSION['enabled']:
+        return {'Accept-Encoding': ACCEPT_ENCODING}
+    return {}
+
+
+class TransferStats:
+    """
+    The bytes of one response: as received on the wire (`compressed_bytes`) and after decoding (`uncompressed_bytes`).
+    """
+    __slots__ = ('encoding', 'compressed_bytes', 'uncompressed_bytes')
+
+    def __init__(self, encoding=None):
+        self.encoding = encoding
+        self.compressed_bytes = 0
+        self.uncompressed_bytes = 0
+
+    @property
+    def ratio(self):
+        return self.uncompressed_bytes / self.compressed_bytes if self.compressed_bytes else 1.0
+
+    def __repr__(self):
+        return f'TransferStats(encoding={self.encoding!r}, compressed_bytes={self.compressed_bytes}, uncompressed_bytes={self.uncompressed_bytes})'
+
+
+def get_last_transfer_stats():
+    """
+    :return: The `TransferStats` of the last response received in the current thread (or asyncio task), or `None`.
+    """
+    return _LAST_TRANSFER_STATS.get()
+
+
+def set_last_transfer_stats(stats):
+    """
+    Set the `TransferStats` returned by `get_last_transfer_stats`, for a response which did not come through
+    `decode_body` or `DecodingReader` (e.g. one served by a transport).
+    """
+    _LAST_TRANSFER_STATS.set(stats)
+
+
+def _new_decompressor(encoding):
+    if encoding == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        # `deflate` should be zlib-wrapped, but some servers send raw deflate; `_Decompressor` falls back to it.
+        return zlib.decompressobj(zlib.MAX_WBITS)
+    return None
+
+
+class _Decompressor:
+    """
+    Decode the chunks of a body. With a `max_length`, a call returns at most that many bytes, and the input left over is
+    kept for the next calls (`has_pending`), so that a small chunk cannot inflate to a huge buffer at once.
+    """
+
+    def __init__(self, encoding, stats):
+        self.encoding = encoding
+        self.stats = stats
+        self.max_decoded_bytes = DICT_COMPRESSION['max_decoded_bytes']
+        self._decompressor = _new_decompressor(encoding)
+        self._first_chunk = True
+
+    @property
+    def has_pending(self):
+        return self._decompressor is not None and bool(self._decompressor.unconsumed_tail)
+
+    def decompress(self, data, max_length=0):
+        self.stats.compressed_bytes += len(data)
+        if self._decompressor is None:
+            output = data
+        else:
+            data = self._decompressor.unconsumed_tail + data
+            try:
+                output = self._decompressor.decompress(data, max_length)
+            except zlib.error:
+                if not (self._first_chunk and self.encoding == 'deflate'):
+                    raise
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                output = self._decompressor.decompress(data, max_length)
+        self._first_chunk = False
+        self._count(output)
+        return output
+
+    def _count(self, output):
+        self.stats.uncompressed_bytes += len(output)
+        if (self._decompressor is not None and self.max_decoded_bytes is not None
+                and self.stats.uncompressed_bytes > self.max_decoded_bytes):
+            raise ResponseTooLargeError(f'The response decodes to more than {self.max_decoded_bytes} bytes '
+                                        f'({self.stats.compressed_bytes} bytes received).')
+
+    def flush(self):
+        output = self._decompressor.flush() if self._decompressor is not None else b''
+        self._count(output)
+        return output
+
+
+def _get_encoding(headers):
+    encoding = (headers.get('Content-Encoding') or headers.get('content-encoding') or '').strip().lower()
+    return encoding if encoding in ('gzip', 'deflate') else None
+
+
+class DecodingReader:
+    """
+    A binary file-like object over an HTTP response, which decodes the gzip/deflate content as it is read. The
+    `TransferStats` are updated on the fly, and published for `get_last_transfer_stats`.
+    """
+
+    def __init__(self, http_response, chunk_size=64 * 1024):
+        self._http_response = http_response
+        self.chunk_size = chunk_size
+        self.stats = TransferStats(_get_encoding(http_response.headers))
+        self._decompressor = _Decompressor(self.stats.encoding, self.stats)
+        self._buffer = b''
+        self._eof = False
+        _LAST_TRANSFER_STATS.set(self.stats)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = [self._buffer]
+            self._buffer = b''
+            while not self._eof:
+                chunks.append(self._read_chunk())
+            return b''.join(chunks)
+
+        while len(self._buffer) < size and not self._eof:
+            self._buffer += self._read_chunk()
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _read_chunk(self):
+        # At most `chunk_size` decoded bytes at a time, however much a compressed chunk inflates.
+        if self._decompressor.has_pending:
+            return self._decompressor.decompress(b'', self.chunk_size)
+        data = self._http_response.read(self.chunk_size)
+        if not data:
+            self._eof = True
+            return self._decompressor.flush()
+        return self._decompressor.decompress(data, self.chunk_size)
+
+
+def decode_body(body, headers):
+    """
+    Decode a whole (possibly compressed) response body.
+
+    :return: The decoded bytes. Its `TransferStats` are published for `get_last_transfer_stats`.
+    """
+    stats = TransferStats(_get_encoding(headers))
+    if stats.encoding is None:
+        stats.compressed_bytes = stats.uncompressed_bytes = len(body)
+    else:
+        # Decoded piece by piece, so that the size limit stops a decompression bomb before it fills the memory.
+        decompressor = _Decompressor(stats.encoding, stats)
+        chunks = [decompressor.decompress(body, _DECODE_CHUNK_SIZE)]
+        while decompressor.has_pending:
+            chunks.append(decompressor.decompress(b'', _DECODE_CHUNK_SIZE))
+        chunks.append(decompressor.flush())
+        body = b''.join(chunks)
+    _LAST_TRANSFER_STATS.set(stats)
+    logger.debug(f'Received {stats}')
+    return body
@@ -0,0 +1,274 @@
+import collections
+import http.client
+import logging
+import select
+import socket
+import ssl
+import threading
+import time
+
+from IntellectFinanceAPI.API.Tracing import get_current_trace, phase
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DICT_POOL_SETTINGS = {
+    # Max number of idle keep-alive connections kept for each host.
+    'max_size': 10,
+    # Idle connections older than this (in seconds) are closed instead of being reused.
+    'idle_timeout': 60,
+    # Socket timeout (in seconds) for connect and read.
+    'timeout': 120,
+}
+
+_SSL_CONTEXT = None
+_SSL_CONTEXT_LOCK = threading.Lock()
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+# Errors meaning the server closed a kept-alive socket before we reused it.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+def set_connection_pool_options(max_size=None, idle_timeout=None, timeout=None):
+    """
+    Configure the keep-alive connection pools. Existing pools are closed, so the new options apply to the next request.
+
+    :param max_size: Max number of idle connections kept for each host.
+    :param idle_timeout: Seconds after which an idle connection is evicted.
+    :param timeout: Socket timeout in seconds.
+    """
+    for key, value in (('max_size', max_size), ('idle_timeout', idle_timeout), ('timeout', timeout)):
+        if value is not None:
+            DICT_POOL_SETTINGS[key] = value
+    close_connection_pools()
+
+
+def get_ssl_context():
+    """
+    Build the SSL context once and share it across all connections.
+    """
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        with _SSL_CONTEXT_LOCK:
+            if _SSL_CONTEXT is None:
+                ssl_context = ssl.create_default_context()
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = ssl.CERT_NONE
+                _SSL_CONTEXT = ssl_context
+    return _SSL_CONTEXT
+
+
+def _open_socket(host, port, timeout, source_address=None):
+    """
+    Same as `socket.create_connection`; in a traced call, the DNS lookup and the TCP connect are timed separately.
+    """
+    if get_current_trace() is None:
+        return socket.create_connection((host, port), timeout, source_address)
+    with phase('dns', host=host) as p:
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        p.set(n_addresses=len(addresses))
+    with phase('connect', host=host):
+        error = None
+        for family, socket_type, proto, _, sockaddr in addresses:
+            sock = socket.socket(family, socket_type, proto)
+            try:
+                sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                # The whole address: an IPv6 one keeps its flow info and scope id (needed by the link-local ones).
+                sock.connect(sockaddr)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    """
+    An `HTTPConnection` whose DNS lookup and TCP connect are timed in a traced call.
+    """
+
+    def connect(self):
+        self.sock = _open_socket(self.host, self.port, self.timeout, self.source_address)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """
+    An `HTTPSConnection` whose DNS lookup, TCP connect and TLS handshake are timed in a traced call.
+    """
+
+    def __init__(self, host, port=None, timeout=None, ssl_context=None):
+        super().__init__(host, port, timeout=timeout, context=ssl_context)
+        self.ssl_context = ssl_context
+
+    def connect(self):
+        _HTTPConnection.connect(self)
+        with phase('tls'):
+            self.sock = self.ssl_context.wrap_socket(self.sock, server_hostname=self.host)
+
+
+def _is_connection_dropped(conn):
+    """
+    An idle keep-alive socket should have nothing to read. If it is readable, the server either closed it (EOF) or sent
+    something we did not ask for; either way it cannot be reused.
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class PooledResponse:
+    """
+    Wrap an `http.client.HTTPResponse`, and hand its connection back to the pool once the body is fully consumed.
+    Use it as a context manager.
+    """
+
+    def __init__(self, pool, conn, response):
+        self._pool = pool
+        self._conn = conn
+        self._response = response
+        self.status = response.status
+        self.headers = response.headers
+
+    def read(self, amt=None):
+        return self._response.read(amt)
+
+    def readinto(self, buffer):
+        return self._response.readinto(buffer)
+
+    def getheader(self, name, default=None):
+        return self._response.getheader(name, default)
+
+    def release(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool._put(conn)
+        else:
+            # Body not fully read, or the server asked us to close: the socket cannot carry another request.
+            self._response.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class HTTPSConnectionPool:
+    """
+    A thread-safe pool of persistent (keep-alive) connections to one host.
+    """
+
+    def __init__(self, host, port=None, scheme='https', max_size=10, idle_timeout=60, timeout=120):
+        self.host = host
+        self.port = port
+        self.scheme = scheme
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()  # (connection, last_used_monotonic); the right end is the most recently used.
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        if self.scheme == 'https':
+            return _HTTPSConnection(self.host, self.port, timeout=self.timeout, ssl_context=get_ssl_context())
+        return _HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _get(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return self._new_connection(), False
+                conn, last_used = self._idle.pop()
+            if now - last_used > self.idle_timeout or _is_connection_dropped(conn):
+                conn.close()
+                continue
+            return conn, True
+
+    def _put(self, conn):
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            self._idle.append((conn, now))
+            while len(self._idle) > self.max_size:
+                evicted.append(self._idle.popleft()[0])
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                evicted.append(self._idle.popleft()[0])
+        for c in evicted:
+            c.close()
+
+    def request(self, method, path, headers=None):
+        """
+        Send a request on a pooled connection.
+
+        :param method: HTTP method, e.g. `GET`.
+        :param path: Path and query string.
+        :param headers: Optional dictionary of request headers.
+        :return: A `PooledResponse`. Read it, then release it (or use it in a `with` block).
+        """
+        headers = headers or {}
+        while True:
+            conn, reused = self._get()
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                conn.request(method, path, headers=headers)
+                with phase('ttfb', host=self.host, reused=reused) as p:
+                    response = conn.getresponse()
+                    p.set(status=response.status)
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    # The server dropped the kept-alive socket between our check and the send. Safe to resend.
+                    logger.debug(f'Stale connection to {self.host}, reconnecting.')
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            return PooledResponse(self, conn, response)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, collections.deque()
+        for conn, _ in idle:
+            conn.close()
+
+    def __len__(self):
+        return len(self._idle)
+
+
+def get_connection_pool(host, port=None, scheme='https'):
+    """
+    Return the shared pool for a host, creating it on first use.
+    """
+    key = (scheme, host, port)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = HTTPSConnectionPool(host, port, scheme=scheme, **DICT_POOL_SETTINGS)
+                _POOLS[key] = pool
+    return pool
+
+
+def close_connection_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
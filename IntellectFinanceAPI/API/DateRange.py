@@ -0,0 +1,298 @@
+import bisect
+import concurrent.futures
+import datetime
+import json
+import logging
+import os
+import threading
+import zlib
+
+from IntellectFinanceAPI.API.DiskCache import normalize_kargs
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import send_http_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class DateRangeSpec:
+    """
+    How to split the date range of one API.
+
+    :param max_days: Max number of days (both ends included) in one call.
+    :param date_field: Key of the date (or date time) in each item of the result.
+    :param descending: True if the API returns the latest items first.
+    :param max_items: Max number of items the API returns for one call, if it has such a cap. A chunk with that many
+        items may be truncated: it is split further (see `_fetch_ranges`).
+    :param limit_args: Parameters which limit or rank the items of one call (e.g. a top-N). The results of several
+        chunks cannot be merged under such a limit, so a range needing more than one chunk is refused when they are set.
+    """
+    __slots__ = ('max_days', 'date_field', 'descending', 'max_items', 'limit_args')
+
+    def __init__(self, max_days, date_field='date', descending=False, max_items=None, limit_args=()):
+        self.max_days = max_days
+        self.date_field = date_field
+        self.descending = descending
+        self.max_items = max_items
+        self.limit_args = limit_args
+
+
+# The max ranges are kept a bit below the longest date ranges the API accepts in one call.
+DICT_DATE_RANGE_SPECS = {
+    'time_series_ticker_sentiment': DateRangeSpec(890),
+    'time_series_topic_sentiment': DateRangeSpec(890),
+    'time_series_topic_names': DateRangeSpec(85),
+    'news_by_ticker': DateRangeSpec(30, date_field='pub_t', descending=True, max_items=1000,
+                                    limit_args=('stop_at_number_of_news', 'if_most_relevant_news_ind')),
+    'news_by_topic': DateRangeSpec(7, date_field='pub_t', descending=True),
+    'treasury_yield': DateRangeSpec(365),
+    'treasury_real_yield': DateRangeSpec(365),
+    'fed_fund_target_rate': DateRangeSpec(365),
+}
+
+
+def to_date(date_str):
+    """
+    :return: The `datetime.date` of a `YYYY-mm-dd` string (or of the date part of a date time).
+
+    :example: to_date('2022-02-01 09:30:00')  # datetime.date(2022, 2, 1)
+    """
+    try:
+        return datetime.date.fromisoformat(str(date_str)[:10])
+    except ValueError:
+        raise ParameterInvalidError(f'Dates must be in the format of YYYY-mm-dd, you provided `{date_str}`.')
+
+
+def split_date_range(start_date, end_date, max_days):
+    """
+    Split `[start_date, end_date]` (both included) into consecutive ranges of at most `max_days` days.
+
+    :example: split_date_range('2022-01-01', '2022-01-10', max_days=4)  # [('2022-01-01', '2022-01-04'), ('2022-01-05', '2022-01-08'), ('2022-01-09', '2022-01-10')]
+
+    :return: A list of (start_date, end_date) strings.
+    """
+    start, end = to_date(start_date), to_date(end_date)
+    ranges = []
+    while start <= end:
+        chunk_end = min(end, start + datetime.timedelta(days=max_days - 1))
+        ranges.append((start.isoformat(), chunk_end.isoformat()))
+        start = chunk_end + datetime.timedelta(days=1)
+    return ranges
+
+
+def _is_set(value):
+    return value is not None and str(value).lower() not in ('false', '0', '')
+
+
+def _check_limit_args(api_name, spec, kargs, n_ranges):
+    limit_args = [k for k in spec.limit_args if _is_set(kargs.get(k))]
+    if limit_args and n_ranges > 1:
+        raise ParameterInvalidError(f'`{api_name}` cannot be split into date ranges with {limit_args}: the merged result '
+                                    f'would not respect them. Call `{api_name}` directly, on a range of at most '
+                                    f'{spec.max_days} days.')
+
+
+def _call_ranges(api_name, ranges, kargs, max_workers):
+    """
+    Call the API once for each range, concurrently.
+
+    :return: A list of results, in the same order as `ranges`. If any call fails, its error is raised once the other
+        calls have finished.
+    """
+    if len(ranges) == 1:
+        return [send_http_request(api_name, start_date=ranges[0][0], end_date=ranges[0][1], **kargs)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(ranges))) as executor:
+        futures = [executor.submit(send_http_request, api_name, start_date=s, end_date=e, **kargs) for s, e in ranges]
+        concurrent.futures.wait(futures)
+    return [f.result() for f in futures]
+
+
+def _fetch_ranges(api_name, ranges, kargs, max_workers, max_items=None):
+    """
+    Call the API for each range, concurrently. A range whose result reaches `max_items` may be truncated: it is split
+    in two halves, which are fetched again, down to single days.
+
+    :return: A list of (start_date, end_date, items, truncated), by ascending dates. `truncated` is True for a single day
+        which still reached `max_items`.
+    """
+    done = {}
+    pending = list(ranges)
+    while pending:
+        next_pending = []
+        for (s, e), r in zip(pending, _call_ranges(api_name, pending, kargs, max_workers)):
+            items = r['result']
+            if max_items is None or len(items) < max_items:
+                done[s, e] = (items, False)
+            elif s != e:
+                middle = to_date(s) + (to_date(e) - to_date(s)) // 2
+                next_pending += [(s, middle.isoformat()), ((middle + datetime.timedelta(days=1)).isoformat(), e)]
+            else:
+                logger.warning(f'`{api_name}` returned {len(items)} items for {s} alone; some may be missing.')
+                done[s, e] = (items, True)
+        pending = next_pending
+    return [(s, e, items, truncated) for (s, e), (items, truncated) in sorted(done.items())]
+
+
+def fetch_date_range(api_name, start_date, end_date, max_workers=4, **kargs):
+    """
+    Call a time series API for a date range of any length: the range is split into the chunks the API allows, the
+    chunks are fetched concurrently, and their results are merged in date order.
+
+    :example: fetch_date_range('time_series_ticker_sentiment', '2015-01-01', '2024-12-31', ticker='AAPL')
+
+    :param api_name: One of the APIs in `DICT_DATE_RANGE_SPECS`.
+    :param kargs: The other parameters of the API. The parameters limiting the items of a call (such as
+        `stop_at_number_of_news`) are only accepted for a range fetched in one call.
+    :return: {'result': `The merged list.`}
+    """
+    spec = DICT_DATE_RANGE_SPECS[api_name]
+    ranges = split_date_range(start_date, end_date, spec.max_days)
+    _check_limit_args(api_name, spec, kargs, len(ranges))
+    if any(_is_set(kargs.get(k)) for k in spec.limit_args):
+        return send_http_request(api_name, start_date=start_date, end_date=end_date, **kargs)
+    results = _fetch_ranges(api_name, ranges, kargs, max_workers, spec.max_items)
+    if spec.descending:
+        results.reverse()
+    return {'result': [item for _, _, items, _ in results for item in items]}
+
+
+class _Series:
+    """
+    The items of one API call (minus the date range) held by a `DateRangeStore`, bucketed by day, and the date ranges
+    that are final (i.e. fully fetched, and old enough not to change).
+    """
+
+    def __init__(self, covered=None, days=None):
+        self.covered = covered or []  # sorted, non-overlapping [start_ordinal, end_ordinal] pairs
+        self.days = days or {}  # 'YYYY-mm-dd' -> list of items, in the API's order
+
+    def missing(self, start, end):
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.covered:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start - 1))
+            cursor = max(cursor, covered_end + 1)
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def add(self, start, end, items, date_field, final_until, truncated=False):
+        for ordinal in range(start, end + 1):
+            self.days.pop(datetime.date.fromordinal(ordinal).isoformat(), None)
+        fallback_day = datetime.date.fromordinal(start).isoformat()
+        for item in items:
+            day = str(item.get(date_field) or fallback_day)[:10] if isinstance(item, dict) else fallback_day
+            self.days.setdefault(day, []).append(item)
+
+        end = min(end, final_until)
+        if start > end or truncated:
+            return
+        # Merge [start, end] into the covered ranges.
+        index = bisect.bisect_left(self.covered, [start, start])
+        if index and self.covered[index - 1][1] >= start - 1:
+            index -= 1
+            start = self.covered[index][0]
+        while index < len(self.covered) and self.covered[index][0] <= end + 1:
+            end = max(end, self.covered[index][1])
+            del self.covered[index]
+        self.covered.insert(index, [start, end])
+
+    def items(self, start, end, descending):
+        days = sorted(d for d in self.days if start <= datetime.date.fromisoformat(d).toordinal() <= end)
+        if descending:
+            days.reverse()
+        return [item for d in days for item in self.days[d]]
+
+
+class DateRangeStore:
+    """
+    Keep the items of time series APIs locally, and only call the API for the date ranges it does not hold yet. Rolling
+    a daily job forward then costs one small request instead of re-fetching the whole range.
+
+    Days within `grace_days` of today (UTC) may still change, so they are fetched again on every call.
+
+    :example:
+        store = DateRangeStore.load('rates.json.z')
+        r = store.fetch('treasury_yield', '2020-01-01', '2024-06-30', duration='duration_10yr')
+        store.save('rates.json.z')
+
+    :param max_workers: Number of threads fetching the missing chunks.
+    :param grace_days: Number of recent days that are not considered final.
+    """
+
+    def __init__(self, max_workers=4, grace_days=1):
+        self.max_workers = max_workers
+        self.grace_days = grace_days
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get_series(self, api_name, kargs):
+        key = f'{api_name}|{normalize_kargs(kargs)}'
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+        return series
+
+    def missing_ranges(self, api_name, start_date, end_date, **kargs):
+        """
+        :return: The (start_date, end_date) ranges that `fetch` would request from the API.
+        """
+        spec = DICT_DATE_RANGE_SPECS[api_name]
+        series = self._get_series(api_name, kargs)
+        with self._lock:
+            gaps = series.missing(to_date(start_date).toordinal(), to_date(end_date).toordinal())
+        ranges = []
+        for gap_start, gap_end in gaps:
+            ranges += split_date_range(datetime.date.fromordinal(gap_start), datetime.date.fromordinal(gap_end), spec.max_days)
+        return ranges
+
+    def fetch(self, api_name, start_date, end_date, **kargs):
+        """
+        Same as `fetch_date_range`, but only the missing date ranges are requested.
+
+        :return: {'result': `The merged list.`}
+        """
+        spec = DICT_DATE_RANGE_SPECS[api_name]
+        # The items are kept by day, which a per-call limit (such as a top-N) would make incomplete.
+        _check_limit_args(api_name, spec, kargs, float('inf'))
+        series = self._get_series(api_name, kargs)
+        ranges = self.missing_ranges(api_name, start_date, end_date, **kargs)
+        if ranges:
+            logger.debug(f'Fetching {len(ranges)} range(s) of `{api_name}`: {ranges}')
+            final_until = (datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=self.grace_days)).toordinal()
+            results = _fetch_ranges(api_name, ranges, kargs, self.max_workers, spec.max_items)
+            with self._lock:
+                for s, e, items, truncated in results:
+                    # A truncated day is not covered, so that it is fetched again.
+                    series.add(to_date(s).toordinal(), to_date(e).toordinal(), items, spec.date_field, final_until, truncated)
+        with self._lock:
+            return {'result': series.items(to_date(start_date).toordinal(), to_date(end_date).toordinal(), spec.descending)}
+
+    def save(self, path):
+        """
+        Save the store to a compressed JSON file (atomically, through a temporary file).
+        """
+        with self._lock:
+            data = {key: {'covered': s.covered, 'days': s.days} for key, s in self._series.items()}
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(json.dumps(data, separators=(',', ':')).encode()))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, **kargs):
+        """
+        Load a store saved by `save`. If the file does not exist, return an empty store.
+        """
+        store = cls(**kargs)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = json.loads(zlib.decompress(f.read()))
+            store._series = {key: _Series(s['covered'], s['days']) for key, s in data.items()}
+        return store
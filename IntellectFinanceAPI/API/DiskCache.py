@@ -0,0 +1,264 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# A TTL rule is a function of the keyword arguments of one call, returning how long (in seconds) its result can be
+# cached. `IMMUTABLE` means forever, and `0` means the result is not cached.
+IMMUTABLE = float('inf')
+
+
+def ttl(seconds):
+    """
+    Cache the results for a fixed number of seconds.
+    """
+    def rule(kargs):
+        return seconds
+    return rule
+
+
+def immutable_after_date(date_field, grace_days=2, ttl_before=3600):
+    """
+    Cache the results forever once the date in `date_field` (such as `end_date`) is more than `grace_days` in the past,
+    since the data of a closed window does not change anymore. Before that, cache them for `ttl_before` seconds.
+    """
+    def rule(kargs):
+        date_str = str(kargs.get(date_field) or '')[:10]
+        cutoff = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=grace_days)).strftime('%Y-%m-%d')
+        if len(date_str) == 10 and date_str < cutoff:
+            return IMMUTABLE
+        return ttl_before
+    return rule
+
+
+def immutable_after_quarter(quarter_field, grace_days=120, ttl_before=86400):
+    """
+    Same as `immutable_after_date`, for a year-quarter such as `2022Q1`. The grace period leaves time for the filings of
+    the quarter to be published.
+    """
+    def rule(kargs):
+        year_quarter = str(kargs.get(quarter_field) or '').upper()
+        try:
+            year, quarter = int(year_quarter[:4]), int(year_quarter.split('Q')[1])
+            quarter_end = datetime.date(year + quarter // 4, quarter % 4 * 3 + 1, 1)  # first day of the next quarter
+        except (ValueError, IndexError):
+            return ttl_before
+        if quarter_end + datetime.timedelta(days=grace_days) < datetime.datetime.now(datetime.timezone.utc).date():
+            return IMMUTABLE
+        return ttl_before
+    return rule
+
+
+ONE_HOUR = 3600
+ONE_DAY = 86400
+
+DICT_DEFAULT_TTL_RULES = {
+    'news_by_ticker': immutable_after_date('end_date'),
+    'news_by_topic': immutable_after_date('end_date'),
+    'news_by_source': immutable_after_date('end_time'),
+    'time_series_topic_names': immutable_after_date('end_date'),
+    'time_series_topic_sentiment': immutable_after_date('end_date'),
+    'time_series_topic_embedding': immutable_after_date('end_date'),
+    'time_series_relevant_topics_by_topic': immutable_after_date('end_date'),
+    'time_series_relevant_tickers_by_topic': immutable_after_date('end_date'),
+    'time_series_ticker_sentiment': immutable_after_date('end_date'),
+    'annualized_sharpe_ratio_by_ticker': immutable_after_date('end_date'),
+    'max_drawdown_by_ticker': immutable_after_date('end_date'),
+    'treasury_yield': immutable_after_date('end_date'),
+    'treasury_real_yield': immutable_after_date('end_date'),
+    'fed_fund_target_rate': immutable_after_date('end_date'),
+    'list_sec_daily_filings': immutable_after_date('date'),
+    'sec_8k_6k': immutable_after_date('end_date'),
+    'sec_other': immutable_after_date('end_date'),
+    'sec_10k_10q_20f_40f': immutable_after_date('end_date'),
+    'sec_345': immutable_after_date('end_date'),
+    'sec_raw_financial_data': immutable_after_quarter('year_quarter'),
+    'fundamental_metrics': ttl(ONE_DAY),
+    'sec_cleaned_financial_data': ttl(ONE_DAY),
+    'company_info_by_cik': ttl(ONE_DAY),
+    'company_info_by_ticker': ttl(ONE_DAY),
+    'tickers_available': ttl(ONE_DAY),
+    'big_index_holdings': ttl(ONE_DAY),
+    'relevant_tickers_by_ticker': ttl(ONE_DAY),
+    'relevance_score_between_two_tickers': ttl(ONE_DAY),
+    'stocker_screener': ttl(ONE_HOUR),
+    'research_report': ttl(ONE_DAY),
+    'buy_sell_or_hold_rating': ttl(ONE_DAY),
+    'summary_news': ttl(ONE_HOUR),
+    'earning_call_and_other_presentations': ttl(ONE_DAY),
+}
+
+
+def normalize_kargs(kargs):
+    """
+    Normalize the keyword arguments of a call into a stable string. `None` values are dropped and the other values are
+    converted to strings, the same way `_generate_url` does, so two calls sending the same URL share the same key.
+    """
+    return json.dumps(sorted((k, str(v)) for k, v in kargs.items() if v is not None and k != 'apikey'))
+
+
+def make_cache_key(api_name, kargs):
+    return hashlib.sha256(f'{api_name}|{normalize_kargs(kargs)}'.encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    A persistent response cache in a SQLite file. The values are zlib-compressed JSON, the total size is capped, and
+    the least recently used entries are evicted first. SQLite's locking makes it safe to share the file across the
+    threads and processes of the same host.
+
+    :param path: Path of the SQLite file.
+    :param max_bytes: Cap of the total (compressed) size of the values.
+    :param ttl_rules: Dictionary from API name to a TTL rule. APIs without a rule are not cached.
+    """
+    _SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        api_name TEXT NOT NULL,
+        kargs TEXT NOT NULL,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+    CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    INSERT OR IGNORE INTO stats VALUES ('total_size', 0);
+    CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+        UPDATE stats SET value = value + NEW.size WHERE name = 'total_size';
+    END;
+    CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+        UPDATE stats SET value = value - OLD.size WHERE name = 'total_size';
+    END;
+    '''
+
+    # Only refresh `last_access` of an entry once per this many seconds, so reads rarely need a write lock.
+    ACCESS_RESOLUTION = 60
+
+    def __init__(self, path, max_bytes=1 << 30, ttl_rules=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_rules = dict(DICT_DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(self._SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            import sqlite3  # Only imported once the cache is used, as it is disabled by default.
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get_ttl(self, api_name, kargs):
+        rule = self.ttl_rules.get(api_name)
+        return rule(kargs) if rule is not None else 0
+
+    def get(self, api_name, kargs):
+        """
+        :return: The cached result, or `None` if it is missing or expired.
+        """
+        if api_name not in self.ttl_rules:
+            return None
+        key = make_cache_key(api_name, kargs)
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute('SELECT value, expires_at, last_access FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at, last_access = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute('DELETE FROM responses WHERE key = ? AND expires_at <= ?', (key, now))
+            return None
+        if now - last_access > self.ACCESS_RESOLUTION:
+            conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+        return json.loads(zlib.decompress(value))
+
+    def set(self, api_name, kargs, result_dict):
+        seconds = self.get_ttl(api_name, kargs)
+        if not seconds:
+            return
+        now = time.time()
+        expires_at = None if seconds == IMMUTABLE else now + seconds
+        value = zlib.compress(json.dumps(result_dict, separators=(',', ':')).encode(), 6)
+        if len(value) > self.max_bytes:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Delete first (instead of `INSERT OR REPLACE`), so the triggers keep the total size right.
+            conn.execute('DELETE FROM responses WHERE key = ?', (make_cache_key(api_name, kargs),))
+            conn.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (make_cache_key(api_name, kargs), api_name, normalize_kargs(kargs), value, len(value), expires_at, now))
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        total_size = conn.execute("SELECT value FROM stats WHERE name = 'total_size'").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+        conn.execute('DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+        while True:
+            total_size = conn.execute("SELECT value FROM stats WHERE name = 'total_size'").fetchone()[0]
+            if total_size <= self.max_bytes:
+                return
+            conn.execute('DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT 64)')
+
+    def invalidate(self, api_name=None, **kargs):
+        """
+        Delete one cached call (`invalidate('treasury_yield', duration=..., ...)`), every call of an API
+        (`invalidate('treasury_yield')`), or everything (`invalidate()`).
+        """
+        conn = self._connect()
+        if api_name is None:
+            conn.execute('DELETE FROM responses')
+        elif kargs:
+            conn.execute('DELETE FROM responses WHERE key = ?', (make_cache_key(api_name, kargs),))
+        else:
+            conn.execute('DELETE FROM responses WHERE api_name = ?', (api_name,))
+
+    def total_size(self):
+        return self._connect().execute("SELECT value FROM stats WHERE name = 'total_size'").fetchone()[0]
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+
+DICT_DISK_CACHE = {
+    'cache': None
+}
+
+
+def enable_disk_cache(path=None, max_bytes=1 << 30, ttl_rules=None):
+    """
+    Cache the API results on disk, in front of `send_http_request`. The API key is never part of the cache key.
+
+    :example: enable_disk_cache(max_bytes=10 * 1024 ** 3, ttl_rules={**DICT_DEFAULT_TTL_RULES, 'search_company': ttl(86400)})
+
+    :param path: Optional (default value is `~/.cache/IntellectFinanceAPI/responses.sqlite3`). Path of the cache file.
+    :param max_bytes: Optional (default value is 1 GB). Cap of the compressed size of the cache.
+    :param ttl_rules: Optional (default value is `DICT_DEFAULT_TTL_RULES`). Dictionary from API name to a TTL rule.
+    :return: The `DiskCache`.
+    """
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'), '.cache', 'IntellectFinanceAPI', 'responses.sqlite3')
+    DICT_DISK_CACHE['cache'] = DiskCache(path, max_bytes=max_bytes, ttl_rules=ttl_rules)
+    return DICT_DISK_CACHE['cache']
+
+
+def disable_disk_cache():
+    DICT_DISK_CACHE['cache'] = None
+
+
+def get_disk_cache():
+    return DICT_DISK_CACHE['cache']
@@ -1,8 +1,6 @@
 import logging
 
 import re
-from PyHelpers import move_date_str
-from WarrensDataAccess.TopicCollectionReadOnlyV2 import TopicNotFoundError as TopicNotFoundError_
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -27,24 +25,38 @@ class APIError(Exception):
         return f'{type(self).__name__}: {self.error}'
 
 
-class TopicNotFoundError(APIError, TopicNotFoundError_):
+class APITotalCreditsExceed(APIError):
     """
     If you are in any non-unlimited plan, and call the APT too many times, we will raise this error.
     """
     pass
 
 
-class APITotalCreditsExceed(APIError):
+class APIQPSLimitExceed(APIError):
     """
-    If you are in any non-unlimited plan, and call the APT too many times, we will raise this error.
+    If you call the API too fast and exceeds your plan's QPS (query per second) limit, we will raise this error.
     """
-    pass
 
 
-class APIQPSLimitExceed(APIError):
+class ServiceUnavailableError(APIError):
     """
-    If you call the API too fast and exceeds your plan's QPS (query per second) limit, we will raise this error.
+    The service (or a gateway in front of it) answered with HTTP 502, 503 or 504. It is usually temporary.
+    """
+    STATUS_CODE = 503
+
+
+class CircuitBreakerOpenError(APIError):
+    """
+    Raised by the client, without calling the API, when the recent calls of an API kept failing. See `RetryPolicy`.
+    """
+    STATUS_CODE = 503
+
+
+class RecordingNotFoundError(APIError):
     """
+    Raised by a `ReplayTransport`, without calling the API, when the request was not recorded.
+    """
+    STATUS_CODE = 404
 
 
 class UnknownAPIError(APIError):
@@ -82,7 +94,49 @@ class ExceptionNoCIKFound(APIError):
     pass
 
 
-LIST_KNOWN_ERROR_NAMES = []
+def _make_topic_not_found_error():
+    # `TopicNotFoundError` also subclasses the error of `WarrensDataAccess`, which is slow to import and optional: it is
+    # only imported the first time `TopicNotFoundError` is used.
+    try:
+        from WarrensDataAccess.TopicCollectionReadOnlyV2 import TopicNotFoundError as TopicNotFoundError_
+        bases = (APIError, TopicNotFoundError_)
+    except ImportError:
+        bases = (APIError,)
+    
+    class TopicNotFoundError(*bases):
+        """
+        If you are in any non-unlimited plan, and call the APT too many times, we will raise this error.
+        """
+        pass
+    
+    TopicNotFoundError.__module__ = __name__
+    TopicNotFoundError.__qualname__ = 'TopicNotFoundError'
+    return TopicNotFoundError
+
+
+_LAZY_ERRORS = {
+    'TopicNotFoundError': _make_topic_not_found_error,
+}
+
+
+def __getattr__(name):
+    make_error = _LAZY_ERRORS.get(name)
+    if make_error is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    error_class = globals()[name] = make_error()
+    return error_class
+
+
+def get_error_class(error_type):
+    """
+    :return: The error class named `error_type`, or `None` if it is not a known error.
+    """
+    if error_type not in LIST_KNOWN_ERROR_NAMES:
+        return None
+    return globals().get(error_type) or __getattr__(error_type)
+
+
+LIST_KNOWN_ERROR_NAMES = list(_LAZY_ERRORS)
 for k in list(globals().values()):
     try:
         if issubclass(k, APIError):
@@ -99,6 +153,7 @@ def check_date_range(request, start_date, end_date, LARGEST_DATA_RANGE=None):
         raise ParameterInvalidError(f'`end_date` must be in the format of YYYY-mm-dd, you provided `{end_date}`.')
     
     if LARGEST_DATA_RANGE:
+        from PyHelpers import move_date_str
         if move_date_str(date_str=start_date, days=LARGEST_DATA_RANGE) < end_date:
             if str(request.GET.get('SKIP_CONSTRAINT')).lower() in ['1', 'true']:
                 pass
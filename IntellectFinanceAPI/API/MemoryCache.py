@@ -0,0 +1,196 @@
+import collections
+import contextlib
+import contextvars
+import copy
+import marshal
+import threading
+import time
+
+from IntellectFinanceAPI.API.DiskCache import DICT_DEFAULT_TTL_RULES, IMMUTABLE, normalize_kargs
+
+_BYPASS = contextvars.ContextVar('IntellectFinanceAPI_bypass_memory_cache', default=False)
+
+
+def _read_only(*args, **kargs):
+    raise TypeError('This result is shared by the in-memory cache and is read-only. Copy it before changing it.')
+
+
+class ReadOnlyDict(dict):
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _read_only
+
+    # The copies (and the unpickled objects) are plain, writable dictionaries. A shallow copy keeps the read-only values.
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        result = memo[id(self)] = {}
+        for k, v in self.items():
+            result[copy.deepcopy(k, memo)] = copy.deepcopy(v, memo)
+        return result
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class ReadOnlyList(list):
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        result = memo[id(self)] = []
+        result.extend(copy.deepcopy(v, memo) for v in self)
+        return result
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def freeze(obj):
+    """
+    Recursively convert the dictionaries and lists of a JSON result into their read-only subclasses.
+    """
+    if isinstance(obj, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return ReadOnlyList(freeze(v) for v in obj)
+    return obj
+
+
+class MemoryCache:
+    """
+    A thread-safe in-process LRU cache of API results, bounded both by the number of entries and by their approximate
+    size in bytes.
+
+    :param max_entries: Max number of cached results.
+    :param max_bytes: Max approximate size of the cached results.
+    :param ttl_rules: Dictionary from API name to a TTL rule (see `DiskCache.py`). APIs without a rule are not cached.
+    :param read_only: If False (default), each hit returns a fresh copy of the result, rebuilt with `marshal` (much
+        cheaper than `copy.deepcopy`). If True, all hits share one read-only result and nothing is copied.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 ** 2, ttl_rules=None, read_only=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_rules = dict(DICT_DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)
+        self.read_only = read_only
+        self._entries = collections.OrderedDict()  # key -> (expires_at, size, value); the last one is the most recently used.
+        self._n_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, api_name, kargs):
+        """
+        :return: The cached result, or `None` if it is missing or expired.
+        """
+        if api_name not in self.ttl_rules:
+            return None
+        key = (api_name, normalize_kargs(kargs))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._n_bytes -= size
+                return None
+            self._entries.move_to_end(key)
+        return value if self.read_only else marshal.loads(value)
+
+    def set(self, api_name, kargs, result_dict):
+        rule = self.ttl_rules.get(api_name)
+        seconds = rule(kargs) if rule is not None else 0
+        if not seconds:
+            return
+        expires_at = IMMUTABLE if seconds == IMMUTABLE else time.monotonic() + seconds
+        serialized = marshal.dumps(result_dict)
+        size = len(serialized)
+        if size > self.max_bytes:
+            return
+        value = freeze(result_dict) if self.read_only else serialized
+        key = (api_name, normalize_kargs(kargs))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._n_bytes -= old[1]
+            self._entries[key] = (expires_at, size, value)
+            self._n_bytes += size
+            while len(self._entries) > self.max_entries or self._n_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._n_bytes -= evicted_size
+
+    def invalidate(self, api_name=None, **kargs):
+        """
+        Delete one cached call (`invalidate('company_info_by_ticker', ticker='AAPL')`), every call of an API
+        (`invalidate('company_info_by_ticker')`), or everything (`invalidate()`).
+        """
+        with self._lock:
+            if api_name is None:
+                keys = list(self._entries)
+            elif kargs:
+                keys = [(api_name, normalize_kargs(kargs))]
+            else:
+                keys = [k for k in self._entries if k[0] == api_name]
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._n_bytes -= entry[1]
+
+    @property
+    def n_bytes(self):
+        return self._n_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+DICT_MEMORY_CACHE = {
+    'cache': None
+}
+
+
+def enable_memory_cache(max_entries=1024, max_bytes=64 * 1024 ** 2, ttl_rules=None, read_only=False):
+    """
+    Memoize the API results in memory, in front of `send_http_request` (and in front of the disk cache, if enabled).
+    See `MemoryCache` for the parameters.
+
+    :return: The `MemoryCache`.
+    """
+    DICT_MEMORY_CACHE['cache'] = MemoryCache(max_entries=max_entries, max_bytes=max_bytes, ttl_rules=ttl_rules, read_only=read_only)
+    return DICT_MEMORY_CACHE['cache']
+
+
+def disable_memory_cache():
+    DICT_MEMORY_CACHE['cache'] = None
+
+
+def get_memory_cache():
+    """
+    :return: The enabled `MemoryCache`, or `None` if it is disabled or bypassed by `bypass_memory_cache`.
+    """
+    if _BYPASS.get():
+        return None
+    return DICT_MEMORY_CACHE['cache']
+
+
+def invalidate_memory_cache(api_name=None, **kargs):
+    cache = DICT_MEMORY_CACHE['cache']
+    if cache is not None:
+        cache.invalidate(api_name, **kargs)
+
+
+@contextlib.contextmanager
+def bypass_memory_cache():
+    """
+    Within this block (in the current thread or task), calls neither read nor fill the in-memory cache.
+
+    :example:
+        with bypass_memory_cache():
+            r = company_info_by_ticker(ticker='AAPL')
+    """
+    token = _BYPASS.set(True)
+    try:
+        yield
+    finally:
+        _BYPASS.reset(token)
@@ -0,0 +1,219 @@
+import bisect
+import threading
+import time
+
+# Upper bounds (in seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_PREFIX = 'intellect_finance'
+
+
+class EndpointMetrics:
+    """
+    The counters of one API. `latency_buckets[i]` counts the requests that took at most `LATENCY_BUCKETS[i]` seconds
+    (and more than the previous bound); the last one counts the slower requests.
+    """
+    __slots__ = ('requests', 'latency_buckets', 'latency_sum', 'response_bytes', 'retries', 'errors', 'cache_hits',
+                 'cache_misses')
+
+    def __init__(self):
+        self.requests = 0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.response_bytes = 0
+        self.retries = 0
+        self.errors = {}  # error class name -> count
+        self.cache_hits = {'memory': 0, 'disk': 0}
+        self.cache_misses = 0
+
+    def latency_quantile(self, q):
+        """
+        :return: An estimate of the `q` quantile (e.g. 0.99) of the latency, interpolated within its histogram bucket
+            (the same way as Prometheus' `histogram_quantile`), or `None` without requests.
+        """
+        rank = q * self.requests
+        if not self.requests:
+            return None
+        cumulative = 0
+        for i, count in enumerate(self.latency_buckets):
+            if cumulative + count >= rank and count:
+                if i == len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                return lower + (LATENCY_BUCKETS[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return LATENCY_BUCKETS[-1]
+
+    def to_dict(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.latency_buckets):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            'requests': self.requests,
+            'latency': {'count': self.requests, 'sum': self.latency_sum, 'buckets': buckets,
+                        'p50': self.latency_quantile(0.5), 'p99': self.latency_quantile(0.99)},
+            'response_bytes': self.response_bytes,
+            'retries': self.retries,
+            'errors': dict(self.errors),
+            'cache_hits': dict(self.cache_hits),
+            'cache_misses': self.cache_misses,
+        }
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class Metrics:
+    """
+    Thread-safe per-API counters of the calls of `send_http_request` (and its asyncio twin): HTTP requests (retries
+    included) and their latency and response size on the wire, retries, errors raised to the caller (by class), and
+    cache hits and misses. Recording a request costs one lock and a few additions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.started_at = time.time()
+
+    def _get(self, api_name):
+        endpoint = self._endpoints.get(api_name)
+        if endpoint is None:
+            endpoint = self._endpoints[api_name] = EndpointMetrics()
+        return endpoint
+
+    def observe_request(self, api_name, seconds, response_bytes=0):
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            endpoint = self._get(api_name)
+            endpoint.requests += 1
+            endpoint.latency_buckets[index] += 1
+            endpoint.latency_sum += seconds
+            endpoint.response_bytes += response_bytes
+
+    def observe_retry(self, api_name):
+        with self._lock:
+            self._get(api_name).retries += 1
+
+    def observe_error(self, api_name, error):
+        name = type(error).__name__
+        with self._lock:
+            errors = self._get(api_name).errors
+            errors[name] = errors.get(name, 0) + 1
+
+    def observe_cache(self, api_name, cache_name):
+        """
+        :param cache_name: `memory` or `disk` for a hit, `None` for a miss.
+        """
+        with self._lock:
+            endpoint = self._get(api_name)
+            if cache_name is None:
+                endpoint.cache_misses += 1
+            else:
+                endpoint.cache_hits[cache_name] += 1
+
+    def snapshot(self):
+        """
+        :return: A dictionary from API name to its counters (see `EndpointMetrics.to_dict`). The latency buckets are
+            cumulative, keyed by their upper bound in seconds.
+        """
+        with self._lock:
+            return {api_name: endpoint.to_dict() for api_name, endpoint in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """
+        :return: The counters in the Prometheus text exposition format (version 0.0.4).
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+            for suffix, labels, value in samples:
+                label_str = ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+                lines.append(f'{prefix}_{name}{suffix}{{{label_str}}} {value}')
+
+        family('requests_total', 'counter', 'HTTP requests sent to the API, retries included.',
+               [('', [('api_name', a)], m['requests']) for a, m in snapshot.items()])
+        latency_samples = []
+        for a, m in snapshot.items():
+            for bound, count in m['latency']['buckets'].items():
+                latency_samples.append(('_bucket', [('api_name', a), ('le', _format_bound(bound))], count))
+            latency_samples.append(('_sum', [('api_name', a)], repr(m['latency']['sum'])))
+            latency_samples.append(('_count', [('api_name', a)], m['latency']['count']))
+        family('request_duration_seconds', 'histogram', 'Latency of the HTTP requests.', latency_samples)
+        family('response_bytes_total', 'counter', 'Bytes of the responses, as received on the wire.',
+               [('', [('api_name', a)], m['response_bytes']) for a, m in snapshot.items()])
+        family('retries_total', 'counter', 'Requests retried.',
+               [('', [('api_name', a)], m['retries']) for a, m in snapshot.items()])
+        family('errors_total', 'counter', 'Errors raised to the caller, by class.',
+               [('', [('api_name', a), ('error_type', e)], n) for a, m in snapshot.items() for e, n in sorted(m['errors'].items())])
+        family('cache_hits_total', 'counter', 'Results read from a cache.',
+               [('', [('api_name', a), ('cache', c)], n) for a, m in snapshot.items() for c, n in m['cache_hits'].items()])
+        family('cache_misses_total', 'counter', 'Results not found in the enabled caches.',
+               [('', [('api_name', a)], m['cache_misses']) for a, m in snapshot.items()])
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port=9464, host='127.0.0.1'):
+        """
+        Serve `to_prometheus` at `http://host:port/metrics` from a daemon thread, for Prometheus to scrape.
+
+        :return: The `http.server.ThreadingHTTPServer` (call its `shutdown` to stop it).
+        """
+        import http.server
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='IntellectFinanceAPI-metrics', daemon=True).start()
+        return server
+
+
+DICT_METRICS = {
+    'metrics': None
+}
+
+
+def enable_metrics():
+    """
+    Record the per-API metrics of the calls from now on (see `Metrics`).
+
+    :return: The `Metrics`.
+    """
+    if DICT_METRICS['metrics'] is None:
+        DICT_METRICS['metrics'] = Metrics()
+    return DICT_METRICS['metrics']
+
+
+def disable_metrics():
+    DICT_METRICS['metrics'] = None
+
+
+def get_metrics():
+    """
+    :return: The enabled `Metrics`, or `None`.
+    """
+    return DICT_METRICS['metrics']
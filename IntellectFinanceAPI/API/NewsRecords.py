@@ -0,0 +1,102 @@
+import collections.abc
+import json
+import sys
+
+_MISSING = object()
+
+# Fields whose values repeat across many news items (publishers, categories); they are interned to share one copy.
+_INTERNED_FIELDS = ('p',)
+_INTERNED_LIST_FIELDS = ('sub_p',)
+# Nested fields kept as compact JSON text, and decoded when they are accessed.
+_LAZY_FIELDS = ('other_tickers',)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class NewsItem(collections.abc.Mapping):
+    """
+    A compact, read-only news item, as returned by `news_by_ticker`, `news_by_topic` and `news_by_source`. It behaves
+    like the original dictionary (`item['h']`, `item.get('p')`, `dict(item)`), but uses a fraction of its memory:
+
+    - the known keys are slots instead of a per-item dictionary;
+    - publisher (`p`) and category (`sub_p`) strings are interned, so all items share one copy of each;
+    - `other_tickers` is kept as compact JSON text, and decoded each time it is accessed.
+
+    Unknown keys are kept in a small dictionary.
+    """
+    FIELDS = ('emo', 'h', 'i', 'p', 'pub_t', 's', 'sub_p', 'u', 'other_tickers', 'len', 'len_by_p', 'landing_index')
+    __slots__ = tuple(f'_{f}' for f in FIELDS) + ('_extra',)
+
+    def __init__(self, **kargs):
+        for field in self.FIELDS:
+            value = kargs.pop(field, _MISSING)
+            if value is not _MISSING:
+                if field in _INTERNED_FIELDS:
+                    value = _intern(value)
+                elif field in _INTERNED_LIST_FIELDS and isinstance(value, list):
+                    value = tuple(_intern(v) for v in value)
+                elif field in _LAZY_FIELDS and value is not None:
+                    value = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+                elif isinstance(value, list):
+                    value = tuple(value)
+            object.__setattr__(self, f'_{field}', value)
+        object.__setattr__(self, '_extra', kargs or None)
+
+    @classmethod
+    def from_dict(cls, item):
+        return cls(**item)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = object.__getattribute__(self, f'_{key}')
+            if value is _MISSING:
+                raise KeyError(key)
+            if key in _LAZY_FIELDS and value is not None:
+                return json.loads(value)
+            if isinstance(value, tuple):
+                return list(value)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if object.__getattribute__(self, f'_{field}') is not _MISSING:
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __setattr__(self, key, value):
+        raise TypeError('NewsItem is read-only. Use `dict(item)` to get a mutable copy.')
+
+    def to_dict(self):
+        return dict(self)
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return f'NewsItem({self.get("pub_t")!r}, {self.get("p")!r}, {self.get("h")!r})'
+
+
+_FIELD_SET = frozenset(NewsItem.FIELDS)
+
+
+def to_news_items(items):
+    """
+    Convert the news dictionaries of a result (or of a `StreamedResponse`) into compact `NewsItem`s.
+
+    :example: to_news_items(news_by_ticker(ticker='AAPL', start_date='2022-06-01', end_date='2022-06-30')['result'])
+
+    :return: A list of `NewsItem`.
+    """
+    return [NewsItem(**item) for item in items]
@@ -0,0 +1,332 @@
+import collections
+import concurrent.futures
+import datetime
+import logging
+import time
+
+from IntellectFinanceAPI.API.DateRange import split_date_range
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import send_http_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Returned by `next_kargs` when the parameters of the next page depend on the content of the current one.
+_NEEDS_PAGE = object()
+
+
+class OffsetPaging:
+    """
+    Pages of `search_for_llm`, walked with its `offset` parameter. The offsets of the next pages are known in advance,
+    so several of them can be prefetched at once. The walk stops at the first empty page.
+    """
+
+    def __init__(self, page_size=10):
+        self.page_size = page_size
+
+    def first_kargs(self, kargs):
+        return dict(kargs, offset=kargs.get('offset') or 0)
+
+    def next_kargs(self, kargs, page):
+        # The offset is the (1-based) position of the first result: 0 or 1 for the first page, 11 for the second.
+        return dict(kargs, offset=max(kargs['offset'], 1) + self.page_size)
+
+    def filter_page(self, page):
+        return page
+
+
+class TimeCursorPaging:
+    """
+    Pages of `news_by_ticker`, which returns at most `stop_at_number_of_news` news, the latest first: the next page ends
+    on the day of the oldest news of the current page. The news of that day that were already returned are skipped.
+    """
+
+    def __init__(self, date_field='pub_t'):
+        self.date_field = date_field
+        self._boundary_keys = set()
+
+    def first_kargs(self, kargs):
+        if str(kargs.get('if_most_relevant_news_ind')).lower() == 'true':
+            raise ParameterInvalidError('News sorted by relevance (`if_most_relevant_news_ind`) cannot be paginated.')
+        return dict(kargs, stop_at_number_of_news=kargs.get('stop_at_number_of_news') or 1000)
+
+    def next_kargs(self, kargs, page):
+        if page is None:
+            return _NEEDS_PAGE
+        if len(page) < int(kargs['stop_at_number_of_news']):
+            return None
+        oldest_day = min(str(item.get(self.date_field))[:10] for item in page)
+        if oldest_day >= str(kargs['end_date'])[:10]:
+            # A single day has more news than a page: the rest of that day cannot be reached, so move on to the day before.
+            logger.warning(f'More than {len(page)} news on {oldest_day}; the older news of that day are skipped.')
+            oldest_day = (datetime.date.fromisoformat(oldest_day) - datetime.timedelta(days=1)).isoformat()
+        if oldest_day < str(kargs['start_date'])[:10]:
+            return None
+        return dict(kargs, end_date=oldest_day)
+
+    def _key(self, item):
+        return item.get(self.date_field), item.get('u'), item.get('h')
+
+    def filter_page(self, page):
+        page = [item for item in page if self._key(item) not in self._boundary_keys]
+        if page:
+            oldest_day = min(str(item.get(self.date_field))[:10] for item in page)
+            self._boundary_keys = {self._key(item) for item in page if str(item.get(self.date_field))[:10] == oldest_day}
+        return page
+
+
+class DateWindowPaging:
+    """
+    Pages of a date range API (such as `news_by_topic`): one page per window of `window_days` days, the latest window
+    first. All the windows are known in advance, so several of them can be prefetched at once.
+    """
+
+    def __init__(self, window_days=1):
+        self.window_days = window_days
+        self._windows = None
+
+    def first_kargs(self, kargs):
+        self._windows = collections.deque(split_date_range(kargs['start_date'], kargs['end_date'], self.window_days))
+        return self._next_window(kargs)
+
+    def next_kargs(self, kargs, page):
+        return self._next_window(kargs) if self._windows else None
+
+    def _next_window(self, kargs):
+        start_date, end_date = self._windows.pop()
+        return dict(kargs, start_date=start_date, end_date=end_date)
+
+    def filter_page(self, page):
+        return page
+
+
+# API name -> factory of its paging strategy. The strategies keep state, so each walk gets a new one.
+DICT_PAGINATION = {
+    'search_for_llm': OffsetPaging,
+    'news_by_ticker': TimeCursorPaging,
+    'news_by_topic': lambda: DateWindowPaging(window_days=1),
+}
+
+
+def _get_paging(api_name):
+    if api_name not in DICT_PAGINATION:
+        raise ParameterInvalidError(f'`{api_name}` cannot be paginated. Use one of {list(DICT_PAGINATION)}.')
+    return DICT_PAGINATION[api_name]()
+
+
+class _PaginatorBase:
+
+    def __init__(self, api_name, kargs, prefetch=2, max_items=None, timeout=None):
+        self.api_name = api_name
+        self.prefetch = prefetch
+        self.max_items = max_items
+        self.timeout = timeout
+        self.n_pages = 0
+        self.n_items = 0
+        self.timed_out = False
+        self.done = False
+        self._paging = _get_paging(api_name)
+        self._next_kargs = self._paging.first_kargs(kargs)
+        self._pending = collections.deque()  # (kargs, future or task), in page order
+        self._deadline = None
+
+    def _remaining_time(self):
+        return None if self._deadline is None else max(0.0, self._deadline - time.monotonic())
+
+    def _schedule(self, submit, n_pages):
+        """
+        Start the calls of the next pages, until `n_pages` of them are in flight.
+        """
+        while self._next_kargs is not None and self._next_kargs is not _NEEDS_PAGE and len(self._pending) < n_pages:
+            if self._remaining_time() == 0:
+                return
+            kargs = self._next_kargs
+            self._pending.append((kargs, submit(kargs)))
+            self._next_kargs = self._paging.next_kargs(kargs, None)
+
+    def _on_page(self, kargs, result, submit):
+        """
+        :return: The items to hand to the caller (possibly none, once the duplicates are removed), or `None` if the walk
+            is over.
+        """
+        page = result.get('result') or []
+        if self._next_kargs is _NEEDS_PAGE:
+            self._next_kargs = self._paging.next_kargs(kargs, page)
+        if not page:
+            return None
+        page = self._paging.filter_page(page)
+        if self.max_items is not None:
+            page = page[:self.max_items - self.n_items]
+            if self.n_items + len(page) >= self.max_items:
+                self._next_kargs = None
+                self.done = True
+        # Start fetching the next pages before the caller processes this one.
+        self._schedule(submit, self.prefetch)
+        self.n_pages += 1
+        self.n_items += len(page)
+        return page
+
+    def _on_timeout(self):
+        logger.info(f'Stop paginating `{self.api_name}` after {self.timeout}s ({self.n_pages} pages).')
+        self.timed_out = True
+
+
+class Paginator(_PaginatorBase):
+    """
+    An iterator over the pages (lists of items) of an API, which fetches the next `prefetch` pages in the background
+    while the caller processes the current one. It stops after `max_items` items, or `timeout` seconds.
+    """
+
+    def __init__(self, api_name, kargs, prefetch=2, max_items=None, timeout=None):
+        super().__init__(api_name, kargs, prefetch=prefetch, max_items=max_items, timeout=timeout)
+        self._executor = None
+        self._iterator = self._iter()
+
+    def _submit(self, kargs):
+        return self._executor.submit(send_http_request, self.api_name, **kargs)
+
+    def _iter(self):
+        if self.timeout is not None:
+            self._deadline = time.monotonic() + self.timeout
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.prefetch + 1)
+        try:
+            while not self.done:
+                self._schedule(self._submit, self.prefetch + 1)
+                if not self._pending:
+                    return
+                kargs, future = self._pending.popleft()
+                try:
+                    result = future.result(timeout=self._remaining_time())
+                except concurrent.futures.TimeoutError:
+                    self._on_timeout()
+                    return
+                page = self._on_page(kargs, result, self._submit)
+                if page is None:
+                    return
+                if page:
+                    yield page
+                if self._remaining_time() == 0:
+                    self._on_timeout()
+                    return
+        finally:
+            self._pending.clear()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def items(self):
+        """
+        :return: A generator of the items of all the pages.
+        """
+        for page in self:
+            yield from page
+
+    def close(self):
+        """
+        Stop early; the prefetched pages are dropped.
+        """
+        self._iterator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AsyncPaginator(_PaginatorBase):
+    """
+    The asyncio twin of `Paginator`: `async for page in async_iter_pages(...)`. The calls go through the current
+    `AsyncClient`.
+    """
+
+    def __init__(self, api_name, kargs, prefetch=2, max_items=None, timeout=None):
+        super().__init__(api_name, kargs, prefetch=prefetch, max_items=max_items, timeout=timeout)
+        self._iterator = self._iter()
+
+    def _submit(self, kargs):
+        import asyncio
+        from IntellectFinanceAPI.API.AsyncUtility import async_send_http_request
+        return asyncio.ensure_future(async_send_http_request(self.api_name, **kargs))
+
+    async def _iter(self):
+        import asyncio
+        if self.timeout is not None:
+            self._deadline = time.monotonic() + self.timeout
+        try:
+            while not self.done:
+                self._schedule(self._submit, self.prefetch + 1)
+                if not self._pending:
+                    return
+                kargs, task = self._pending.popleft()
+                done, _ = await asyncio.wait([task], timeout=self._remaining_time())
+                if not done:
+                    task.cancel()
+                    self._on_timeout()
+                    return
+                page = self._on_page(kargs, task.result(), self._submit)
+                if page is None:
+                    return
+                if page:
+                    yield page
+                if self._remaining_time() == 0:
+                    self._on_timeout()
+                    return
+        finally:
+            for _, task in self._pending:
+                task.cancel()
+            self._pending.clear()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._iterator.__anext__()
+
+    async def items(self):
+        async for page in self:
+            for item in page:
+                yield item
+
+    async def aclose(self):
+        await self._iterator.aclose()
+
+
+def iter_pages(api_name, prefetch=2, max_items=None, timeout=None, **kargs):
+    """
+    Walk through all the pages of `search_for_llm` (by `offset`), `news_by_ticker` (by date, as it returns at most 1000
+    news per call) or `news_by_topic` (one day at a time), and fetch the next pages in the background while the caller
+    processes the current one.
+
+    :example:
+        for page in iter_pages('search_for_llm', query='Nvidia valuations.', max_items=50):
+            print(len(page))
+        for news in iter_pages('news_by_ticker', ticker='AAPL', start_date='2022-01-01', end_date='2022-12-31').items():
+            print(news['h'])
+
+    :param api_name: One of the APIs in `DICT_PAGINATION`.
+    :param prefetch: Number of pages fetched ahead of the current one. The pages of `news_by_ticker` depend on the
+        previous one, so at most one is fetched ahead.
+    :param max_items: Optional. Stop after this number of items.
+    :param timeout: Optional. Stop (without error) after this number of seconds; `Paginator.timed_out` is then True.
+    :param kargs: The other parameters of the API.
+    :return: A `Paginator`, which yields lists of items.
+    """
+    return Paginator(api_name, kargs, prefetch=prefetch, max_items=max_items, timeout=timeout)
+
+
+def async_iter_pages(api_name, prefetch=2, max_items=None, timeout=None, **kargs):
+    """
+    The asyncio twin of `iter_pages`.
+
+    :example:
+        async for page in async_iter_pages('search_for_llm', query='Nvidia valuations.', max_items=50):
+            print(len(page))
+
+    :return: An `AsyncPaginator`.
+    """
+    return AsyncPaginator(api_name, kargs, prefetch=prefetch, max_items=max_items, timeout=timeout)
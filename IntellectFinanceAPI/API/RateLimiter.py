@@ -0,0 +1,106 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket. Each call takes one token; tokens refill at `qps` per second, up to `burst`.
+
+    Callers reserve a token first and then sleep for the returned delay outside the lock, so the same limiter serves
+    both threads (`acquire`) and coroutines (`async_acquire`).
+    """
+
+    def __init__(self, qps, burst=None):
+        self.qps = float(qps)
+        self.burst = float(burst if burst is not None else max(1.0, qps))
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.qps)
+        self._last_refill = now
+
+    def reserve(self):
+        """
+        Take a token, possibly borrowing it from the future.
+
+        :return: Seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.qps
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def async_acquire(self):
+        import asyncio  # Not imported at module level, to keep it out of the import time of the synchronous API.
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    A token bucket whose rate follows the server's feedback (additive increase, multiplicative decrease):
+
+    - when the server answers with `APIQPSLimitExceed`, the rate is multiplied by `decrease_factor`;
+    - after `success_threshold` successful calls in a row, the rate grows by `increase_step`, up to `max_qps`.
+
+    So the throughput settles just under the plan's ceiling instead of bouncing off it.
+    """
+
+    def __init__(self, max_qps, burst=None, min_qps=0.5, decrease_factor=0.5, increase_step=None, success_threshold=20):
+        super().__init__(max_qps, burst=burst)
+        self.max_qps = float(max_qps)
+        self.min_qps = min(float(min_qps), self.max_qps)
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step if increase_step is not None else max(self.max_qps / 20, 0.1)
+        self.success_threshold = success_threshold
+        self._n_successes = 0
+        self._last_decrease = 0.0
+
+    def on_success(self):
+        with self._lock:
+            self._n_successes += 1
+            if self._n_successes >= self.success_threshold and self.qps < self.max_qps:
+                self._refill(time.monotonic())
+                self.qps = min(self.max_qps, self.qps + self.increase_step)
+                self._n_successes = 0
+
+    def on_throttled(self):
+        with self._lock:
+            now = time.monotonic()
+            self._n_successes = 0
+            # Requests sent in the same second are rejected together; only slow down once for them.
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            self._refill(now)
+            self.qps = max(self.min_qps, self.qps * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+
+
+DICT_RATE_LIMIT = {
+    'limiter': None
+}
+
+
+def set_rate_limit(max_qps, **kargs):
+    """
+    Limit the calls of all threads in this process to `max_qps` per second (typically your plan's QPS limit). The
+    limit adapts to `APIQPSLimitExceed` errors; see `AdaptiveRateLimiter` for the other keyword arguments.
+
+    :param max_qps: Max number of calls per second. `None` removes the limit.
+    """
+    DICT_RATE_LIMIT['limiter'] = AdaptiveRateLimiter(max_qps, **kargs) if max_qps else None
+
+
+def get_rate_limiter():
+    return DICT_RATE_LIMIT['limiter']
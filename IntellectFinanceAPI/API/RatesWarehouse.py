@@ -0,0 +1,272 @@
+"""
+A local store of the rate series (it requires you to pip install `numpy` first).
+
+Each series (`treasury_yield` or `treasury_real_yield` for one duration, or `fed_fund_target_rate`) is kept as two
+date-sorted columns on disk, `datetime64[D]` dates and `float64` values, which are memory-mapped. A range read is two
+binary searches and returns views into the memory maps. The API is only called to extend a series: the new days are
+appended to the files (the days before the stored ones are written to a new generation of both files), and the last
+`grace_days` days (which may still change) are kept in memory for `recent_ttl` seconds.
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from IntellectFinanceAPI.API.DateRange import to_date, fetch_date_range
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError, ParameterMissingError
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+RATES_APIS = ('treasury_yield', 'treasury_real_yield', 'fed_fund_target_rate')
+
+# Keys that may hold the rate in the items of the rates APIs (besides the duration itself).
+_VALUE_FIELDS = ('value', 'rate', 'yield')
+
+_EMPTY_DATES = np.empty(0, dtype='datetime64[D]')
+_EMPTY_VALUES = np.empty(0, dtype=np.float64)
+
+
+def _day(ordinal):
+    return np.datetime64(datetime.date.fromordinal(ordinal), 'D')
+
+
+def _find_value(item, duration):
+    for field in _VALUE_FIELDS + ((duration,) if duration else ()):
+        if isinstance(item.get(field), (int, float)) and not isinstance(item[field], bool):
+            return float(item[field])
+    for name, value in item.items():
+        if name != 'date' and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    return np.nan
+
+
+def _to_columns(items, duration, start, end):
+    """
+    :return: The (dates, values) of the items from day `start` to day `end` (ordinals), sorted by date.
+    """
+    dates = np.array([str(item.get('date'))[:10] for item in items], dtype='datetime64[D]')
+    values = np.array([_find_value(item, duration) for item in items], dtype=np.float64)
+    keep = (dates >= _day(start)) & (dates <= _day(end))
+    dates, values = dates[keep], values[keep]
+    # Sort, and keep the last item of a day given twice.
+    order = np.argsort(dates, kind='stable')
+    dates, values = dates[order], values[order]
+    last = np.append(dates[1:] != dates[:-1], True)
+    return dates[last], values[last]
+
+
+class _Series:
+    """
+    One series: the stored days (`covered`, a [first_ordinal, last_ordinal] pair, both final), their memory-mapped
+    columns, and the recent days held in memory (`tail_*`).
+
+    The metadata file (`<prefix>.json`) is the commit point: it names the generation of the column files and their
+    number of rows, and it is replaced atomically.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.covered = None
+        self.n_rows = 0
+        self.generation = 0
+        self.dates, self.values = _EMPTY_DATES, _EMPTY_VALUES
+        self.tail_dates, self.tail_values = _EMPTY_DATES, _EMPTY_VALUES
+        self.tail_until = None
+        self.tail_fetched_at = 0.0
+        self._load()
+
+    def _file(self, suffix):
+        return f'{self.prefix}.{suffix}'
+
+    def _column_file(self, suffix, generation=None):
+        generation = self.generation if generation is None else generation
+        # The first generation keeps the plain names, so that the files written before generations still load.
+        return self._file(suffix) if generation == 0 else self._file(f'{generation}.{suffix}')
+
+    def _remove_columns(self, generation):
+        for suffix in ('dates', 'values'):
+            try:
+                os.remove(self._column_file(suffix, generation))
+            except OSError:
+                pass  # Missing, or still mapped (on Windows): it is left behind, and never read.
+
+    def _load(self):
+        if not os.path.exists(self._file('json')):
+            return
+        with open(self._file('json')) as f:
+            meta = json.load(f)
+        self.covered, self.n_rows, self.generation = meta['covered'], meta['n_rows'], meta.get('generation', 0)
+        # The metadata is written last: rows appended after it (by a crash mid-write) are dropped, and so are the files
+        # of a generation it does not name yet.
+        for suffix, dtype in (('dates', _EMPTY_DATES.dtype), ('values', _EMPTY_VALUES.dtype)):
+            os.truncate(self._column_file(suffix), self.n_rows * dtype.itemsize)
+        self._remove_columns(self.generation + 1)
+        self._map()
+
+    def _map(self):
+        if self.n_rows:
+            self.dates = np.memmap(self._column_file('dates'), dtype='datetime64[D]', mode='r', shape=(self.n_rows,))
+            self.values = np.memmap(self._column_file('values'), dtype=np.float64, mode='r', shape=(self.n_rows,))
+        else:
+            self.dates, self.values = _EMPTY_DATES, _EMPTY_VALUES
+
+    def _save_meta(self):
+        tmp_path = self._file(f'json.tmp{os.getpid()}')
+        with open(tmp_path, 'w') as f:
+            json.dump({'covered': self.covered, 'n_rows': self.n_rows, 'generation': self.generation}, f)
+        os.replace(tmp_path, self._file('json'))
+
+    def append(self, dates, values, covered):
+        """
+        Append days after the stored ones.
+        """
+        for suffix, column in (('dates', dates), ('values', values)):
+            with open(self._column_file(suffix), 'ab') as f:
+                f.write(np.ascontiguousarray(column).tobytes())
+        self.n_rows += len(dates)
+        self.covered = covered
+        self._save_meta()
+        self._map()
+
+    def prepend(self, dates, values, covered):
+        """
+        Add days before the stored ones. The files are rewritten, which is rare: a series usually grows at its end.
+
+        Both columns are written under the next generation, then the metadata switches to it: a crash before that keeps
+        the previous generation whole, so the dates and the values never get out of step.
+        """
+        old_generation, generation = self.generation, self.generation + 1
+        for suffix, column, old_column in (('dates', dates, self.dates), ('values', values, self.values)):
+            with open(self._column_file(suffix, generation), 'wb') as f:
+                f.write(np.ascontiguousarray(column).tobytes())
+                f.write(np.ascontiguousarray(old_column).tobytes())
+        self.n_rows += len(dates)
+        self.covered = covered
+        self.generation = generation
+        self._save_meta()
+        self._map()
+        self._remove_columns(old_generation)
+
+    def slice(self, start, end):
+        dates, values = self.dates, self.values
+        i = np.searchsorted(dates, _day(start), side='left')
+        j = np.searchsorted(dates, _day(end), side='right')
+        dates, values = dates[i:j], values[i:j]
+        if self.covered is not None and end > self.covered[1] and len(self.tail_dates):
+            k = np.searchsorted(self.tail_dates, _day(max(start, self.covered[1] + 1)), side='left')
+            m = np.searchsorted(self.tail_dates, _day(end), side='right')
+            if m > k:
+                dates = np.concatenate([dates, self.tail_dates[k:m]])
+                values = np.concatenate([values, self.tail_values[k:m]])
+        return dates, values
+
+
+class RatesWarehouse:
+    """
+    The rate series, read from local memory maps and extended from the API when a read goes past the stored days.
+
+    :example:
+        warehouse = RatesWarehouse()
+        dates, values = warehouse.treasury_yield('duration_10yr', '2020-01-01', '2024-06-30')
+        warehouse.rate_on('fed_fund_target_rate', '2023-07-04')
+
+    :param path: Optional (default value is `~/.cache/IntellectFinanceAPI/rates`). Directory of the series files.
+    :param grace_days: Number of recent days (UTC) that may still change: they are never written to disk.
+    :param recent_ttl: Number of seconds the recent days are kept in memory before they are fetched again.
+    :param max_workers: Number of threads fetching a long range (see `fetch_date_range`).
+    """
+
+    def __init__(self, path=None, grace_days=1, recent_ttl=3600, max_workers=4):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'IntellectFinanceAPI', 'rates')
+        self.path = os.path.expanduser(path)
+        self.grace_days = grace_days
+        self.recent_ttl = recent_ttl
+        self.max_workers = max_workers
+        self.stats = {'n_reads': 0, 'n_fetches': 0}
+        self._series = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _get_series(self, api_name, duration):
+        if api_name not in RATES_APIS:
+            raise ParameterInvalidError(f'`{api_name}` is not a rates API. Use one of {list(RATES_APIS)}.')
+        if api_name != 'fed_fund_target_rate' and not duration:
+            raise ParameterMissingError(f'`{api_name}` needs a `duration`, such as `duration_10yr`.')
+        name = api_name if api_name == 'fed_fund_target_rate' else f'{api_name}.{duration}'
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series(os.path.join(self.path, name))
+        return series
+
+    def _fetch(self, api_name, duration, start, end):
+        kargs = {'duration': duration} if api_name != 'fed_fund_target_rate' else {}
+        start_date, end_date = datetime.date.fromordinal(start).isoformat(), datetime.date.fromordinal(end).isoformat()
+        logger.debug(f'Fetching `{api_name}` {duration or ""} from {start_date} to {end_date}.')
+        self.stats['n_fetches'] += 1
+        result = fetch_date_range(api_name, start_date, end_date, max_workers=self.max_workers, **kargs)
+        return _to_columns(result['result'], duration, start, end)
+
+    def _ensure(self, series, api_name, duration, start, end):
+        """
+        Fetch the days of `[start, end]` (ordinals) the series does not hold yet.
+        """
+        final_until = (datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=self.grace_days)).toordinal()
+        if series.covered is None:
+            first = min(start, final_until + 1)
+            series.covered = [first, first - 1]
+        covered_start, covered_end = series.covered
+
+        if start < covered_start:
+            dates, values = self._fetch(api_name, duration, start, covered_start - 1)
+            series.prepend(dates, values, [start, covered_end])
+
+        tail_fresh = series.tail_until is not None and series.tail_until >= end and time.time() - series.tail_fetched_at < self.recent_ttl
+        if min(end, final_until) > covered_end or (end > final_until and not tail_fresh):
+            fetch_until = end if end <= final_until else datetime.datetime.now(datetime.timezone.utc).date().toordinal()
+            dates, values = self._fetch(api_name, duration, covered_end + 1, fetch_until)
+            is_final = dates <= _day(final_until)
+            series.append(dates[is_final], values[is_final], [series.covered[0], max(covered_end, min(fetch_until, final_until))])
+            if fetch_until > final_until:
+                series.tail_dates, series.tail_values = dates[~is_final], values[~is_final]
+                series.tail_until, series.tail_fetched_at = fetch_until, time.time()
+
+    def read(self, api_name, start_date, end_date, duration=None):
+        """
+        :return: The (dates, values) of a series from `start_date` to `end_date` (both included), as a `datetime64[D]`
+            and a `float64` array. Within the stored days, they are read-only views into the memory maps, not copies.
+        """
+        series = self._get_series(api_name, duration)
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        start, end = to_date(start_date).toordinal(), min(to_date(end_date), today).toordinal()
+        self.stats['n_reads'] += 1
+        if start > end:
+            return _EMPTY_DATES, _EMPTY_VALUES
+        with series.lock:
+            self._ensure(series, api_name, duration, start, end)
+            return series.slice(start, end)
+
+    def rate_on(self, api_name, date, duration=None, lookback_days=10):
+        """
+        :return: The rate on `date`, or on the last day before it with a rate (e.g. the Friday for a Sunday), up to
+            `lookback_days` earlier. `None` if there is none.
+        """
+        start_date = to_date(date) - datetime.timedelta(days=lookback_days)
+        dates, values = self.read(api_name, start_date, date, duration=duration)
+        return float(values[-1]) if len(values) else None
+
+    def treasury_yield(self, duration, start_date, end_date):
+        return self.read('treasury_yield', start_date, end_date, duration=duration)
+
+    def treasury_real_yield(self, duration, start_date, end_date):
+        return self.read('treasury_real_yield', start_date, end_date, duration=duration)
+
+    def fed_fund_target_rate(self, start_date, end_date):
+        return self.read('fed_fund_target_rate', start_date, end_date)
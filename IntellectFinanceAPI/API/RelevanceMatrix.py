@@ -0,0 +1,199 @@
+"""
+An N x N relevance matrix between tickers (it requires you to pip install `numpy` first).
+
+Instead of one `relevance_score_between_two_tickers` call per pair, the matrix is first filled from
+`relevant_tickers_by_ticker` (one call per ticker), and only the pairs still missing are then fetched, concurrently.
+The relevance is symmetric, so each pair is fetched once.
+"""
+import logging
+import time
+
+import numpy as np
+
+from IntellectFinanceAPI.API.Batch import batch_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Keys that may hold the ticker and the score in the items of `relevant_tickers_by_ticker`.
+_TICKER_FIELDS = ('ticker', 'relevant_ticker', 'symbol')
+_SCORE_FIELDS = ('relevance_score', 'score', 'relevance')
+
+
+def _first_field(item, fields):
+    for field in fields:
+        if item.get(field) is not None:
+            return item[field]
+    return None
+
+
+def _to_score(result):
+    if isinstance(result, dict):
+        result = _first_field(result, _SCORE_FIELDS)
+    try:
+        return float(result)
+    except (TypeError, ValueError):
+        return None
+
+
+class RelevanceMatrix:
+    """
+    The relevance scores between `tickers`: `scores[i, j]` is the score between `tickers[i]` and `tickers[j]`, `NaN`
+    while it is unknown. `updated_at[i, j]` is the time (epoch seconds) the score was fetched.
+
+    :example:
+        matrix = RelevanceMatrix(['AAPL', 'MSFT', 'GOOGL', 'AMZN'])
+        matrix.build()
+        matrix.score('AAPL', 'MSFT'), matrix.to_dense()
+    """
+
+    def __init__(self, tickers):
+        self.tickers = []
+        self.index = {}
+        self.scores = np.empty((0, 0), dtype=np.float32)
+        self.updated_at = np.empty((0, 0), dtype=np.float64)
+        self.stats = {'n_neighbor_calls': 0, 'n_pair_calls': 0, 'n_errors': 0}
+        self.add_tickers(tickers)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def add_tickers(self, tickers):
+        """
+        Add tickers; their pairs are unknown until the next `build`.
+        """
+        new_tickers = [t for t in dict.fromkeys(tickers) if t not in self.index]
+        if not new_tickers:
+            return
+        n_old, n = len(self.tickers), len(self.tickers) + len(new_tickers)
+        scores = np.full((n, n), np.nan, dtype=np.float32)
+        scores[:n_old, :n_old] = self.scores
+        updated_at = np.zeros((n, n), dtype=np.float64)
+        updated_at[:n_old, :n_old] = self.updated_at
+        for i in range(n_old, n):
+            scores[i, i] = 1.0
+        self.scores, self.updated_at = scores, updated_at
+        for ticker in new_tickers:
+            self.index[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+
+    def score(self, ticker_1, ticker_2):
+        return float(self.scores[self.index[ticker_1], self.index[ticker_2]])
+
+    def _set(self, i, j, score, now):
+        self.scores[i, j] = self.scores[j, i] = score
+        self.updated_at[i, j] = self.updated_at[j, i] = now
+
+    def _stale(self, max_age):
+        """
+        :return: A boolean matrix of the pairs to fetch: unknown, or older than `max_age` seconds.
+        """
+        stale = np.isnan(self.scores)
+        if max_age is not None:
+            stale |= self.updated_at < time.time() - max_age
+        np.fill_diagonal(stale, False)
+        return stale
+
+    @staticmethod
+    def _cover(stale):
+        """
+        :return: The rows of a small set of tickers such that each pair to fetch has one of them (a greedy vertex cover).
+            E.g. after `add_tickers`, only the new tickers need a `relevant_tickers_by_ticker` call.
+        """
+        stale = stale.copy()
+        rows = []
+        counts = stale.sum(axis=1)
+        while counts.any():
+            i = int(np.argmax(counts))
+            rows.append(i)
+            stale[i, :] = stale[:, i] = False
+            counts = stale.sum(axis=1)
+        return rows
+
+    def build(self, max_workers=8, max_qps=None, max_age=None, fetch_missing_pairs=True):
+        """
+        Fill the unknown pairs (and, with `max_age`, refresh those fetched more than `max_age` seconds ago):
+
+        1. one `relevant_tickers_by_ticker` call for each ticker with a pair to fill;
+        2. one `relevance_score_between_two_tickers` call for each pair still to fill (if `fetch_missing_pairs`).
+
+        :param max_workers: Number of calls in flight at once.
+        :param max_qps: Optional. Max number of calls started per second.
+        :return: self
+        """
+        stale = self._stale(max_age)
+        tickers_to_fetch = [self.tickers[i] for i in self._cover(stale)]
+        if tickers_to_fetch:
+            self._fill_from_neighbors(tickers_to_fetch, stale, max_workers, max_qps)
+
+        if fetch_missing_pairs:
+            rows, cols = np.nonzero(np.triu(stale, k=1))
+            if len(rows):
+                self._fill_pairs(list(zip(rows.tolist(), cols.tolist())), max_workers, max_qps)
+        return self
+
+    def _fill_from_neighbors(self, tickers, stale, max_workers, max_qps):
+        results = batch_request('relevant_tickers_by_ticker', [{'ticker': t} for t in tickers], max_workers=max_workers, max_qps=max_qps)
+        self.stats['n_neighbor_calls'] += len(tickers)
+        now = time.time()
+        for ticker, r in zip(tickers, results):
+            if not r.ok:
+                logger.info(f'`relevant_tickers_by_ticker` failed for {ticker}: {r.error}')
+                self.stats['n_errors'] += 1
+                continue
+            i = self.index[ticker]
+            for item in r.result.get('result') or []:
+                if not isinstance(item, dict):
+                    continue
+                j = self.index.get(_first_field(item, _TICKER_FIELDS))
+                score = _to_score(item)
+                if j is None or j == i or score is None:
+                    continue
+                self._set(i, j, score, now)
+                stale[i, j] = stale[j, i] = False
+
+    def _fill_pairs(self, pairs, max_workers, max_qps):
+        list_kargs = [{'ticker_1': self.tickers[i], 'ticker_2': self.tickers[j]} for i, j in pairs]
+        results = batch_request('relevance_score_between_two_tickers', list_kargs, max_workers=max_workers, max_qps=max_qps)
+        self.stats['n_pair_calls'] += len(pairs)
+        now = time.time()
+        for (i, j), r in zip(pairs, results):
+            score = _to_score(r.result.get('result')) if r.ok else None
+            if score is None:
+                logger.info(f'No relevance score for {self.tickers[i]} and {self.tickers[j]}: {r.error}')
+                self.stats['n_errors'] += 1
+                continue
+            self._set(i, j, score, now)
+
+    def to_dense(self, fill_value=0.0):
+        """
+        :return: A copy of the scores as a dense `float32` array, with the unknown pairs set to `fill_value`.
+        """
+        return np.nan_to_num(self.scores, nan=fill_value)
+
+    def to_sparse(self, min_score=0.0):
+        """
+        :return: The known scores above `min_score` (diagonal excluded) as a `scipy.sparse.csr_matrix` (it requires
+            `scipy`).
+        """
+        import scipy.sparse
+        mask = ~np.isnan(self.scores) & (self.scores > min_score)
+        np.fill_diagonal(mask, False)
+        rows, cols = np.nonzero(mask)
+        return scipy.sparse.csr_matrix((self.scores[rows, cols], (rows, cols)), shape=self.scores.shape)
+
+    def save(self, path):
+        """
+        Save to a `.npz` file, to `load` and refresh it later.
+        """
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, tickers=np.array(self.tickers, dtype=str), scores=self.scores, updated_at=self.updated_at)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            matrix = cls([])
+            matrix.add_tickers(data['tickers'].tolist())
+            matrix.scores = data['scores']
+            matrix.updated_at = data['updated_at']
+        return matrix
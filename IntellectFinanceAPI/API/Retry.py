@@ -0,0 +1,182 @@
+import contextlib
+import contextvars
+import http.client
+import random
+import threading
+import time
+import zlib
+
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed, CircuitBreakerOpenError, ServiceUnavailableError
+
+# Errors raised while sending a request or reading its response, which are worth another try. `EOFError` covers
+# `asyncio.IncompleteReadError`; asyncio is not imported here, to keep it out of the import time of the synchronous API.
+RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError, EOFError, http.client.HTTPException)
+
+# `error_type` values in the API's response, which are worth another try.
+RETRYABLE_ERROR_TYPES = (APIQPSLimitExceed.__name__, ServiceUnavailableError.__name__)
+
+# `error_type` values meaning the service itself is failing. They count towards opening the circuit breaker.
+SERVICE_FAILURE_ERROR_TYPES = (ServiceUnavailableError.__name__,)
+
+# Exceptions meaning the service, or the network to it, is failing: `ValueError` and `zlib.error` cover a malformed or
+# badly compressed body. They count towards opening the circuit breaker; the errors a transport raises by itself (such
+# as `RecordingNotFoundError`) do not.
+SERVICE_FAILURE_EXCEPTIONS = (OSError, EOFError, http.client.HTTPException, ValueError, zlib.error)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an API is down.
+
+    - closed: calls go through. After `failure_threshold` failures in a row, the breaker opens.
+    - open: calls raise `CircuitBreakerOpenError` right away. After `recovery_timeout` seconds, the breaker is half-open.
+    - half-open: a single probe call goes through; it closes the breaker if it succeeds, and re-opens it otherwise.
+
+    The caller of the probe must call `release_probe` once it is done (in a `finally`): if the probe ended without
+    `record_success` or `record_failure` (e.g. it was cancelled), another call may probe.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._n_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        :return: True if this call is the probe of the half-open breaker.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitBreakerOpenError(f'`{self.name}` is failing; calls are paused for another {retry_in:.1f} seconds.')
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._n_failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._n_failures += 1
+            if self.state == self.HALF_OPEN or self._n_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class RetryPolicy:
+    """
+    How a client retries failed calls: capped exponential backoff with full jitter, plus one circuit breaker per API.
+
+    :param max_retries: Max number of retries after the first try.
+    :param base_delay: Backoff (in seconds) before the first retry. It doubles for each following retry.
+    :param max_delay: Cap (in seconds) of the backoff.
+    :param jitter: If True, sleep a random time between 0 and the backoff, so that clients do not retry in lockstep.
+    :param retryable_exceptions: Exception classes that are retried.
+    :param retryable_error_types: `error_type` names (from the API's response) that are retried.
+    :param failure_threshold: Number of failures in a row that opens the circuit breaker of an API. `None` disables it.
+    :param recovery_timeout: Seconds the circuit breaker stays open before it lets a probe call through.
+    """
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=30, jitter=True, retryable_exceptions=RETRYABLE_EXCEPTIONS,
+                 retryable_error_types=RETRYABLE_ERROR_TYPES, failure_threshold=5, recovery_timeout=30):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable_exceptions = tuple(retryable_exceptions)
+        self.retryable_error_types = tuple(retryable_error_types)
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._circuit_breakers = {}
+        self._lock = threading.Lock()
+
+    def get_delay(self, retry_times):
+        delay = min(self.max_delay, self.base_delay * (2 ** retry_times))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def is_retryable_exception(self, e):
+        return isinstance(e, self.retryable_exceptions)
+
+    def is_retryable_result(self, result_dict):
+        return result_dict.get('error_type') in self.retryable_error_types
+
+    def get_circuit_breaker(self, api_name):
+        if self.failure_threshold is None:
+            return None
+        circuit_breaker = self._circuit_breakers.get(api_name)
+        if circuit_breaker is None:
+            with self._lock:
+                circuit_breaker = self._circuit_breakers.setdefault(
+                    api_name, CircuitBreaker(api_name, failure_threshold=self.failure_threshold, recovery_timeout=self.recovery_timeout))
+        return circuit_breaker
+
+
+_CURRENT_RETRY_POLICY = contextvars.ContextVar('IntellectFinanceAPI_retry_policy', default=None)
+
+DICT_RETRY_POLICY = {
+    'policy': RetryPolicy()
+}
+
+
+def set_retry_policy(retry_policy=None, **kargs):
+    """
+    Set how `send_http_request` retries failed calls.
+
+    :example: set_retry_policy(max_retries=5, base_delay=1, max_delay=60)
+
+    :param retry_policy: A `RetryPolicy`. If missing, a new one is built from the keyword arguments.
+    """
+    DICT_RETRY_POLICY['policy'] = retry_policy if retry_policy is not None else RetryPolicy(**kargs)
+
+
+@contextlib.contextmanager
+def use_retry_policy(retry_policy=None, **kargs):
+    """
+    Within this block (in the current thread or task), retry the calls with `retry_policy` instead of the one of
+    `set_retry_policy`.
+
+    :example:
+        with use_retry_policy(max_retries=0):
+            news_by_ticker(ticker='AAPL')
+
+    :param retry_policy: A `RetryPolicy`. If missing, a new one is built from the keyword arguments.
+    """
+    retry_policy = retry_policy if retry_policy is not None else RetryPolicy(**kargs)
+    token = _CURRENT_RETRY_POLICY.set(retry_policy)
+    try:
+        yield retry_policy
+    finally:
+        _CURRENT_RETRY_POLICY.reset(token)
+
+
+def get_retry_policy():
+    """
+    :return: The policy of the enclosing `use_retry_policy` block, else the one of `set_retry_policy`.
+    """
+    retry_policy = _CURRENT_RETRY_POLICY.get()
+    if retry_policy is not None:
+        return retry_policy
+    return DICT_RETRY_POLICY['policy']
@@ -0,0 +1,257 @@
+"""
+A local stock screener (it requires you to pip install `numpy` first).
+
+The full snapshot of each `(index_name, screening_metric)` is fetched once from `stocker_screener` and kept as typed
+arrays. The value, percentile and SIC code filters, and their AND/OR combinations across metrics, then run locally with
+vectorized operations. The snapshots are refreshed when they are older than `refresh_interval`, or on a schedule in the
+background.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+
+from IntellectFinanceAPI.API.Batch import batch_request
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import send_http_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Keys that may hold each field in the items of `stocker_screener`.
+_TICKER_FIELDS = ('ticker', 'symbol')
+_VALUE_FIELDS = ('value', 'metric_value')
+_PERCENTILE_FIELDS = ('percentile', 'metric_percentile')
+_SIC_FIELDS = ('sic_code', 'sic')
+
+
+def _first_field(item, fields, default=None):
+    for field in fields:
+        if item.get(field) is not None:
+            return item[field]
+    return default
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _percentiles(values):
+    """
+    The percentile (from 0 to 1) of each value: the fraction of the (non-NaN) values strictly below it.
+    """
+    percentiles = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    sorted_values = np.sort(values[valid])
+    if len(sorted_values):
+        percentiles[valid] = np.searchsorted(sorted_values, values[valid], side='left') / len(sorted_values)
+    return percentiles
+
+
+class MetricSnapshot:
+    """
+    All the stocks of an index with their value of one metric: `tickers`, `values` and `percentiles` arrays (plus
+    `sic_codes` if the API returns them).
+    """
+
+    def __init__(self, index_name, screening_metric, items, sic_code_prefix=None):
+        self.index_name = index_name
+        self.screening_metric = screening_metric
+        self.sic_code_prefix = sic_code_prefix
+        self.items = items
+        self.tickers = np.array([str(_first_field(item, _TICKER_FIELDS, '')) for item in items], dtype=object)
+        self.values = np.array([_to_float(_first_field(item, _VALUE_FIELDS + (screening_metric,))) for item in items], dtype=np.float64)
+        self.percentiles = np.array([_to_float(_first_field(item, _PERCENTILE_FIELDS)) for item in items], dtype=np.float64)
+        sic_codes = [_first_field(item, _SIC_FIELDS) for item in items]
+        self.sic_codes = np.array([str(s) for s in sic_codes], dtype=str) if items and all(s is not None for s in sic_codes) else None
+        self.fetched_at = time.time()
+
+    def __len__(self):
+        return len(self.items)
+
+    def mask(self, min_value=None, max_value=None, min_percentile=None, max_percentile=None, sic_code_prefix=None):
+        """
+        :return: A boolean array: True for the stocks passing the filters, with the same semantics as
+            `stocker_screener` (the min is inclusive, the max is not; with `sic_code_prefix`, the percentiles are
+            computed among the matching stocks).
+        """
+        values, percentiles = self.values, self.percentiles
+        mask = ~np.isnan(values)
+        if sic_code_prefix is not None and str(sic_code_prefix) != str(self.sic_code_prefix):
+            if self.sic_codes is None:
+                raise ParameterInvalidError(f'The snapshot of `{self.screening_metric}` has no SIC codes to filter on.')
+            mask &= np.char.startswith(self.sic_codes, str(sic_code_prefix))
+            if min_percentile is not None or max_percentile is not None:
+                percentiles = np.full(len(values), np.nan)
+                percentiles[mask] = _percentiles(values[mask])
+        if min_value is not None:
+            mask &= values >= float(min_value)
+        if max_value is not None:
+            mask &= values < float(max_value)
+        if min_percentile is not None:
+            mask &= percentiles >= float(min_percentile)
+        if max_percentile is not None:
+            mask &= percentiles < float(max_percentile)
+        return mask
+
+
+class Condition:
+    """
+    The filters on one metric, for `Screener.screen_many`.
+
+    :example: Condition('PE-Diluted', max_value=15), Condition('Dividend-Yield', min_percentile=0.8)
+    """
+    __slots__ = ('screening_metric', 'min_value', 'max_value', 'min_percentile', 'max_percentile')
+
+    def __init__(self, screening_metric, min_value=None, max_value=None, min_percentile=None, max_percentile=None):
+        self.screening_metric = screening_metric
+        self.min_value = min_value
+        self.max_value = max_value
+        self.min_percentile = min_percentile
+        self.max_percentile = max_percentile
+
+    def filters(self):
+        return {'min_value': self.min_value, 'max_value': self.max_value, 'min_percentile': self.min_percentile,
+                'max_percentile': self.max_percentile}
+
+    def __repr__(self):
+        filters = ', '.join(f'{k}={v!r}' for k, v in self.filters().items() if v is not None)
+        return f'Condition({self.screening_metric!r}, {filters})'
+
+
+class Screener:
+    """
+    Screen the stocks of one index locally.
+
+    :example:
+        screener = Screener('SP500', refresh_interval=3600)
+        screener.screen('PS', sic_code_prefix=35, min_value=1.2, max_value=3.1)
+        screener.screen_many([Condition('PE-Diluted', max_value=15), Condition('Dividend-Yield', min_percentile=0.8)], how='and')
+
+    :param index_name: `SP500`, `SP_MIDCAP_400` or `Russell_2000`.
+    :param refresh_interval: Max age (in seconds) of a snapshot. An older snapshot is fetched again when it is used (or
+        in the background, see `start_refresh`).
+    :param max_workers: Number of snapshots fetched at once by `refresh` and `screen_many`.
+    """
+
+    def __init__(self, index_name, refresh_interval=3600, max_workers=4):
+        self.index_name = index_name
+        self.refresh_interval = refresh_interval
+        self.max_workers = max_workers
+        self._snapshots = {}  # (screening_metric, sic_code_prefix) -> MetricSnapshot
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._stop_refresh = threading.Event()
+
+    def _fetch(self, screening_metric, sic_code_prefix=None):
+        result = send_http_request('stocker_screener', index_name=self.index_name, screening_metric=screening_metric, sic_code_prefix=sic_code_prefix)
+        return MetricSnapshot(self.index_name, screening_metric, result.get('result') or [], sic_code_prefix=sic_code_prefix)
+
+    def _is_fresh(self, snapshot):
+        return snapshot is not None and time.time() - snapshot.fetched_at < self.refresh_interval
+
+    def snapshot(self, screening_metric, sic_code_prefix=None):
+        """
+        :return: The `MetricSnapshot` of a metric, fetched if it is missing or too old. If the API does not return the
+            SIC codes, the snapshot of `sic_code_prefix` is fetched (once) instead of being filtered locally.
+        """
+        snapshot = self._snapshots.get((screening_metric, None))
+        if not self._is_fresh(snapshot):
+            snapshot = self._snapshots[(screening_metric, None)] = self._fetch(screening_metric)
+        if sic_code_prefix is None or snapshot.sic_codes is not None:
+            return snapshot
+        key = (screening_metric, str(sic_code_prefix))
+        if not self._is_fresh(self._snapshots.get(key)):
+            self._snapshots[key] = self._fetch(screening_metric, sic_code_prefix=sic_code_prefix)
+        return self._snapshots[key]
+
+    def screen(self, screening_metric, sic_code_prefix=None, min_value=None, max_value=None, min_percentile=None, max_percentile=None):
+        """
+        Same as `stocker_screener`, but computed locally on the snapshot of the metric.
+
+        :return: {'result': `List of stocks with the value and percentile of the screening criteria.`}
+        """
+        snapshot = self.snapshot(screening_metric, sic_code_prefix)
+        mask = snapshot.mask(min_value, max_value, min_percentile, max_percentile, sic_code_prefix=sic_code_prefix)
+        return {'result': [snapshot.items[i] for i in np.flatnonzero(mask)]}
+
+    def screen_many(self, conditions, how='and', sic_code_prefix=None):
+        """
+        Combine conditions on several metrics.
+
+        :param conditions: A list of `Condition`.
+        :param how: `and` (the stocks passing all the conditions) or `or` (the stocks passing any of them).
+        :param sic_code_prefix: Optional. Only screen the stocks of this SIC code prefix.
+        :return: A dictionary from ticker to the dictionary of its value of each metric, sorted by ticker.
+        """
+        if how not in ('and', 'or'):
+            raise ParameterInvalidError(f'`how` must be `and` or `or`, you provided `{how}`.')
+        self._prefetch({c.screening_metric for c in conditions})
+        passed = None
+        snapshots = {}
+        for condition in conditions:
+            snapshot = snapshots[condition.screening_metric] = self.snapshot(condition.screening_metric, sic_code_prefix)
+            tickers = set(snapshot.tickers[snapshot.mask(sic_code_prefix=sic_code_prefix, **condition.filters())])
+            if passed is None:
+                passed = tickers
+            else:
+                passed = passed & tickers if how == 'and' else passed | tickers
+
+        result = {}
+        for ticker in sorted(passed or ()):
+            result[ticker] = {}
+        for metric, snapshot in snapshots.items():
+            for ticker, value in zip(snapshot.tickers, snapshot.values):
+                if ticker in result:
+                    result[ticker][metric] = None if np.isnan(value) else float(value)
+        return result
+
+    def _prefetch(self, metrics):
+        stale = [m for m in metrics if not self._is_fresh(self._snapshots.get((m, None)))]
+        if len(stale) > 1:
+            self.refresh(stale)
+
+    def refresh(self, metrics=None):
+        """
+        Fetch the snapshots of `metrics` (default: all the snapshots held) again, concurrently. A failed fetch keeps the
+        previous snapshot.
+        """
+        keys = [(m, None) for m in metrics] if metrics is not None else list(self._snapshots)
+        results = batch_request(lambda key: self._fetch(*key), [{'key': key} for key in keys], max_workers=self.max_workers)
+        for key, r in zip(keys, results):
+            if r.ok:
+                self._snapshots[key] = r.result
+            else:
+                logger.warning(f'Cannot refresh the snapshot of {key}: {r.error}')
+
+    def start_refresh(self, interval=None):
+        """
+        Refresh all the snapshots in a background thread every `interval` seconds (default: half of
+        `refresh_interval`), so the screens never wait for the API.
+        """
+        interval = interval or self.refresh_interval / 2
+        with self._lock:
+            if self._refresh_thread is not None:
+                return
+            self._stop_refresh.clear()
+
+            def run():
+                while not self._stop_refresh.wait(interval):
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        logger.warning(f'Background refresh of the screener failed: {e}')
+
+            self._refresh_thread = threading.Thread(target=run, name=f'Screener-{self.index_name}', daemon=True)
+            self._refresh_thread.start()
+
+    def stop_refresh(self):
+        with self._lock:
+            thread, self._refresh_thread = self._refresh_thread, None
+        if thread is not None:
+            self._stop_refresh.set()
+            thread.join()
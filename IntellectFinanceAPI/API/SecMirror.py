@@ -0,0 +1,297 @@
+"""
+A local mirror of the SEC filings, in a SQLite file.
+
+The filings are synced one day at a time from `list_sec_daily_filings` (all the pages of a day, then one transaction),
+so an interrupted sync resumes at the first day it has not stored. The queries by CIK, form type and day (such as
+`filings_8k_6k`) are then answered from the indexed table, and only the days not synced yet are fetched. The filings are
+the items of `list_sec_daily_filings`, and their days are the days SEC indexed them (the days which are synced).
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from IntellectFinanceAPI.API.Batch import iter_batch_request
+from IntellectFinanceAPI.API.DateRange import to_date
+from IntellectFinanceAPI.API.ErrorTypes import ExceptionNoTickerFound, ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import send_http_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Keys that may hold each field in the items of `list_sec_daily_filings`.
+_CIK_FIELDS = ('cik', 'CIK')
+_FORM_FIELDS = ('form_type', 'form', 'type')
+_DATE_FIELDS = ('date_filed', 'filing_date', 'filed_date', 'date')
+_KEY_FIELDS = ('accession_number', 'accession_no', 'accession', 'url', 'file_name', 'filename')
+
+SEC_APIS = ('sec_8k_6k', 'sec_10k_10q_20f_40f', 'sec_345', 'sec_other')
+
+
+def _first_field(item, fields, default=None):
+    for field in fields:
+        if item.get(field) is not None:
+            return item[field]
+    return default
+
+
+def _to_cik(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def form_category(form_type):
+    """
+    :return: The API listing the filings of this form type (one of `SEC_APIS`), or `None` for the SC 13 schedules, which
+        have their own APIs.
+
+    :example: form_category('10-K/A')  # 'sec_10k_10q_20f_40f'
+    """
+    form = str(form_type or '').strip().upper()
+    if form.endswith('/A'):
+        form = form[:-2]
+    if form.startswith(('SC 13', 'SCHEDULE 13')):
+        return None
+    if form.startswith(('8-K', '6-K')):
+        return 'sec_8k_6k'
+    if form.startswith(('10-K', '10-Q', '20-F', '40-F')):
+        return 'sec_10k_10q_20f_40f'
+    if form in ('3', '4', '5'):
+        return 'sec_345'
+    return 'sec_other'
+
+
+class SecMirror:
+    """
+    The SEC filings of the days synced so far, indexed by CIK, form type and index date.
+
+    :example:
+        mirror = SecMirror()
+        mirror.sync('2022-01-01', '2022-03-31', max_workers=8)  # backfill; resumes where it stopped
+        mirror.filings_8k_6k(cik_or_ticker='1652044', start_date='2022-02-01', end_date='2022-02-05')  # local
+
+    :param path: Optional (default value is `~/.cache/IntellectFinanceAPI/sec_filings.sqlite3`). Path of the SQLite file.
+    :param max_workers: Number of days fetched at once.
+    :param max_qps: Optional. Max number of calls started per second.
+    :param grace_days: The SEC may still add filings to the last `grace_days` days: those are synced again when their
+        copy is older than `recent_ttl` seconds. The older days are never fetched again.
+    :param recent_ttl: See `grace_days`.
+    """
+    _SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS filings (
+        key TEXT PRIMARY KEY,
+        cik INTEGER,
+        form_type TEXT,
+        category TEXT,
+        filing_date TEXT NOT NULL,
+        index_date TEXT NOT NULL,
+        item TEXT NOT NULL
+    );
+    DROP INDEX IF EXISTS filings_cik;
+    DROP INDEX IF EXISTS filings_form_type;
+    DROP INDEX IF EXISTS filings_category;
+    CREATE INDEX IF NOT EXISTS filings_cik_by_index_date ON filings (cik, category, index_date);
+    CREATE INDEX IF NOT EXISTS filings_form_type_by_index_date ON filings (form_type, index_date);
+    CREATE INDEX IF NOT EXISTS filings_category_by_index_date ON filings (category, index_date);
+    CREATE INDEX IF NOT EXISTS filings_index_date ON filings (index_date);
+    CREATE TABLE IF NOT EXISTS synced_days (
+        date TEXT PRIMARY KEY,
+        n_filings INTEGER NOT NULL,
+        synced_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS tickers (ticker TEXT PRIMARY KEY, cik INTEGER NOT NULL);
+    '''
+
+    def __init__(self, path=None, max_workers=8, max_qps=None, grace_days=2, recent_ttl=3600):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'IntellectFinanceAPI', 'sec_filings.sqlite3')
+        self.path = path
+        self.max_workers = max_workers
+        self.max_qps = max_qps
+        self.grace_days = grace_days
+        self.recent_ttl = recent_ttl
+        self.stats = {'n_days_synced': 0, 'n_calls': 0, 'n_local_queries': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(self._SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # Sync.
+
+    def _fetch_day(self, date):
+        """
+        :return: All the filings indexed on `date`, following the `_NEXT_TOKEN_` of each page.
+        """
+        items, token = [], None
+        while True:
+            result = send_http_request('list_sec_daily_filings', date=date, _NEXT_TOKEN_=token)
+            with self._lock:
+                self.stats['n_calls'] += 1
+            items.extend(result.get('result') or [])
+            token = result.get('_NEXT_TOKEN_')
+            if not token:
+                return items
+
+    def _store_day(self, date, items):
+        rows = {}
+        for item in items:
+            form_type = _first_field(item, _FORM_FIELDS)
+            key = _first_field(item, _KEY_FIELDS)
+            serialized = json.dumps(item, separators=(',', ':'), sort_keys=True)
+            if key is None:
+                key = hashlib.sha256(serialized.encode()).hexdigest()
+            filing_date = str(_first_field(item, _DATE_FIELDS, date))[:10]
+            rows[str(key)] = (str(key), _to_cik(_first_field(item, _CIK_FIELDS, '')), form_type, form_category(form_type),
+                              filing_date, date, serialized)
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM filings WHERE index_date = ?', (date,))
+            conn.executemany('INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?)', rows.values())
+            conn.execute('INSERT OR REPLACE INTO synced_days VALUES (?, ?, ?)', (date, len(rows), time.time()))
+        self.stats['n_days_synced'] += 1
+
+    def missing_days(self, start_date, end_date):
+        """
+        :return: The days of `[start_date, end_date]` to (re-)sync: the days never synced, and the recent days synced more
+            than `recent_ttl` seconds ago. The days after today are left out.
+        """
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        start, end = to_date(start_date), min(to_date(end_date), today)
+        if start > end:
+            return []
+        cutoff = (today - datetime.timedelta(days=self.grace_days)).isoformat()
+        rows = self._connect().execute('SELECT date, synced_at FROM synced_days WHERE date BETWEEN ? AND ?',
+                                       (start.isoformat(), end.isoformat())).fetchall()
+        synced = {date for date, synced_at in rows if date < cutoff or time.time() - synced_at < self.recent_ttl}
+        days = (start + datetime.timedelta(days=i) for i in range((end - start).days + 1))
+        return [day.isoformat() for day in days if day.isoformat() not in synced]
+
+    def sync(self, start_date, end_date=None, max_workers=None):
+        """
+        Fetch and store the days of `[start_date, end_date]` (default: up to today) not synced yet, `max_workers` days at
+        once. Each day is stored as soon as all its pages are fetched, so an interrupted backfill resumes where it
+        stopped.
+
+        :return: The number of days synced. If some days fail, the others are still stored, then the first error is
+            raised.
+        """
+        days = self.missing_days(start_date, end_date or datetime.datetime.now(datetime.timezone.utc).date().isoformat())
+        error = None
+        for r in iter_batch_request(self._fetch_day, [{'date': day} for day in days],
+                                    max_workers=max_workers or self.max_workers, max_qps=self.max_qps):
+            if r.ok:
+                self._store_day(r.kargs['date'], r.result)
+            else:
+                logger.warning(f'Cannot sync the SEC filings of {r.kargs["date"]}: {r.error}')
+                error = error or r.error
+        if error is not None:
+            raise error
+        if days:
+            logger.debug(f'Synced the SEC filings of {len(days)} days.')
+        return len(days)
+
+    # Queries.
+
+    def resolve_cik(self, cik_or_ticker):
+        """
+        :return: The CIK (an int) of a CIK or a ticker. The CIK of a ticker is looked up once with
+            `company_info_by_ticker`, then kept in the mirror.
+        """
+        cik = _to_cik(cik_or_ticker)
+        if cik is not None:
+            return cik
+        ticker = str(cik_or_ticker).strip().upper()
+        conn = self._connect()
+        row = conn.execute('SELECT cik FROM tickers WHERE ticker = ?', (ticker,)).fetchone()
+        if row is not None:
+            return row[0]
+        for item in send_http_request('company_info_by_ticker', ticker=ticker).get('result') or []:
+            cik = _to_cik(_first_field(item, _CIK_FIELDS, ''))
+            if cik is not None:
+                conn.execute('INSERT OR REPLACE INTO tickers VALUES (?, ?)', (ticker, cik))
+                return cik
+        raise ExceptionNoTickerFound(f'No CIK found for the ticker `{cik_or_ticker}`.')
+
+    def query(self, start_date, end_date, cik_or_ticker=None, categories=None, form_types=None, sync=True):
+        """
+        The filings SEC indexed in a date range, after syncing the days missing from it (if `sync`). The range is on the
+        index date (as `list_sec_daily_filings`), the date which is synced: a filing indexed a few days after its filing
+        date (which SEC sometimes does) is found on its index date.
+
+        :param cik_or_ticker: Optional. Only the filings of this CIK or ticker.
+        :param categories: Optional. Only the filings of these APIs (see `form_category`).
+        :param form_types: Optional. Only the filings of these exact form types (such as `['8-K', '8-K/A']`).
+        :return: The list of filings, the oldest first, as returned by `list_sec_daily_filings`.
+        """
+        if str(start_date)[:10] > str(end_date)[:10]:
+            raise ParameterInvalidError(f'`start_date` ({start_date}) is after `end_date` ({end_date}).')
+        if sync:
+            self.sync(start_date, end_date)
+        sql, params = 'SELECT item FROM filings WHERE index_date BETWEEN ? AND ?', [str(start_date)[:10], str(end_date)[:10]]
+        if cik_or_ticker is not None:
+            sql += ' AND cik = ?'
+            params.append(self.resolve_cik(cik_or_ticker))
+        for column, values in (('category', categories), ('form_type', form_types)):
+            if values is not None:
+                values = [values] if isinstance(values, str) else list(values)
+                sql += f' AND {column} IN ({", ".join("?" * len(values))})'
+                params.extend(values)
+        self.stats['n_local_queries'] += 1
+        rows = self._connect().execute(sql + ' ORDER BY index_date, rowid', params).fetchall()
+        return [json.loads(item) for item, in rows]
+
+    def list_sec_daily_filings(self, date, cik=None):
+        """
+        Same as `list_sec_daily_filings` (all the pages at once), from the mirror.
+        """
+        self.sync(date, date)
+        sql, params = 'SELECT item FROM filings WHERE index_date = ?', [str(date)[:10]]
+        if cik is not None:
+            sql += ' AND cik = ?'
+            params.append(self.resolve_cik(cik))
+        self.stats['n_local_queries'] += 1
+        return {'result': [json.loads(item) for item, in self._connect().execute(sql + ' ORDER BY rowid', params)]}
+
+    def filings_8k_6k(self, cik_or_ticker, start_date, end_date):
+        """
+        The 8-K and 6-K filings of a company, from the mirror (see `query`). Unlike the `sec_8k_6k` API, the items are
+        the ones of `list_sec_daily_filings`, and the dates are the index dates; there is no limit on the date range.
+        """
+        return {'result': self.query(start_date, end_date, cik_or_ticker=cik_or_ticker, categories='sec_8k_6k')}
+
+    def filings_10k_10q_20f_40f(self, cik_or_ticker, start_date, end_date):
+        """
+        The 10-K, 10-Q, 20-F and 40-F filings of a company, from the mirror (see `filings_8k_6k`).
+        """
+        return {'result': self.query(start_date, end_date, cik_or_ticker=cik_or_ticker, categories='sec_10k_10q_20f_40f')}
+
+    def filings_345(self, cik_or_ticker, start_date, end_date):
+        """
+        The Form 3, 4 and 5 filings of a company, from the mirror (see `filings_8k_6k`).
+        """
+        return {'result': self.query(start_date, end_date, cik_or_ticker=cik_or_ticker, categories='sec_345')}
+
+    def filings_other(self, cik_or_ticker, start_date, end_date):
+        """
+        The other filings of a company (those of the `sec_other` API), from the mirror (see `filings_8k_6k`).
+        """
+        return {'result': self.query(start_date, end_date, cik_or_ticker=cik_or_ticker, categories='sec_other')}
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM filings').fetchone()[0]
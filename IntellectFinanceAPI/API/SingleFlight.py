@@ -0,0 +1,137 @@
+import copy
+import marshal
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'serialized', 'error', 'n_waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.serialized = None
+        self.error = None
+        self.n_waiters = 0
+
+
+def _copy_error(error):
+    try:
+        return copy.copy(error)
+    except Exception:
+        return error
+
+
+class SingleFlight:
+    """
+    Coalesce identical calls that are in flight at the same time: the first caller of a key runs the function, and the
+    callers arriving while it runs wait for its outcome instead of running it again.
+
+    The waiters get their own copy of the result (so they can change it safely), or a copy of the error.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                is_leader = True
+            else:
+                call.n_waiters += 1
+                is_leader = False
+
+        if is_leader:
+            try:
+                call.result = func()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                try:
+                    with self._lock:
+                        del self._calls[key]
+                        if call.n_waiters and call.error is None:
+                            try:
+                                call.serialized = marshal.dumps(call.result)
+                            except Exception as e:
+                                # E.g. a result which is not plain JSON data: the leader keeps it, the waiters get the error.
+                                call.error = e
+                finally:
+                    # The waiters must always be woken up, or they would block forever.
+                    call.event.set()
+
+        call.event.wait()
+        if call.error is not None:
+            raise _copy_error(call.error)
+        return marshal.loads(call.serialized)
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    The asyncio twin of `SingleFlight`, for the coroutines of one event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> [future, number of waiters]
+
+    async def do(self, key, coroutine_func):
+        import asyncio  # Not imported at module level, to keep it out of the import time of the synchronous API.
+        call = self._calls.get(key)
+        if call is not None:
+            future = call[0]
+            call[1] += 1
+            await asyncio.wait([future])
+            if future.cancelled():
+                # The leader was cancelled, which says nothing about this caller; run the call again.
+                return await self.do(key, coroutine_func)
+            if future.exception() is not None:
+                raise _copy_error(future.exception())
+            return marshal.loads(future.result())
+
+        future = asyncio.get_running_loop().create_future()
+        call = self._calls[key] = [future, 0]
+        try:
+            result = await coroutine_func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark it as retrieved, so asyncio does not log it when nobody waits.
+            raise
+        else:
+            # The waiters resume after the leader, which may change its result by then; they get a snapshot taken now.
+            try:
+                future.set_result(marshal.dumps(result) if call[1] else None)
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()
+            return result
+        finally:
+            del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
+
+
+DICT_SINGLE_FLIGHT = {
+    'single_flight': SingleFlight()
+}
+
+
+def set_single_flight(enabled=True):
+    """
+    Turn on (default) or off the coalescing of identical in-flight calls of `send_http_request`.
+    """
+    DICT_SINGLE_FLIGHT['single_flight'] = SingleFlight() if enabled else None
+
+
+def get_single_flight():
+    return DICT_SINGLE_FLIGHT['single_flight']
@@ -0,0 +1,229 @@
+"""
+Stream the items of large results as they are parsed from the socket.
+
+A stream is not retried (it cannot be replayed once items were yielded); the rate limit, the circuit breaker, the
+metrics of requests and errors still apply. Without a transport (see `Transport.py`), the stream reads the network
+directly; with one, the call goes through it like `send_http_request` (retries included), and the items are yielded
+from the whole result.
+"""
+import codecs
+import json
+import logging
+import urllib.parse
+
+from IntellectFinanceAPI.API.Compression import DecodingReader, get_last_transfer_stats, get_request_headers
+from IntellectFinanceAPI.API.ConnectionPool import get_connection_pool
+from IntellectFinanceAPI.API.Retry import SERVICE_FAILURE_EXCEPTIONS
+from IntellectFinanceAPI.API.Transport import get_transport
+from IntellectFinanceAPI.API.Utility import _Attempts, _call_url_with_retry, _check_api_key, _generate_url, _observe_error, \
+    _parse_response, _raise_if_error
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+_WHITESPACE = ' \t\n\r'
+_VALUE_TERMINATORS = _WHITESPACE + ',:]}'
+_DECODER = json.JSONDecoder()
+
+
+class _Buffer:
+    """
+    A text buffer over a binary stream, which reads more data only when the parser needs it.
+    """
+
+    def __init__(self, stream, chunk_size):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, min_size=0):
+        """
+        Read at least one more chunk (and at least `min_size` bytes, to keep re-parsing of large values linear).
+        """
+        if self.eof:
+            return False
+        if self.pos > len(self.text) // 2:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        data = self._stream.read(max(self.chunk_size, min_size))
+        if not data:
+            self.eof = True
+            self.text += self._decoder.decode(b'', final=True)
+            return False
+        self.text += self._decoder.decode(data)
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character ('' at the end of the stream).
+        """
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars:
+            raise json.JSONDecodeError(f'Expecting one of {chars!r}', self.text, self.pos)
+        self.pos += 1
+        return char
+
+    def decode_value(self):
+        """
+        Decode the next complete JSON value. A value that is not followed by a delimiter may be truncated (e.g. `12` of
+        `123`, or `1` of `1.5`), so more data is read before it is accepted.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                if (end < len(self.text) and self.text[end] in _VALUE_TERMINATORS) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(min_size=len(self.text) - self.pos)
+
+
+def iter_json_array(stream, key='result', extra=None, chunk_size=64 * 1024):
+    """
+    Parse a JSON object from a binary stream, and yield the items of its `key` array one at a time, without holding the
+    whole document in memory. The other top-level values are stored in `extra`.
+
+    :param stream: A binary file-like object with a `read(size)` method.
+    :param key: Key of the array to stream.
+    :param extra: Optional dictionary receiving the other top-level keys and values.
+    :param chunk_size: Number of bytes read at a time.
+    """
+    extra = extra if extra is not None else {}
+    buffer = _Buffer(stream, chunk_size)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        name = buffer.decode_value()
+        buffer.expect(':')
+        if name == key and buffer.peek() == '[':
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                buffer.expect(']')
+            else:
+                while True:
+                    yield buffer.decode_value()
+                    if buffer.expect(',]') == ']':
+                        break
+        else:
+            extra[name] = buffer.decode_value()
+        if buffer.expect(',}') == '}':
+            return
+
+
+class StreamedResponse:
+    """
+    An iterator over the `result` items of one API call, parsed as they arrive from the socket. The other top-level
+    keys of the response (such as `_NEXT_TOKEN_`) are in `extra` once the iteration is over, and the compressed and
+    uncompressed byte counts are in `transfer_stats`.
+    """
+
+    def __init__(self, api_name, kargs, chunk_size=64 * 1024):
+        self.api_name = api_name
+        self.kargs = kargs
+        self.chunk_size = chunk_size
+        self.extra = {}
+        self.transfer_stats = None
+        self._iterator = self._iter()
+
+    def _iter(self):
+        _check_api_key()
+        url = _generate_url(self.api_name, self.kargs)
+        if get_transport() is not None:
+            yield from self._iter_through_transport(url)
+            return
+
+        parsed_url = urllib.parse.urlsplit(url)
+        pool = get_connection_pool(parsed_url.hostname, parsed_url.port, scheme=parsed_url.scheme or 'https')
+
+        # A stream cannot be replayed, so it is not retried; the circuit breaker, the rate limit and the metrics apply
+        # as for the other calls.
+        attempts = _Attempts(self.api_name)
+        result_dict = None  # What the service answered, once known: the error envelope, or `{}` for a stream.
+        try:
+            attempts.start()
+            if attempts.rate_limiter is not None:
+                attempts.rate_limiter.acquire()
+            attempts.sent()
+
+            logger.debug(f'Streaming `{self.api_name}`')
+            http_response = pool.request('GET', f'{parsed_url.path}?{parsed_url.query}', headers=get_request_headers())
+            with http_response:
+                # The compressed body is decoded as it is read, so only one chunk of it is in memory at a time.
+                reader = DecodingReader(http_response, self.chunk_size)
+                self.transfer_stats = reader.stats
+                if http_response.status >= 400:
+                    result_dict = _parse_response(http_response.status, reader.read())
+                    _raise_if_error(result_dict)
+                    return
+                result_dict = {}
+                yield from iter_json_array(reader, 'result', self.extra, self.chunk_size)
+            _raise_if_error(self.extra)
+        except Exception as e:
+            if result_dict is None or isinstance(e, SERVICE_FAILURE_EXCEPTIONS):
+                # No answer, or a broken one (such as a network error in the middle of the stream).
+                result_dict = None
+                if attempts.start_time is not None:
+                    attempts.record_exception(e)
+            _observe_error(self.api_name, e)
+            raise
+        finally:
+            # Also when the iteration is stopped early, or the probe of the circuit breaker is interrupted.
+            if result_dict is not None:
+                attempts.record_result(result_dict, self.transfer_stats)
+            attempts.end()
+
+    def _iter_through_transport(self, url):
+        # A transport (such as a `ReplayTransport`) answers whole results: the call is sent like `send_http_request`
+        # (with its retries), and its items are then yielded from memory.
+        try:
+            result_dict = _call_url_with_retry(self.api_name, url)
+            _raise_if_error(result_dict)
+        except Exception as e:
+            _observe_error(self.api_name, e)
+            raise
+        self.transfer_stats = get_last_transfer_stats()
+        self.extra.update((k, v) for k, v in result_dict.items() if k != 'result')
+        yield from result_dict.get('result') or []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        """
+        Stop early. The connection is closed instead of being returned to the pool.
+        """
+        self._iterator.close()
+
+
+def stream_http_request(api_name, **kargs):
+    """
+    Same as `send_http_request`, but yield the items of the `result` list as they are parsed from the socket, so the
+    memory stays bounded however large the response is. Useful for `news_by_ticker`, `news_by_source`, or
+    `list_sec_daily_filings`. The results are not cached, and the call is not retried.
+
+    :example:
+        for news in stream_http_request('news_by_ticker', ticker='AAPL', start_date='2022-06-01', end_date='2022-06-30'):
+            print(news['h'])
+
+    :return: A `StreamedResponse`.
+    """
+    return StreamedResponse(api_name, kargs)
@@ -0,0 +1,155 @@
+import copy
+import hashlib
+import logging
+import marshal
+import os
+import re
+
+from IntellectFinanceAPI.API.Batch import BatchResult, iter_batch_request
+from IntellectFinanceAPI.API.DiskCache import IMMUTABLE, DiskCache, ttl
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.MemoryCache import ReadOnlyDict, ReadOnlyList
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# API name -> name of its text parameter.
+DICT_TEXT_APIS = {
+    'estimate_embedding_vector': 'input',
+    'short_summary': 'inputted_paragraph',
+    'sentiment_overall': 'input',
+    'zero_shot_classifier': 'inputted_paragraph',
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def content_hash(text, normalize=True):
+    """
+    :return: The SHA-256 of the text. With `normalize`, the text is stripped and its runs of whitespace are collapsed
+        first, so copies of a paragraph that only differ in their line breaks or indentation share one hash.
+    """
+    if normalize:
+        text = _WHITESPACE.sub(' ', text).strip()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def normalize_topics(list_topics):
+    """
+    Normalize the topics of `zero_shot_classifier` (a list, or a string separated by `;`) into a sorted `; `-separated
+    string, so the same set of topics always gives the same cache key.
+    """
+    if isinstance(list_topics, str):
+        list_topics = list_topics.split(';')
+    topics = sorted({t.strip() for t in list_topics if t and t.strip()})
+    if not topics:
+        raise ParameterInvalidError('`list_topics` must contain at least one topic.')
+    return '; '.join(topics)
+
+
+class TextPipeline:
+    """
+    Run a text API (`estimate_embedding_vector`, `short_summary`, `sentiment_overall` or `zero_shot_classifier`) over
+    many paragraphs: the repeated paragraphs are only sent once, the results of the paragraphs seen before are read
+    from a persistent cache keyed by their content hash (plus the topic set for `zero_shot_classifier`), and the
+    others are sent concurrently.
+
+    :example:
+        pipeline = TextPipeline()
+        results = pipeline.sentiment_overall(paragraphs)
+        results = pipeline.zero_shot_classifier(paragraphs, list_topics='Politics; Retail; Healthcare')
+
+    :param cache_path: Optional (default value is `~/.cache/IntellectFinanceAPI/text_results.sqlite3`). Path of the
+        cache file. `False` turns the persistent cache off (the inputs are still deduplicated within each call).
+    :param max_workers: Number of calls in flight at once.
+    :param max_qps: Optional. Max number of calls started per second.
+    :param normalize: If True (default), paragraphs only differing in whitespace are considered the same.
+    :param max_bytes: Optional (default value is 1 GB). Cap of the compressed size of the cache.
+    """
+
+    def __init__(self, cache_path=None, max_workers=8, max_qps=None, normalize=True, max_bytes=1 << 30):
+        if cache_path is None:
+            cache_path = os.path.join(os.path.expanduser('~'), '.cache', 'IntellectFinanceAPI', 'text_results.sqlite3')
+        self.cache = None
+        if cache_path is not False:
+            # The results of these models do not change for a given input, so they never expire.
+            self.cache = DiskCache(cache_path, max_bytes=max_bytes, ttl_rules={api_name: ttl(IMMUTABLE) for api_name in DICT_TEXT_APIS})
+        self.max_workers = max_workers
+        self.max_qps = max_qps
+        self.normalize = normalize
+        self.stats = {'n_inputs': 0, 'n_unique': 0, 'n_cache_hits': 0, 'n_calls': 0}
+
+    def run(self, api_name, texts, list_topics=None):
+        """
+        :param api_name: One of the APIs in `DICT_TEXT_APIS`.
+        :param texts: The paragraphs.
+        :param list_topics: The topics (a list, or a string separated by `;`), for `zero_shot_classifier` only.
+        :return: A list of `BatchResult`, one for each paragraph, in the input order. Errors do not stop the others;
+            they are stored in `BatchResult.error`.
+        """
+        if api_name not in DICT_TEXT_APIS:
+            raise ParameterInvalidError(f'`{api_name}` is not a text API. Use one of {list(DICT_TEXT_APIS)}.')
+        text_param = DICT_TEXT_APIS[api_name]
+        extra_kargs = {}
+        if api_name == 'zero_shot_classifier':
+            extra_kargs['list_topics'] = normalize_topics(list_topics)
+
+        texts = list(texts)
+        indices_by_hash = {}  # content hash -> indices of the paragraphs with that hash, in the input order
+        for index, text in enumerate(texts):
+            indices_by_hash.setdefault(content_hash(text, self.normalize), []).append(index)
+
+        results = [None] * len(texts)
+
+        def fill(h, result=None, error=None):
+            # The copies of a paragraph get their own copy of the result, so they can be changed independently. A
+            # read-only result (from the memory cache, see `enable_memory_cache`) cannot be changed: it is shared.
+            copied = result is not None and len(indices_by_hash[h]) > 1 and not isinstance(result, (ReadOnlyDict, ReadOnlyList))
+            serialized = None
+            if copied:
+                try:
+                    serialized = marshal.dumps(result)
+                except ValueError:
+                    pass  # Not only plain values: copied by `copy.deepcopy` instead.
+            for i, index in enumerate(indices_by_hash[h]):
+                if not copied or not i:
+                    value = result
+                elif serialized is not None:
+                    value = marshal.loads(serialized)
+                else:
+                    value = copy.deepcopy(result)
+                results[index] = BatchResult(index, {text_param: texts[index], **extra_kargs}, result=value, error=error)
+
+        to_send = []
+        for h, indices in indices_by_hash.items():
+            cached = self.cache.get(api_name, {'content_hash': h, **extra_kargs}) if self.cache is not None else None
+            if cached is not None:
+                fill(h, result=cached)
+                self.stats['n_cache_hits'] += len(indices)
+            else:
+                to_send.append(h)
+
+        list_kargs = [{text_param: texts[indices_by_hash[h][0]], **extra_kargs} for h in to_send]
+        for r in iter_batch_request(api_name, list_kargs, max_workers=self.max_workers, max_qps=self.max_qps):
+            h = to_send[r.index]
+            if r.ok and self.cache is not None:
+                self.cache.set(api_name, {'content_hash': h, **extra_kargs}, r.result)
+            fill(h, result=r.result, error=r.error)
+
+        self.stats['n_inputs'] += len(texts)
+        self.stats['n_unique'] += len(indices_by_hash)
+        self.stats['n_calls'] += len(to_send)
+        logger.debug(f'`{api_name}`: {len(texts)} paragraphs, {len(indices_by_hash)} unique, {len(to_send)} sent.')
+        return results
+
+    def estimate_embedding_vector(self, texts):
+        return self.run('estimate_embedding_vector', texts)
+
+    def short_summary(self, texts):
+        return self.run('short_summary', texts)
+
+    def sentiment_overall(self, texts):
+        return self.run('sentiment_overall', texts)
+
+    def zero_shot_classifier(self, texts, list_topics):
+        return self.run('zero_shot_classifier', texts, list_topics=list_topics)
@@ -0,0 +1,230 @@
+"""
+Hooks on the phases of each call, to see where its time goes.
+
+A call of `send_http_request` (or `async_send_http_request`) is the `request` phase. Each HTTP attempt within it goes
+through `dns`, `connect` and `tls` (only when a new connection is opened), `ttfb` (from the request sent to the response
+headers received), `download` (the body), `decompress` and `json_decode`. The asyncio client opens its connections in a
+single `connect` phase, which includes the DNS lookup and the TLS handshake.
+
+Without any hook, each phase costs one context variable lookup.
+"""
+import collections
+import contextvars
+import itertools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+PHASES = ('request', 'dns', 'connect', 'tls', 'ttfb', 'download', 'decompress', 'json_decode')
+
+_CURRENT_TRACE = contextvars.ContextVar('IntellectFinanceAPI_trace', default=None)
+_REQUEST_IDS = itertools.count(1)
+
+DICT_PHASE_HOOKS = {
+    # (hook, sample_rate) pairs. The list is replaced (never changed in place), so it can be read without a lock.
+    'hooks': [],
+}
+
+
+class PhaseEvent:
+    """
+    One phase of one call. `start` and `end` are `time.perf_counter()` values; `end`, `nbytes` and `error` are only
+    set in `on_end`.
+
+    :param request_id: Identifies the call; all the phases of a call share it.
+    :param attempt: Number of retries before this phase (0 for the first try).
+    :param info: Details of the phase, e.g. `host`, `reused` (connection) or `status`.
+    """
+    __slots__ = ('request_id', 'api_name', 'phase', 'attempt', 'start', 'end', 'nbytes', 'error', 'info')
+
+    def __init__(self, request_id, api_name, phase, attempt, info):
+        self.request_id = request_id
+        self.api_name = api_name
+        self.phase = phase
+        self.attempt = attempt
+        self.start = time.perf_counter()
+        self.end = None
+        self.nbytes = None
+        self.error = None
+        self.info = info
+
+    @property
+    def duration(self):
+        return None if self.end is None else self.end - self.start
+
+    def __repr__(self):
+        duration = f'{self.duration * 1000:.2f}ms' if self.end is not None else 'running'
+        return f'PhaseEvent({self.request_id}, {self.api_name!r}, {self.phase!r}, {duration}, nbytes={self.nbytes})'
+
+
+class PhaseHook:
+    """
+    Base class of the hooks: override `on_start` and/or `on_end`. They are called in the thread (or asyncio task) of
+    the call, so they should be quick. Their exceptions are logged, never raised into the call.
+    """
+
+    def on_start(self, event):
+        pass
+
+    def on_end(self, event):
+        pass
+
+
+class PhaseRecorder(PhaseHook):
+    """
+    A hook keeping the last `max_events` ended phases, with per-phase statistics.
+
+    :example:
+        recorder = PhaseRecorder()
+        add_phase_hook(recorder, sample_rate=0.1)
+        ...
+        recorder.summary()  # {'ttfb': {'count': 12, 'mean': 0.21, 'p50': 0.18, 'p99': 0.95, 'max': 0.97}, ...}
+    """
+
+    def __init__(self, max_events=10000):
+        self.events = collections.deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def on_end(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self):
+        """
+        :return: A dictionary from phase to the count, mean, p50, p99 and max of its durations (in seconds).
+        """
+        with self._lock:
+            events = list(self.events)
+        durations = {}
+        for event in events:
+            durations.setdefault(event.phase, []).append(event.duration)
+        summary = {}
+        for phase, values in durations.items():
+            values.sort()
+            summary[phase] = {'count': len(values), 'mean': sum(values) / len(values), 'p50': values[(len(values) - 1) // 2],
+                              'p99': values[min(len(values) - 1, int(0.99 * len(values)))], 'max': values[-1]}
+        return summary
+
+
+def add_phase_hook(hook, sample_rate=1.0):
+    """
+    Call `hook.on_start` and `hook.on_end` for the phases of a random `sample_rate` fraction of the calls (all the
+    phases of a sampled call are reported).
+    """
+    DICT_PHASE_HOOKS['hooks'] = [(h, r) for h, r in DICT_PHASE_HOOKS['hooks'] if h is not hook] + [(hook, sample_rate)]
+
+
+def remove_phase_hook(hook):
+    DICT_PHASE_HOOKS['hooks'] = [(h, r) for h, r in DICT_PHASE_HOOKS['hooks'] if h is not hook]
+
+
+def _fire(hooks, method_name, event):
+    for hook in hooks:
+        try:
+            getattr(hook, method_name)(event)
+        except Exception as e:
+            logger.warning(f'The phase hook {hook!r} failed on {event!r}: {e!r}')
+
+
+class _Phase:
+    __slots__ = ('_trace', '_name', '_nbytes', '_info', 'event')
+
+    def __init__(self, trace, name, nbytes, info):
+        self._trace = trace
+        self._name = name
+        self._nbytes = nbytes
+        self._info = info
+        self.event = None
+
+    def set(self, nbytes=None, **info):
+        if nbytes is not None:
+            self.event.nbytes = nbytes
+        self.event.info.update(info)
+
+    def __enter__(self):
+        trace = self._trace
+        self.event = PhaseEvent(trace.request_id, trace.api_name, self._name, trace.attempt, self._info)
+        self.event.nbytes = self._nbytes
+        _fire(trace.hooks, 'on_start', self.event)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.event.end = time.perf_counter()
+        self.event.error = exc_val
+        _fire(self._trace.hooks, 'on_end', self.event)
+
+
+class _NullPhase:
+    """
+    The phase of a call without hooks: does nothing.
+    """
+    __slots__ = ()
+
+    def set(self, nbytes=None, **info):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Trace:
+    """
+    The sampled hooks of one call, held in a context variable while the call runs.
+    """
+    __slots__ = ('request_id', 'api_name', 'hooks', 'attempt', '_phase', '_token')
+
+    def __init__(self, api_name, hooks):
+        self.request_id = next(_REQUEST_IDS)
+        self.api_name = api_name
+        self.hooks = hooks
+        self.attempt = 0
+        self._phase = None
+        self._token = None
+
+    def __enter__(self):
+        self._token = _CURRENT_TRACE.set(self)
+        self._phase = _Phase(self, 'request', None, {})
+        self._phase.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self._phase.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            _CURRENT_TRACE.reset(self._token)
+
+
+def new_trace(api_name):
+    """
+    :return: A `Trace` with the hooks sampled for a new call, or `None` (no hook, or none sampled).
+    """
+    hooks = DICT_PHASE_HOOKS['hooks']
+    if not hooks:
+        return None
+    sampled = [hook for hook, sample_rate in hooks if sample_rate >= 1 or random.random() < sample_rate]
+    return Trace(api_name, sampled) if sampled else None
+
+
+def get_current_trace():
+    return _CURRENT_TRACE.get()
+
+
+def phase(name, nbytes=None, **info):
+    """
+    :return: A context manager timing the phase `name` of the current call (a no-op outside a traced call). Call its
+        `set(nbytes=..., **info)` to report the payload size or details.
+    """
+    trace = _CURRENT_TRACE.get()
+    if trace is None:
+        return _NULL_PHASE
+    return _Phase(trace, name, nbytes, info)
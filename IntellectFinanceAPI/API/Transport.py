@@ -0,0 +1,265 @@
+"""
+How the HTTP requests of the calls reach the API.
+
+A transport gets the URL of each HTTP request (retries included) and returns its result dictionary, the same as
+`_call_url`. It is also given the network call of the client (keep-alive connections, see `ConnectionPool.py`), which it
+may use or not: `NetworkTransport` (the default) just uses it, `RecordingTransport` saves its request/response pairs to
+a directory, and `ReplayTransport` serves them back from that directory without the network. The retries, the rate
+limit, the caches and the metrics apply the same way with any transport.
+"""
+import contextlib
+import contextvars
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+from IntellectFinanceAPI.API.Compression import TransferStats, get_last_transfer_stats, set_last_transfer_stats
+from IntellectFinanceAPI.API.DiskCache import make_cache_key, normalize_kargs
+from IntellectFinanceAPI.API.ErrorTypes import RecordingNotFoundError
+from IntellectFinanceAPI.API.Retry import RETRYABLE_ERROR_TYPES
+
+_CURRENT_TRANSPORT = contextvars.ContextVar('IntellectFinanceAPI_transport', default=None)
+
+DICT_TRANSPORT = {
+    'transport': None
+}
+
+
+class Transport:
+    """
+    Base class of the transports. `send` serves `send_http_request` and the functions of `api_functions`;
+    `async_send` serves `AsyncClient`.
+    """
+
+    def send(self, url, network):
+        """
+        :param url: The URL of the request, with the API key.
+        :param network: The client's network call: `network(url)` returns the result dictionary.
+        :return: The result dictionary (an API error is returned as `{'error': ..., 'error_type': ...}`, not raised).
+        """
+        raise NotImplementedError
+
+    async def async_send(self, url, network):
+        """
+        The awaitable twin of `send`: `network(url)` is awaitable.
+        """
+        raise NotImplementedError
+
+
+class NetworkTransport(Transport):
+    """
+    The default transport: the requests go to the API.
+    """
+
+    def send(self, url, network):
+        return network(url)
+
+    async def async_send(self, url, network):
+        return await network(url)
+
+
+def parse_request(url):
+    """
+    :return: The API name and the parameters of a request URL, without the API key.
+    """
+    parsed_url = urllib.parse.urlsplit(url)
+    api_name = parsed_url.path.rstrip('/').rsplit('/', 1)[-1]
+    kargs = {k: v for k, v in urllib.parse.parse_qsl(parsed_url.query, keep_blank_values=True) if k != 'apikey'}
+    return api_name, kargs
+
+
+class _RecordingDirectory:
+    """
+    The request/response pairs saved in a directory: `<path>/<api_name>/<key>.json.gz`, where the key is the one of the
+    disk cache (so it does not depend on the host, the API key or the order of the parameters). Each file holds the
+    API name, the parameters, the response and the time it took.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_path(self, api_name, kargs):
+        return os.path.join(self.path, api_name, make_cache_key(api_name, kargs) + '.json.gz')
+
+    def read(self, api_name, kargs):
+        """
+        :return: The decompressed JSON of the recording, or `None`.
+        """
+        try:
+            with gzip.open(self.get_path(api_name, kargs), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, api_name, kargs, result_dict, elapsed, response_bytes):
+        path = self.get_path(api_name, kargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {'api_name': api_name, 'kargs': dict(sorted(kargs.items())), 'elapsed': elapsed,
+                  'response_bytes': response_bytes, 'recorded_at': time.time(), 'response': result_dict}
+        # Written aside, then renamed: a reader never sees a partial file, and concurrent writers do not mix.
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(record, f)
+        os.replace(temp_path, path)
+
+
+class RecordingTransport(Transport):
+    """
+    Send the requests through `transport` (the network by default), and save each request/response pair to `path`.
+    The API key is not saved. The transient errors (those that are retried, such as `APIQPSLimitExceed`) are not saved;
+    the response of the retry is.
+
+    :example:
+        set_transport(RecordingTransport('recordings/'))
+        news_by_ticker(ticker='AAPL', start_date='2023-01-01', end_date='2023-01-31')  # saved in `recordings/news_by_ticker/`
+
+    :param path: Directory of the recordings. A new response of the same request replaces the previous one.
+    :param transport: Optional (default value is `NetworkTransport()`). The transport whose responses are recorded.
+    """
+
+    def __init__(self, path, transport=None):
+        self.path = path
+        self.transport = transport or NetworkTransport()
+        self._directory = _RecordingDirectory(path)
+
+    def _record(self, url, result_dict, elapsed):
+        if result_dict.get('error_type') in RETRYABLE_ERROR_TYPES:
+            return
+        stats = get_last_transfer_stats()
+        api_name, kargs = parse_request(url)
+        self._directory.write(api_name, kargs, result_dict, elapsed, stats.compressed_bytes if stats is not None else None)
+
+    def send(self, url, network):
+        start_time = time.perf_counter()
+        result_dict = self.transport.send(url, network)
+        self._record(url, result_dict, time.perf_counter() - start_time)
+        return result_dict
+
+    async def async_send(self, url, network):
+        start_time = time.perf_counter()
+        result_dict = await self.transport.async_send(url, network)
+        self._record(url, result_dict, time.perf_counter() - start_time)
+        return result_dict
+
+
+class ReplayTransport(Transport):
+    """
+    Serve the responses saved by a `RecordingTransport`, without the network. Each replay decodes the saved JSON
+    again, so the callers get fresh results, at the cost of the JSON decoding of a real response. The recordings are
+    read from disk once, then kept in memory.
+
+    :example:
+        set_transport(ReplayTransport('recordings/', latency='recorded'))
+
+    :param path: Directory of the recordings.
+    :param latency: Optional. Simulated time of each response: `None` (default) to answer at once, a number of
+        seconds, or `'recorded'` for the time the recorded response took.
+    :param latency_jitter: Optional. Extra seconds, uniformly drawn between 0 and this, added to the latency.
+    :param fallback: Optional. A transport for the requests without a recording (e.g. a `RecordingTransport` on the same
+        path, to record them). Without it, they raise a `RecordingNotFoundError`.
+    """
+
+    def __init__(self, path, latency=None, latency_jitter=0.0, fallback=None):
+        if latency is not None and latency != 'recorded' and not isinstance(latency, (int, float)):
+            raise ValueError(f"`latency` should be None, a number of seconds or 'recorded', not {latency!r}.")
+        self.path = path
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.fallback = fallback
+        self._directory = _RecordingDirectory(path)
+        self._recordings = {}  # cache key -> decompressed JSON of the recording
+        self._lock = threading.Lock()
+
+    def _load(self, url):
+        """
+        :return: The recording of the request, or `None`.
+        """
+        api_name, kargs = parse_request(url)
+        key = (api_name, normalize_kargs(kargs))
+        data = self._recordings.get(key)
+        if data is None:
+            data = self._directory.read(api_name, kargs)
+            if data is None:
+                return None
+            with self._lock:
+                self._recordings[key] = data
+        return json.loads(data)
+
+    def _get_delay(self, record):
+        if self.latency is None:
+            delay = 0.0
+        elif self.latency == 'recorded':
+            delay = record.get('elapsed') or 0.0
+        else:
+            delay = self.latency
+        if self.latency_jitter:
+            delay += random.uniform(0, self.latency_jitter)
+        return delay
+
+    def _replay(self, url, record):
+        if record is None:
+            api_name, kargs = parse_request(url)
+            raise RecordingNotFoundError(f'No recording of `{api_name}` with {kargs} in {self.path}.')
+        stats = TransferStats('replay')
+        stats.compressed_bytes = stats.uncompressed_bytes = record.get('response_bytes') or 0
+        set_last_transfer_stats(stats)
+        return record['response']
+
+    def send(self, url, network):
+        record = self._load(url)
+        if record is None and self.fallback is not None:
+            return self.fallback.send(url, network)
+        if record is not None:
+            delay = self._get_delay(record)
+            if delay > 0:
+                time.sleep(delay)
+        return self._replay(url, record)
+
+    async def async_send(self, url, network):
+        import asyncio
+        record = self._load(url)
+        if record is None and self.fallback is not None:
+            return await self.fallback.async_send(url, network)
+        if record is not None:
+            delay = self._get_delay(record)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return self._replay(url, record)
+
+
+def set_transport(transport=None):
+    """
+    Send the requests of `send_http_request` (and of the `AsyncClient` without their own transport) through
+    `transport`. `None` restores the default `NetworkTransport`.
+
+    :example: set_transport(ReplayTransport('recordings/', latency=0.05))
+    """
+    DICT_TRANSPORT['transport'] = transport
+
+
+@contextlib.contextmanager
+def use_transport(transport):
+    """
+    Within this block (in the current thread or task), send the requests through `transport` instead of the one of
+    `set_transport`.
+    """
+    token = _CURRENT_TRANSPORT.set(transport)
+    try:
+        yield transport
+    finally:
+        _CURRENT_TRANSPORT.reset(token)
+
+
+def get_transport():
+    """
+    :return: The transport of the enclosing `use_transport` block, else the one of `set_transport`, or `None` (the
+        network).
+    """
+    transport = _CURRENT_TRANSPORT.get()
+    if transport is not None:
+        return transport
+    return DICT_TRANSPORT['transport']
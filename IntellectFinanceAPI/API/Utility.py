@@ -1,70 +1,105 @@
 import copy
 import json
-import urllib.request
+import re
+import time
 import urllib.parse
-from urllib.error import HTTPError
-import ssl
 
+from IntellectFinanceAPI.API import ErrorTypes
 from IntellectFinanceAPI.API.ErrorTypes import *
+from IntellectFinanceAPI.API.Compression import decode_body, get_request_headers, get_last_transfer_stats, set_compression
+from IntellectFinanceAPI.API.ConnectionPool import get_connection_pool, set_connection_pool_options, close_connection_pools
+from IntellectFinanceAPI.API.RateLimiter import get_rate_limiter, set_rate_limit
+from IntellectFinanceAPI.API.DiskCache import get_disk_cache, enable_disk_cache, disable_disk_cache, normalize_kargs
+from IntellectFinanceAPI.API.MemoryCache import get_memory_cache, enable_memory_cache, disable_memory_cache, invalidate_memory_cache, \
+    bypass_memory_cache
+from IntellectFinanceAPI.API.Metrics import get_metrics, enable_metrics, disable_metrics
+from IntellectFinanceAPI.API.Retry import RetryPolicy, get_retry_policy, set_retry_policy, use_retry_policy, \
+    SERVICE_FAILURE_ERROR_TYPES, SERVICE_FAILURE_EXCEPTIONS
+from IntellectFinanceAPI.API.SingleFlight import get_single_flight, set_single_flight
+from IntellectFinanceAPI.API import Tracing
+from IntellectFinanceAPI.API.Tracing import add_phase_hook, remove_phase_hook
+from IntellectFinanceAPI.API.Transport import get_transport, set_transport, use_transport
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+DEFAULT_BASE_URL = 'https://www.intellect.finance/api'
+
 DICT_GLOBAL_VALUES = {
-    'apikey': None
+    'apikey': None,
+    'base_url': DEFAULT_BASE_URL,
 }
 
+_APIKEY_IN_URL = re.compile(r'(?<=[?&]apikey=)[^&]*')
+
 
 def set_api_key(apikey):
     DICT_GLOBAL_VALUES['apikey'] = apikey
 
 
+def set_base_url(base_url=None):
+    """
+    Send the calls to another server than intellect.finance, such as a local stand-in for tests and benchmarks (see
+    `benchmark/`). `None` restores the default.
+
+    :param base_url: The URL the API names are appended to, e.g. `http://127.0.0.1:8080/api`.
+    """
+    DICT_GLOBAL_VALUES['base_url'] = (base_url or DEFAULT_BASE_URL).rstrip('/')
+
+
+def redact_url(url):
+    """
+    :return: The URL with its API key masked, for logs.
+    """
+    return _APIKEY_IN_URL.sub('***', url)
+
+
 def _call_url(url):
-    # As we are accessing the API with `https`, we have to provide an SSL context.
-    try:
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-    except Exception:
-        ssl_context = None
-        
-    max_retry = 3
-    retry_times = 0
+    # Connections are kept alive and reused across calls, so we only pay the TCP connect and TLS handshake once per
+    # pooled socket. See `ConnectionPool.py`.
+    parsed_url = urllib.parse.urlsplit(url)
+    pool = get_connection_pool(parsed_url.hostname, parsed_url.port, scheme=parsed_url.scheme or 'https')
+    path = parsed_url.path or '/'
+    if parsed_url.query:
+        path += '?' + parsed_url.query
     
-    error = None
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'Sending to API: {redact_url(url)}')
+    with pool.request('GET', path, headers=get_request_headers()) as http_response:
+        with Tracing.phase('download') as p:
+            body = http_response.read()
+            p.set(nbytes=len(body))
+        with Tracing.phase('decompress') as p:
+            result_dict_str = decode_body(body, http_response.headers)
+            p.set(nbytes=len(result_dict_str))
+        status = http_response.status
     
-    while retry_times <= max_retry:
-        retry_times += 1
-        try:
-            logging.info(f'Sending to API: {url}')
-            http_response = urllib.request.urlopen(url, context=ssl_context)
-            
-            result_dict = json.loads(http_response.read())  # `result_dict` is a dictionary
-            return result_dict
-        
-        except HTTPError as e:
-            http_response = e  # contains informative error message.
-            result_dict_str = http_response.read()
-            try:
-                result_dict = json.loads(result_dict_str)  # `result_dict` is a dictionary
-            except Exception as parsing_error:
-                logger.info(f'Error in parsing the JSON: {parsing_error}')
-                result_dict = {'error': str(result_dict_str), 'error_type': UnknownAPIError.__name__}
-            return result_dict
-        
-        except ConnectionResetError as e:
-            logger.info(f'Retry `{url}` as there is an error: {e}')
-            error = e
+    return _parse_response(status, result_dict_str)
+
+
+def _parse_response(status, result_dict_str):
+    if status < 400:
+        with Tracing.phase('json_decode', nbytes=len(result_dict_str)):
+            result_dict = json.loads(result_dict_str)  # `result_dict` is a dictionary
+        return result_dict
     
-    if error:
-        raise error
-    else:
-        raise NotImplementedError('Failed for unknown reason')
+    # The error body contains an informative error message.
+    try:
+        result_dict = json.loads(result_dict_str)  # `result_dict` is a dictionary
+    except Exception as parsing_error:
+        logger.info(f'Error in parsing the JSON: {parsing_error}')
+        result_dict = {'error': str(result_dict_str), 'error_type': UnknownAPIError.__name__}
+    
+    if status in (502, 503, 504) and result_dict.get('error_type') in (None, UnknownAPIError.__name__):
+        # A gateway error never carries a result; make sure it is raised (and retried) as such.
+        result_dict = {'error': f'HTTP {status}: {result_dict.get("error") or str(result_dict_str)[:200]}',
+                       'error_type': ServiceUnavailableError.__name__}
+    return result_dict
 
 
 def _generate_url(api_name, kargs):
     
-    url = f'https://www.intellect.finance/api/{api_name}?'
+    url = f"{DICT_GLOBAL_VALUES['base_url']}/{api_name}?"
     
     if kargs:
         kargs_filtered = copy.deepcopy(kargs)
@@ -83,30 +118,241 @@ def _generate_url(api_name, kargs):
     return url
 
 
-def send_http_request(api_name, **kargs):
+def _check_api_key():
     if not DICT_GLOBAL_VALUES['apikey']:
         raise APIKeysNotFound(
             'Please run `from IntellectFinanceAPI import set_api_key; set_api_key(_YOUR_API_KEY_)` function to set up your API Key.` '
             'You can claim or change the API Key through https://www.intellect.finance/User?TabNameUserScreen=API+Keys.'
         )
-    
-    url = _generate_url(api_name, kargs)
-    
-    result_dict = _call_url(url)
-    
+
+
+def _update_rate_limiter(rate_limiter, result_dict):
+    if rate_limiter is None:
+        return
+    if result_dict.get('error_type') == APIQPSLimitExceed.__name__:
+        rate_limiter.on_throttled()
+    else:
+        rate_limiter.on_success()
+
+
+def _raise_if_error(result_dict):
     error_msg = result_dict.get('error')
     if error_msg:
         # Raise Error
         error_type = result_dict.get('error_type')
-        if error_type in LIST_KNOWN_ERROR_NAMES and error_type in globals():
-            ErrorClass = globals()[result_dict.get('error_type')]
-        else:
-            ErrorClass = APIError
+        ErrorClass = get_error_class(error_type) or APIError
         e = ErrorClass(error_msg)
         
         # pass the HTTP return to the error
         e.__setattr__('http_response', result_dict)
         
         raise e
+
+
+def _observe_response(metrics, api_name, start_time, stats=None):
+    stats = stats or get_last_transfer_stats()
+    metrics.observe_request(api_name, time.perf_counter() - start_time, stats.compressed_bytes if stats is not None else 0)
+
+
+class _Attempts:
+    """
+    The attempts of one call to `api_name`: what the retry loops of `_call_url_with_retry` and
+    `AsyncClient.call_url_with_retry` share (the circuit breaker, the metrics, the feedback to the rate limiter, and the
+    retry decision). Only the waits and the network call differ between them.
+    
+    Each attempt runs `start`, waits for the `rate_limiter`, runs `sent`, then `retry_after_exception` or
+    `retry_after_result`, and `end` in a `finally`. Before the next attempt, wait `next_delay()` seconds. A call which is
+    not retried (a stream) uses `record_exception` and `record_result` instead.
+    """
+    
+    def __init__(self, api_name, retry_policy=None):
+        self.api_name = api_name
+        self.retry_policy = retry_policy or get_retry_policy()
+        self.circuit_breaker = self.retry_policy.get_circuit_breaker(api_name)
+        self.rate_limiter = get_rate_limiter()
+        self.metrics = get_metrics()
+        self.trace = Tracing.get_current_trace()
+        self.retry_times = 0
+        self.is_probe = False
+        self.start_time = None
+    
+    def start(self):
+        if self.trace is not None:
+            self.trace.attempt = self.retry_times
+        self.is_probe = self.circuit_breaker is not None and self.circuit_breaker.before_request()
+    
+    def sent(self):
+        self.start_time = time.perf_counter()
+    
+    def end(self):
+        # A probe which ended without a record (e.g. cancelled) must not leave the breaker half-open for good.
+        if self.is_probe:
+            self.circuit_breaker.release_probe()
+            self.is_probe = False
+    
+    def _can_retry(self):
+        return self.retry_times < self.retry_policy.max_retries
+    
+    def record_exception(self, e):
+        if self.metrics is not None:
+            self.metrics.observe_request(self.api_name, time.perf_counter() - self.start_time)
+        if self.circuit_breaker is not None and isinstance(e, SERVICE_FAILURE_EXCEPTIONS):
+            self.circuit_breaker.record_failure()
+    
+    def record_result(self, result_dict, stats=None):
+        """
+        :param stats: Optional. The `TransferStats` of the response, if it is not the last one of this thread.
+        """
+        if self.metrics is not None:
+            _observe_response(self.metrics, self.api_name, self.start_time, stats)
+        _update_rate_limiter(self.rate_limiter, result_dict)
+        if self.circuit_breaker is not None:
+            if result_dict.get('error_type') in SERVICE_FAILURE_ERROR_TYPES:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+    
+    def retry_after_exception(self, e):
+        """
+        :return: True if the call should be sent again; if not, the caller raises `e`.
+        """
+        self.record_exception(e)
+        if not self.retry_policy.is_retryable_exception(e) or not self._can_retry():
+            return False
+        logger.info(f'Retry `{self.api_name}` as there is an error: {e!r}')
+        return True
+    
+    def retry_after_result(self, result_dict):
+        """
+        :return: True if the call should be sent again; if not, the caller returns `result_dict`.
+        """
+        self.record_result(result_dict)
+        if not self.retry_policy.is_retryable_result(result_dict) or not self._can_retry():
+            return False
+        logger.info(f'Retry `{self.api_name}` as there is an error: {result_dict.get("error_type")}')
+        return True
+    
+    def next_delay(self):
+        if self.metrics is not None:
+            self.metrics.observe_retry(self.api_name)
+        delay = self.retry_policy.get_delay(self.retry_times)
+        self.retry_times += 1
+        return delay
+
+
+def _call_url_with_retry(api_name, url, retry_policy=None):
+    """
+    Call `_call_url` (through the transport, if one is set) under the rate limiter, the retry policy and the circuit
+    breaker of `api_name`.
+    """
+    attempts = _Attempts(api_name, retry_policy)
+    transport = get_transport()
+    
+    while True:
+        attempts.start()
+        try:
+            if attempts.rate_limiter is not None:
+                attempts.rate_limiter.acquire()
+            attempts.sent()
+            try:
+                result_dict = _call_url(url) if transport is None else transport.send(url, _call_url)
+            except Exception as e:
+                if not attempts.retry_after_exception(e):
+                    raise
+            else:
+                if not attempts.retry_after_result(result_dict):
+                    return result_dict
+        finally:
+            attempts.end()
+        
+        time.sleep(attempts.next_delay())
+
+
+def _get_cached_result(api_name, kargs):
+    """
+    Look up the in-memory cache, then the disk cache (if they are enabled).
+    
+    :return: The cached result, or `None`.
+    """
+    metrics = get_metrics()
+    memory_cache = get_memory_cache()
+    if memory_cache is not None:
+        result_dict = memory_cache.get(api_name, kargs)
+        if result_dict is not None:
+            if metrics is not None:
+                metrics.observe_cache(api_name, 'memory')
+            return result_dict
+    
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        result_dict = disk_cache.get(api_name, kargs)
+        if result_dict is not None:
+            if memory_cache is not None:
+                memory_cache.set(api_name, kargs, result_dict)
+            if metrics is not None:
+                metrics.observe_cache(api_name, 'disk')
+            return result_dict
+    
+    if metrics is not None and (memory_cache is not None or disk_cache is not None):
+        metrics.observe_cache(api_name, None)
+    return None
+
+
+def _set_cached_result(api_name, kargs, result_dict):
+    memory_cache = get_memory_cache()
+    if memory_cache is not None:
+        memory_cache.set(api_name, kargs, result_dict)
+    
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        disk_cache.set(api_name, kargs, result_dict)
+
+
+def _observe_error(api_name, error):
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.observe_error(api_name, error)
+
+
+def _send_uncached_request(api_name, kargs):
+    url = _generate_url(api_name, kargs)
+    
+    try:
+        result_dict = _call_url_with_retry(api_name, url)
+        
+        _raise_if_error(result_dict)
+    except Exception as e:
+        _observe_error(api_name, e)
+        raise
+    
+    _set_cached_result(api_name, kargs, result_dict)
     
     return result_dict
+
+
+def send_http_request(api_name, **kargs):
+    _check_api_key()
+    
+    # With phase hooks (see `Tracing.py`), the phases of a sampled call are reported to them.
+    trace = Tracing.new_trace(api_name)
+    if trace is None:
+        return _send_http_request(api_name, kargs)
+    with trace:
+        return _send_http_request(api_name, kargs)
+
+
+def _send_http_request(api_name, kargs):
+    result_dict = _get_cached_result(api_name, kargs)
+    if result_dict is not None:
+        return result_dict
+    
+    # Identical calls already in flight (from other threads) are joined instead of being sent again.
+    single_flight = get_single_flight()
+    if single_flight is None:
+        return _send_uncached_request(api_name, kargs)
+    return single_flight.do((api_name, normalize_kargs(kargs)), lambda: _send_uncached_request(api_name, kargs))
+
+
+def __getattr__(name):
+    # The errors of `ErrorTypes` with a slow optional base class (e.g. `TopicNotFoundError`) are created on first use.
+    return ErrorTypes.__getattr__(name)
@@ -0,0 +1,273 @@
+"""
+A local index of embedding vectors, for similarity queries without network calls (it requires you to pip install `numpy`
+first).
+
+The vectors fetched from `time_series_topic_embedding` or `estimate_embedding_vector` are normalized and stored as rows
+of a float32 matrix, which is memory-mapped from disk if the index has a `path`. A top-k cosine similarity query is one
+matrix-vector product.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import send_http_request
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Keys that may hold the vector in the items of the embedding APIs.
+_VECTOR_FIELDS = ('embedding', 'embedding_vector', 'vector')
+
+_VECTORS_FILE = 'vectors.f32'
+_IDS_FILE = 'ids.jsonl'
+_META_FILE = 'meta.json'
+
+
+def _find_vector(item):
+    for field in _VECTOR_FIELDS:
+        if isinstance(item.get(field), list):
+            return item[field]
+    for value in item.values():
+        if isinstance(value, list) and value and all(isinstance(v, (int, float)) for v in value[:8]):
+            return value
+    return None
+
+
+def _is_id(query):
+    return isinstance(query, (tuple, list)) and len(query) == 2 and isinstance(query[0], str)
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class VectorIndex:
+    """
+    Embedding vectors, each identified by a `(name, date)` pair (the date is `None` for `estimate_embedding_vector`).
+
+    :example:
+        index = VectorIndex('~/.cache/IntellectFinanceAPI/topic_index', dim=768)
+        index.add_topic_embeddings('President Biden', '2022-01-01', '2022-12-31')
+        index.search(('President Biden', '2022-06-05'), k=10, date='2022-06-05')
+
+    :param path: Optional. Directory of the index. If missing, the index is only kept in memory.
+    :param dim: Dimension of the vectors. If missing, it is taken from the first vectors added.
+    """
+
+    def __init__(self, path=None, dim=None):
+        self.path = os.path.expanduser(path) if path else None
+        self.dim = dim
+        self.ids = []
+        self._rows = {}  # id -> row
+        self._n_rows = 0
+        self._matrix = None  # In memory: a growing buffer. On disk: a memory map, re-opened when rows are appended.
+        self._dates = None
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self._load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        has_data = os.path.exists(self._file(_IDS_FILE)) and os.path.exists(self._file(_VECTORS_FILE))
+        if not os.path.exists(self._file(_META_FILE)):
+            # The meta file is written before the first vectors, so vectors without it are not an index of this class.
+            if has_data and (os.path.getsize(self._file(_IDS_FILE)) or os.path.getsize(self._file(_VECTORS_FILE))):
+                raise ParameterInvalidError(f'The index at `{self.path}` has no `{_META_FILE}`: the dimension of its vectors is unknown.')
+            return
+        with open(self._file(_META_FILE)) as f:
+            meta_dim = json.load(f)['dim']
+        if self.dim is not None and self.dim != meta_dim:
+            raise ParameterInvalidError(f'The index at `{self.path}` has vectors of dimension {meta_dim}, not {self.dim}.')
+        self.dim = meta_dim
+        if not has_data:
+            return
+        with open(self._file(_IDS_FILE)) as f:
+            lines = f.readlines()
+        ids = [tuple(json.loads(line)) for line in lines if line.endswith('\n')]
+        vectors_size = os.path.getsize(self._file(_VECTORS_FILE))
+        n_rows = min(len(ids), vectors_size // (4 * self.dim))
+        # A crash between the two appends may leave a row without id (or the opposite): keep the complete rows only, and
+        # cut the files there, so the next appends stay aligned. An intact index is only read.
+        if vectors_size != n_rows * 4 * self.dim:
+            os.truncate(self._file(_VECTORS_FILE), n_rows * 4 * self.dim)
+        if len(lines) != n_rows:
+            with open(self._file(_IDS_FILE), 'w') as f:
+                f.write(''.join(json.dumps(list(id_)) + '\n' for id_ in ids[:n_rows]))
+        self.ids = ids[:n_rows]
+        self._rows = {id_: row for row, id_ in enumerate(self.ids)}
+        self._n_rows = n_rows
+
+    def _save_meta(self):
+        if self.path and not os.path.exists(self._file(_META_FILE)):
+            with open(self._file(_META_FILE), 'w') as f:
+                json.dump({'dim': self.dim}, f)
+
+    @property
+    def matrix(self):
+        """
+        The normalized vectors, one row per id (a read-only memory map for an index on disk).
+        """
+        if self.path is None:
+            return self._matrix[:self._n_rows] if self._matrix is not None else np.empty((0, self.dim or 0), np.float32)
+        if self._matrix is None or len(self._matrix) != self._n_rows:
+            if self._n_rows == 0:
+                return np.empty((0, self.dim or 0), np.float32)
+            self._matrix = np.memmap(self._file(_VECTORS_FILE), dtype=np.float32, mode='r', shape=(self._n_rows, self.dim))
+        return self._matrix
+
+    def __len__(self):
+        return self._n_rows
+
+    def __contains__(self, id_):
+        return tuple(id_) in self._rows
+
+    def get(self, id_):
+        """
+        :return: The normalized vector of `id_`.
+        """
+        return self.matrix[self._rows[tuple(id_)]]
+
+    def add(self, ids, vectors):
+        """
+        Add (or replace) vectors.
+
+        :param ids: A list of `(name, date)` pairs.
+        :param vectors: A list (or 2D array) of vectors, in the same order as `ids`.
+        """
+        ids = [tuple(id_) for id_ in ids]
+        if not ids:
+            return
+        vectors = _normalize(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape != (len(ids), self.dim):
+            raise ParameterInvalidError(f'Expecting {len(ids)} vectors of dimension {self.dim}, got an array of shape {vectors.shape}.')
+        self._save_meta()
+
+        # The last vector wins if an id is given more than once.
+        new_rows = {}
+        for i, id_ in enumerate(ids):
+            if id_ in self._rows:
+                self._replace(self._rows[id_], vectors[i])
+            else:
+                new_rows[id_] = i
+        if new_rows:
+            self._append(list(new_rows), vectors[list(new_rows.values())])
+        self._dates = None
+
+    def _replace(self, row, vector):
+        if self.path is None:
+            self._matrix[row] = vector
+            return
+        matrix = np.memmap(self._file(_VECTORS_FILE), dtype=np.float32, mode='r+', shape=(self._n_rows, self.dim))
+        matrix[row] = vector
+        matrix.flush()
+        self._matrix = None
+
+    def _append(self, ids, vectors):
+        if self.path is None:
+            capacity = 0 if self._matrix is None else len(self._matrix)
+            if self._n_rows + len(ids) > capacity:
+                buffer = np.empty((max(2 * capacity, self._n_rows + len(ids), 64), self.dim), dtype=np.float32)
+                buffer[:self._n_rows] = self.matrix
+                self._matrix = buffer
+            self._matrix[self._n_rows:self._n_rows + len(ids)] = vectors
+        else:
+            with open(self._file(_VECTORS_FILE), 'ab') as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(self._file(_IDS_FILE), 'a') as f:
+                f.write(''.join(json.dumps(list(id_)) + '\n' for id_ in ids))
+        for id_ in ids:
+            self._rows[id_] = self._n_rows
+            self.ids.append(id_)
+            self._n_rows += 1
+
+    def add_topic_embeddings(self, topic_name, start_date, end_date):
+        """
+        Fetch the weekly embedding vectors of a topic with `time_series_topic_embedding`, and add them.
+
+        :return: The number of vectors added or replaced.
+        """
+        result = send_http_request('time_series_topic_embedding', topic_name=topic_name, start_date=start_date, end_date=end_date)
+        ids, vectors = [], []
+        for item in result.get('result') or []:
+            vector = _find_vector(item)
+            if vector is not None:
+                ids.append((topic_name, str(item.get('date'))[:10]))
+                vectors.append(vector)
+        self.add(ids, vectors)
+        return len(ids)
+
+    def add_estimated_embedding(self, input):
+        """
+        Compute the embedding vector of any text (or ticker, or topic) with `estimate_embedding_vector`, and add it as
+        `(input, None)`.
+
+        :return: The normalized vector.
+        """
+        result = send_http_request('estimate_embedding_vector', input=input).get('result') or {}
+        vector = _find_vector(result) if isinstance(result, dict) else result
+        if vector is None:
+            raise ParameterInvalidError(f'No embedding vector in the result of `estimate_embedding_vector` for `{input}`.')
+        self.add([(input, None)], [vector])
+        return self.get((input, None))
+
+    def _query_vector(self, query):
+        if _is_id(query):
+            return self.get(query)
+        return _normalize(query)
+
+    def _mask(self, date):
+        if date is None:
+            return None
+        if self._dates is None:
+            self._dates = np.array([id_[1] or '' for id_ in self.ids], dtype=object)
+        return self._dates == str(date)[:10]
+
+    def search(self, query, k=10, date=None, exclude=()):
+        """
+        The `k` vectors most similar (by cosine similarity) to `query`.
+
+        :param query: A vector, or the id of a vector in the index.
+        :param date: Optional. Only compare with the vectors of this date (e.g. the other topics of the same week).
+        :param exclude: Ids to leave out. The query itself is left out when it is an id.
+        :return: A list of (id, similarity), the most similar first.
+        """
+        return self.search_many([query], k=k, date=date, exclude=exclude)[0]
+
+    def search_many(self, queries, k=10, date=None, exclude=()):
+        """
+        Same as `search`, for many queries at once (one matrix product).
+
+        :return: A list with the result of `search` for each query.
+        """
+        matrix = self.matrix
+        if not len(matrix):
+            return [[] for _ in queries]
+        query_vectors = np.stack([self._query_vector(q) for q in queries])
+        scores = query_vectors @ matrix.T
+        mask = self._mask(date)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        exclude_rows = [self._rows[tuple(id_)] for id_ in exclude if tuple(id_) in self._rows]
+        if exclude_rows:
+            scores[:, exclude_rows] = -np.inf
+        for i, query in enumerate(queries):
+            if _is_id(query) and tuple(query) in self._rows:
+                scores[i, self._rows[tuple(query)]] = -np.inf
+
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for i in range(len(queries)):
+            rows = top[i][np.argsort(-scores[i, top[i]])]
+            results.append([(self.ids[row], float(scores[i, row])) for row in rows if scores[i, row] != -np.inf])
+        return results
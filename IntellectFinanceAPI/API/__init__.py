@@ -1,2 +1,55 @@
+import importlib
+
 from .Utility import *
-from .api_functions import *
\ No newline at end of file
+from .api_functions import *
+
+# The extensions below are imported the first time one of their names is used, so that `import IntellectFinanceAPI`
+# stays fast (asyncio alone takes longer to import than the rest of the package). The classes named like their module
+# (such as `SecMirror`) are not listed: here, those names are the submodules. They are exported by the top-level package
+# instead, see `IntellectFinanceAPI/__init__.py`.
+_LAZY_ATTRIBUTES = {
+    'AsyncClient': '.AsyncUtility',
+    'async_send_http_request': '.AsyncUtility',
+    'set_async_max_concurrency': '.AsyncUtility',
+    'async_api_functions': None,
+    'BatchResult': '.Batch',
+    'batch_request': '.Batch',
+    'iter_batch_request': '.Batch',
+    'DateRangeStore': '.DateRange',
+    'fetch_date_range': '.DateRange',
+    'StreamedResponse': '.Streaming',
+    'stream_http_request': '.Streaming',
+    'Paginator': '.Pagination',
+    'iter_pages': '.Pagination',
+    'async_iter_pages': '.Pagination',
+    'PhaseHook': '.Tracing',
+    'PhaseRecorder': '.Tracing',
+    'NetworkTransport': '.Transport',
+    'RecordingTransport': '.Transport',
+    'ReplayTransport': '.Transport',
+    'NewsItem': '.NewsRecords',
+    'to_news_items': '.NewsRecords',
+    'TopicNotFoundError': '.ErrorTypes',
+    # These need numpy, which is imported only when one of them is used.
+    'ColumnarResult': '.Columnar',
+    'to_columns': '.Columnar',
+    'columnar_http_request': '.Columnar',
+    # `Metrics` is not listed: `Utility` imports its module (whose attribute would shadow the class) and exports
+    # `enable_metrics`, `disable_metrics` and `get_metrics`.
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module_name = _LAZY_ATTRIBUTES[name]
+    if module_name is None:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
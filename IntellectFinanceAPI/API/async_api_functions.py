@@ -0,0 +1,325 @@
+"""
+Awaitable twins of every function in `api_functions`. They share keep-alive connections and run under the concurrency
+limit of the current `AsyncClient`, so many requests can be in flight from one event loop.
+"""
+from IntellectFinanceAPI.API.AsyncUtility import async_send_http_request
+
+
+async def buy_sell_or_hold_rating(ticker):
+    """
+    https://www.intellect.finance/API_Document#buy_sell_or_hold_rating
+    Awaitable version of `api_functions.buy_sell_or_hold_rating`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('buy_sell_or_hold_rating', ticker=ticker)
+
+
+async def research_report(ticker):
+    """
+    https://www.intellect.finance/API_Document#research_report
+    Awaitable version of `api_functions.research_report`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('research_report', ticker=ticker)
+
+
+async def summary_news(ticker):
+    """
+    https://www.intellect.finance/API_Document#summary_news
+    Awaitable version of `api_functions.summary_news`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('summary_news', ticker=ticker)
+
+
+async def stocker_screener(index_name, screening_metric, sic_code_prefix=None, min_value=None, max_value=None, min_percentile=None, max_percentile=None):
+    """
+    https://www.intellect.finance/API_Document#stocker_screener
+    Awaitable version of `api_functions.stocker_screener`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('stocker_screener', index_name=index_name, screening_metric=screening_metric, sic_code_prefix=sic_code_prefix, min_value=min_value, max_value=max_value, min_percentile=min_percentile, max_percentile=max_percentile)
+
+
+async def earning_call_and_other_presentations(ticker):
+    """
+    https://www.intellect.finance/API_Document#earning_call_and_other_presentations
+    Awaitable version of `api_functions.earning_call_and_other_presentations`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('earning_call_and_other_presentations', ticker=ticker)
+
+
+async def search_for_llm(query, search_engine=None, offset=None, visit_uncached_source=None, publish_dt_est_min=None, publish_dt_est_max=None, max_news_for_extraction=None):
+    """
+    https://www.intellect.finance/API_Document#search_for_llm
+    Awaitable version of `api_functions.search_for_llm`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('search_for_llm', query=query, search_engine=search_engine, offset=offset, visit_uncached_source=visit_uncached_source, publish_dt_est_min=publish_dt_est_min, publish_dt_est_max=publish_dt_est_max, max_news_for_extraction=max_news_for_extraction)
+
+
+async def news_by_source(news_source, start_time, end_time):
+    """
+    https://www.intellect.finance/API_Document#news_by_source
+    Awaitable version of `api_functions.news_by_source`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('news_by_source', news_source=news_source, start_time=start_time, end_time=end_time)
+
+
+async def news_by_ticker(ticker, start_date, end_date, stop_at_number_of_news=None, if_dedupe_news_ind=None, if_most_relevant_news_ind=None, relevant_news_min_score=None):
+    """
+    https://www.intellect.finance/API_Document#news_by_ticker
+    Awaitable version of `api_functions.news_by_ticker`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('news_by_ticker', ticker=ticker, start_date=start_date, end_date=end_date, stop_at_number_of_news=stop_at_number_of_news, if_dedupe_news_ind=if_dedupe_news_ind, if_most_relevant_news_ind=if_most_relevant_news_ind, relevant_news_min_score=relevant_news_min_score)
+
+
+async def news_by_topic(topic_name, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#news_by_topic
+    Awaitable version of `api_functions.news_by_topic`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('news_by_topic', topic_name=topic_name, start_date=start_date, end_date=end_date)
+
+
+async def list_tickers_with_news(year=None, min_number_news_per_ticker=None):
+    """
+    https://www.intellect.finance/API_Document#list_tickers_with_news
+    Awaitable version of `api_functions.list_tickers_with_news`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('list_tickers_with_news', year=year, min_number_news_per_ticker=min_number_news_per_ticker)
+
+
+async def time_series_topic_names(start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#time_series_topic_names
+    Awaitable version of `api_functions.time_series_topic_names`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('time_series_topic_names', start_date=start_date, end_date=end_date)
+
+
+async def time_series_topic_sentiment(topic_name, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#time_series_topic_sentiment
+    Awaitable version of `api_functions.time_series_topic_sentiment`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('time_series_topic_sentiment', topic_name=topic_name, start_date=start_date, end_date=end_date)
+
+
+async def time_series_topic_embedding(topic_name, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#time_series_topic_embedding
+    Awaitable version of `api_functions.time_series_topic_embedding`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('time_series_topic_embedding', topic_name=topic_name, start_date=start_date, end_date=end_date)
+
+
+async def time_series_relevant_topics_by_topic(topic_name, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#time_series_relevant_topics_by_topic
+    Awaitable version of `api_functions.time_series_relevant_topics_by_topic`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('time_series_relevant_topics_by_topic', topic_name=topic_name, start_date=start_date, end_date=end_date)
+
+
+async def time_series_relevant_tickers_by_topic(topic_name, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#time_series_relevant_tickers_by_topic
+    Awaitable version of `api_functions.time_series_relevant_tickers_by_topic`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('time_series_relevant_tickers_by_topic', topic_name=topic_name, start_date=start_date, end_date=end_date)
+
+
+async def estimate_embedding_vector(input):
+    """
+    https://www.intellect.finance/API_Document#estimate_embedding_vector
+    Awaitable version of `api_functions.estimate_embedding_vector`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('estimate_embedding_vector', input=input)
+
+
+async def short_summary(inputted_paragraph):
+    """
+    https://www.intellect.finance/API_Document#short_summary
+    Awaitable version of `api_functions.short_summary`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('short_summary', inputted_paragraph=inputted_paragraph)
+
+
+async def zero_shot_classifier(inputted_paragraph, list_topics):
+    """
+    https://www.intellect.finance/API_Document#zero_shot_classifier
+    Awaitable version of `api_functions.zero_shot_classifier`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('zero_shot_classifier', inputted_paragraph=inputted_paragraph, list_topics=list_topics)
+
+
+async def sentiment_overall(input):
+    """
+    https://www.intellect.finance/API_Document#sentiment_overall
+    Awaitable version of `api_functions.sentiment_overall`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sentiment_overall', input=input)
+
+
+async def time_series_ticker_sentiment(ticker, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#time_series_ticker_sentiment
+    Awaitable version of `api_functions.time_series_ticker_sentiment`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('time_series_ticker_sentiment', ticker=ticker, start_date=start_date, end_date=end_date)
+
+
+async def relevant_tickers_by_ticker(ticker):
+    """
+    https://www.intellect.finance/API_Document#relevant_tickers_by_ticker
+    Awaitable version of `api_functions.relevant_tickers_by_ticker`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('relevant_tickers_by_ticker', ticker=ticker)
+
+
+async def relevance_score_between_two_tickers(ticker_1, ticker_2):
+    """
+    https://www.intellect.finance/API_Document#relevance_score_between_two_tickers
+    Awaitable version of `api_functions.relevance_score_between_two_tickers`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('relevance_score_between_two_tickers', ticker_1=ticker_1, ticker_2=ticker_2)
+
+
+async def annualized_sharpe_ratio_by_ticker(ticker, start_date, end_date, risk_free_rate, smart_sharpe_flag=None):
+    """
+    https://www.intellect.finance/API_Document#annualized_sharpe_ratio_by_ticker
+    Awaitable version of `api_functions.annualized_sharpe_ratio_by_ticker`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('annualized_sharpe_ratio_by_ticker', ticker=ticker, start_date=start_date, end_date=end_date, risk_free_rate=risk_free_rate, smart_sharpe_flag=smart_sharpe_flag)
+
+
+async def max_drawdown_by_ticker(ticker, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#max_drawdown_by_ticker
+    Awaitable version of `api_functions.max_drawdown_by_ticker`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('max_drawdown_by_ticker', ticker=ticker, start_date=start_date, end_date=end_date)
+
+
+async def treasury_yield(duration, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#treasury_yield
+    Awaitable version of `api_functions.treasury_yield`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('treasury_yield', duration=duration, start_date=start_date, end_date=end_date)
+
+
+async def treasury_real_yield(duration, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#treasury_real_yield
+    Awaitable version of `api_functions.treasury_real_yield`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('treasury_real_yield', duration=duration, start_date=start_date, end_date=end_date)
+
+
+async def fed_fund_target_rate(start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#fed_fund_target_rate
+    Awaitable version of `api_functions.fed_fund_target_rate`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('fed_fund_target_rate', start_date=start_date, end_date=end_date)
+
+
+async def tickers_available():
+    """
+    https://www.intellect.finance/API_Document#tickers_available
+    Awaitable version of `api_functions.tickers_available`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('tickers_available', )
+
+
+async def company_info_by_cik(cik):
+    """
+    https://www.intellect.finance/API_Document#company_info_by_cik
+    Awaitable version of `api_functions.company_info_by_cik`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('company_info_by_cik', cik=cik)
+
+
+async def company_info_by_ticker(ticker):
+    """
+    https://www.intellect.finance/API_Document#company_info_by_ticker
+    Awaitable version of `api_functions.company_info_by_ticker`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('company_info_by_ticker', ticker=ticker)
+
+
+async def search_company(input):
+    """
+    https://www.intellect.finance/API_Document#search_company
+    Awaitable version of `api_functions.search_company`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('search_company', input=input)
+
+
+async def big_index_holdings(index_name):
+    """
+    https://www.intellect.finance/API_Document#big_index_holdings
+    Awaitable version of `api_functions.big_index_holdings`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('big_index_holdings', index_name=index_name)
+
+
+async def sec_raw_financial_data(cik_or_ticker, year_quarter, statement_type):
+    """
+    https://www.intellect.finance/API_Document#sec_raw_financial_data
+    Awaitable version of `api_functions.sec_raw_financial_data`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sec_raw_financial_data', cik_or_ticker=cik_or_ticker, year_quarter=year_quarter, statement_type=statement_type)
+
+
+async def sec_cleaned_financial_data(cik_or_ticker, stmt=None, q_or_ttm=None, end_year_q=None):
+    """
+    https://www.intellect.finance/API_Document#sec_cleaned_financial_data
+    Awaitable version of `api_functions.sec_cleaned_financial_data`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sec_cleaned_financial_data', cik_or_ticker=cik_or_ticker, stmt=stmt, q_or_ttm=q_or_ttm, end_year_q=end_year_q)
+
+
+async def fundamental_metrics(cik_or_ticker, metric_name, start_year_quarter=None, end_year_quarter=None):
+    """
+    https://www.intellect.finance/API_Document#fundamental_metrics
+    Awaitable version of `api_functions.fundamental_metrics`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('fundamental_metrics', cik_or_ticker=cik_or_ticker, metric_name=metric_name, start_year_quarter=start_year_quarter, end_year_quarter=end_year_quarter)
+
+
+async def list_sec_daily_filings(date, cik=None):
+    """
+    https://www.intellect.finance/API_Document#list_sec_daily_filings
+    Awaitable version of `api_functions.list_sec_daily_filings`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('list_sec_daily_filings', date=date, cik=cik)
+
+
+async def sec_8k_6k(cik_or_ticker, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#sec_8k_6k
+    Awaitable version of `api_functions.sec_8k_6k`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sec_8k_6k', cik_or_ticker=cik_or_ticker, start_date=start_date, end_date=end_date)
+
+
+async def sec_other(cik_or_ticker, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#sec_other
+    Awaitable version of `api_functions.sec_other`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sec_other', cik_or_ticker=cik_or_ticker, start_date=start_date, end_date=end_date)
+
+
+async def sec_10k_10q_20f_40f(cik_or_ticker, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#sec_10k_10q_20f_40f
+    Awaitable version of `api_functions.sec_10k_10q_20f_40f`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sec_10k_10q_20f_40f', cik_or_ticker=cik_or_ticker, start_date=start_date, end_date=end_date)
+
+
+async def sec_345(cik_or_ticker, start_date, end_date):
+    """
+    https://www.intellect.finance/API_Document#sec_345
+    Awaitable version of `api_functions.sec_345`. See that function for the parameters and the returned value.
+    """
+    return await async_send_http_request('sec_345', cik_or_ticker=cik_or_ticker, start_date=start_date, end_date=end_date)
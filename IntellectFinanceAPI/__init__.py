@@ -1 +1,29 @@
-from .API import *
\ No newline at end of file
+import importlib
+
+from .API import *
+from . import API as _API
+
+# The classes of the extensions whose module has the same name, imported the first time they are used (see
+# `API/__init__.py`). They are only exported here, so that `IntellectFinanceAPI.API.SecMirror` is always the module.
+_LAZY_CLASSES = {
+    'TextPipeline': '.API.TextPipeline',
+    'SecMirror': '.API.SecMirror',
+    # These need numpy.
+    'VectorIndex': '.API.VectorIndex',
+    'RelevanceMatrix': '.API.RelevanceMatrix',
+    'Screener': '.API.Screener',
+    'RatesWarehouse': '.API.RatesWarehouse',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        value = getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+        globals()[name] = value
+        return value
+    # The names that `API` imports lazily, see `API/__init__.py`.
+    return getattr(_API, name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_API.__dir__()) | set(_LAZY_CLASSES))
@@ -0,0 +1,3 @@
+"""
+Benchmarks of the client against a local stand-in of the intellect.finance API. Run `python -m benchmark --help`.
+"""
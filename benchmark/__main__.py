@@ -0,0 +1,5 @@
+import sys
+
+from benchmark.run_benchmark import main
+
+sys.exit(main())
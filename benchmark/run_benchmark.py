@@ -0,0 +1,271 @@
+"""
+Throughput and latency of the client against the stand-in server (see `stand_in_server.py`), for each combination of
+call target, cache state, concurrency and payload size. The results are written as JSON, and can be compared with
+the results of a previous release:
+
+    python -m benchmark --output results.json
+    python -m benchmark --output new.json --baseline results.json  # exits with 1 if a scenario regressed
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from IntellectFinanceAPI.API import api_functions
+from IntellectFinanceAPI.API.ConnectionPool import close_connection_pools
+from IntellectFinanceAPI.API.Retry import set_retry_policy
+from IntellectFinanceAPI.API.Utility import DICT_GLOBAL_VALUES, disable_disk_cache, disable_memory_cache, enable_disk_cache, \
+    enable_memory_cache, send_http_request, set_api_key, set_base_url
+
+from benchmark.stand_in_server import StandInConfig, StandInServer
+
+RESULTS_FORMAT_VERSION = 1
+
+TARGETS = ('send_http_request', 'news_by_ticker')
+CACHE_STATES = ('cold', 'memory', 'disk')
+DEFAULT_CONCURRENCY = (1, 8, 32)
+DEFAULT_PAYLOAD_SIZES = (1000, 100000, 1000000)
+
+# The number of distinct calls the warm caches hold; the measured calls cycle over them.
+N_WARM_KEYS = 20
+
+
+def _make_kargs(i):
+    # A date range in the past, so that the default TTL rules keep it cached.
+    return {'ticker': f'T{i}', 'start_date': '2023-01-01', 'end_date': '2023-01-31'}
+
+
+def _get_call(target):
+    if target == 'send_http_request':
+        return lambda kargs: send_http_request('news_by_ticker', **kargs)
+    if target == 'news_by_ticker':
+        return lambda kargs: api_functions.news_by_ticker(**kargs)
+    raise ValueError(f'Unknown target {target!r}, expected one of {TARGETS}.')
+
+
+def _call_ignoring_errors(call, kargs):
+    # The unmeasured calls may fail too, when the server has an error rate.
+    try:
+        call(kargs)
+    except Exception:
+        pass
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _set_cache_state(cache_state, directory):
+    disable_memory_cache()
+    disable_disk_cache()
+    if cache_state == 'memory':
+        enable_memory_cache(max_bytes=1 << 30)
+    elif cache_state == 'disk':
+        enable_disk_cache(os.path.join(directory, f'responses-{time.monotonic_ns()}.sqlite3'))
+    elif cache_state != 'cold':
+        raise ValueError(f'Unknown cache state {cache_state!r}, expected one of {CACHE_STATES}.')
+
+
+def run_scenario(target, cache_state, concurrency, n_requests, directory, first_key=0, server=None):
+    """
+    Time `n_requests` calls of `target` from `concurrency` threads.
+
+    With a `cold` cache state the caches are off and every call is distinct (so that none is coalesced with another).
+    With a `memory` or `disk` state, `N_WARM_KEYS` calls are made once before the measure, then repeated.
+
+    :param server: Optional. The `StandInServer`, to count the HTTP requests it received (retries included).
+    :return: The measures, as a dictionary.
+    """
+    call = _get_call(target)
+    _set_cache_state(cache_state, directory)
+    if cache_state == 'cold':
+        list_kargs = [_make_kargs(first_key + i) for i in range(n_requests)]
+    else:
+        warm_kargs = [_make_kargs(first_key + i) for i in range(N_WARM_KEYS)]
+        for kargs in warm_kargs:
+            _call_ignoring_errors(call, kargs)
+        list_kargs = [warm_kargs[i % N_WARM_KEYS] for i in range(n_requests)]
+
+    def timed_call(kargs):
+        start = time.perf_counter()
+        try:
+            call(kargs)
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+        return time.perf_counter() - start, None
+
+    n_server_requests = server.n_requests if server is not None else None
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed_call, list_kargs))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, error in outcomes if error is None)
+    errors = {}
+    for _, error in outcomes:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    return {
+        'n_requests': n_requests,
+        'n_errors': sum(errors.values()),
+        'errors': errors,
+        'server_requests': server.n_requests - n_server_requests if server is not None else None,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else None,
+        'latency': {
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'p50': _quantile(latencies, 0.5),
+            'p90': _quantile(latencies, 0.9),
+            'p99': _quantile(latencies, 0.99),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
+
+
+def _get_git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(targets=TARGETS, cache_states=CACHE_STATES, concurrency_levels=DEFAULT_CONCURRENCY,
+                  payload_sizes=DEFAULT_PAYLOAD_SIZES, n_requests=200, config=None, certfile=None, keyfile=None,
+                  max_retries=3):
+    """
+    Run every scenario against a new stand-in server.
+
+    :param config: A `StandInConfig` for the latency, error rate and QPS limit of the server. Its `payload_bytes` is
+        set by each scenario.
+    :param max_retries: Retries of the failed calls (with a short backoff, so that it does not dominate the measures).
+    :return: A dictionary with the `metadata` of the run and the list of the scenario `results`.
+    """
+    config = config or StandInConfig(latency=0.005)
+    saved_values = dict(DICT_GLOBAL_VALUES)
+    results = []
+    first_key = 0
+    with StandInServer(config, certfile=certfile, keyfile=keyfile) as server, tempfile.TemporaryDirectory() as directory:
+        set_base_url(server.base_url)
+        set_api_key(saved_values['apikey'] or 'benchmark')
+        set_retry_policy(max_retries=max_retries, base_delay=0.01, max_delay=0.1, failure_threshold=None)
+        try:
+            for payload_bytes in payload_sizes:
+                config.payload_bytes = payload_bytes
+                for target in targets:
+                    for cache_state in cache_states:
+                        for concurrency in concurrency_levels:
+                            # Each scenario starts from an empty connection pool, warmed by one unmeasured call.
+                            close_connection_pools()
+                            _set_cache_state('cold', directory)
+                            _call_ignoring_errors(_get_call(target), _make_kargs(-1))
+                            measures = run_scenario(target, cache_state, concurrency, n_requests, directory, first_key, server)
+                            first_key += n_requests
+                            results.append({'target': target, 'cache_state': cache_state, 'concurrency': concurrency,
+                                            'payload_bytes': payload_bytes,
+                                            'response_bytes': len(server.get_body(config.gzip_responses)), **measures})
+        finally:
+            disable_memory_cache()
+            disable_disk_cache()
+            close_connection_pools()
+            set_retry_policy()
+            DICT_GLOBAL_VALUES.update(saved_values)
+
+    return {
+        'metadata': {
+            'format_version': RESULTS_FORMAT_VERSION,
+            'created_at': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'git_revision': _get_git_revision(),
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scheme': 'https' if certfile else 'http',
+            'server': {k: v for k, v in config.to_dict().items() if k != 'payload_bytes'},
+            'max_retries': max_retries,
+        },
+        'results': results,
+    }
+
+
+def _scenario_key(result):
+    return result['target'], result['cache_state'], result['concurrency'], result['payload_bytes']
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """
+    :param threshold: Tolerated relative change: a scenario regressed if its throughput dropped, or its p99 latency
+        rose, by more than this.
+    :return: A list of `(scenario, measure, baseline value, current value)` of the regressions.
+    """
+    baseline_results = {_scenario_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = baseline_results.get(_scenario_key(result))
+        if old is None:
+            continue
+        if old['throughput'] and result['throughput'] is not None and result['throughput'] < old['throughput'] * (1 - threshold):
+            regressions.append((_scenario_key(result), 'throughput', old['throughput'], result['throughput']))
+        old_p99, p99 = old['latency']['p99'], result['latency']['p99']
+        if old_p99 and p99 is not None and p99 > old_p99 * (1 + threshold):
+            regressions.append((_scenario_key(result), 'p99', old_p99, p99))
+    return regressions
+
+
+def _parse_list(text, cast=str):
+    return tuple(cast(value) for value in text.split(',') if value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default='benchmark-results.json', help='Path of the JSON results.')
+    parser.add_argument('--targets', type=_parse_list, default=TARGETS, help=f'Comma-separated, among {",".join(TARGETS)}.')
+    parser.add_argument('--cache-states', type=_parse_list, default=CACHE_STATES,
+                        help=f'Comma-separated, among {",".join(CACHE_STATES)}.')
+    parser.add_argument('--concurrency', type=lambda text: _parse_list(text, int), default=DEFAULT_CONCURRENCY,
+                        help='Comma-separated numbers of threads.')
+    parser.add_argument('--payload-sizes', type=lambda text: _parse_list(text, int), default=DEFAULT_PAYLOAD_SIZES,
+                        help='Comma-separated sizes (in bytes) of the JSON responses.')
+    parser.add_argument('--requests', type=int, default=200, help='Calls measured per scenario.')
+    parser.add_argument('--latency', type=float, default=0.005, help='Seconds the server waits before answering.')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Max random seconds added to the latency.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of the calls failing with HTTP 503.')
+    parser.add_argument('--qps-limit', type=float, default=None, help='Calls per second above which the server answers 429.')
+    parser.add_argument('--no-gzip', action='store_true', help='Do not compress the responses.')
+    parser.add_argument('--certfile', help='PEM certificate, to serve HTTPS.')
+    parser.add_argument('--keyfile', help='PEM key of the certificate, if it is not in `--certfile`.')
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Tolerated relative regression (default 10%%).')
+    args = parser.parse_args(argv)
+
+    config = StandInConfig(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                           qps_limit=args.qps_limit, gzip_responses=not args.no_gzip)
+    results = run_benchmark(args.targets, args.cache_states, args.concurrency, args.payload_sizes, args.requests, config,
+                            args.certfile, args.keyfile, args.max_retries)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f'{"target":<18} {"cache":<7} {"threads":>7} {"payload":>9} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"errors":>6}')
+    for r in results['results']:
+        p50, p99 = r['latency']['p50'], r['latency']['p99']
+        print(f'{r["target"]:<18} {r["cache_state"]:<7} {r["concurrency"]:>7} {r["payload_bytes"]:>9} '
+              f'{r["throughput"] or 0:>9.1f} {(p50 or 0) * 1000:>8.2f} {(p99 or 0) * 1000:>8.2f} {r["n_errors"]:>6}')
+    print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_results(json.load(f), results, args.threshold)
+        for scenario, measure, old, new in regressions:
+            print(f'REGRESSION {scenario}: {measure} {old:.4g} -> {new:.4g}')
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,181 @@
+"""
+A local HTTP(S) server imitating the intellect.finance API, to benchmark the client without the network.
+
+Every `/api/<api_name>` answers `{'result': [...]}` with news-like items (the shape of most endpoints) filling about
+`payload_bytes`. The latency, the share of failed calls and a QPS limit (answered like the API, with
+`APIQPSLimitExceed`) are configurable, and can be changed while it runs.
+"""
+import gzip
+import http.server
+import json
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+
+
+class StandInConfig:
+    """
+    :param payload_bytes: Approximate size of the JSON body of a successful response.
+    :param latency: Seconds the server waits before answering.
+    :param latency_jitter: Extra seconds, uniformly drawn between 0 and this, added to `latency`.
+    :param error_rate: Share (between 0 and 1) of the calls failing with a `ServiceUnavailableError` (HTTP 503).
+    :param qps_limit: Max number of calls per second; the calls above it get an `APIQPSLimitExceed` (HTTP 429).
+        `None` for no limit.
+    :param gzip_responses: If True, gzip the bodies for the clients accepting it (as the API does).
+    """
+
+    def __init__(self, payload_bytes=10000, latency=0.0, latency_jitter=0.0, error_rate=0.0, qps_limit=None,
+                 gzip_responses=True):
+        self.payload_bytes = payload_bytes
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.qps_limit = qps_limit
+        self.gzip_responses = gzip_responses
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def _make_item(i):
+    return {
+        'h': f'Headline {i}: the company reports its quarterly results',
+        'p': 'Reuters',
+        'pub_t': f'2023-01-{i % 28 + 1:02d}T{i % 24:02d}:00:00Z',
+        'u': f'https://www.example.com/news/{i}',
+        's': round((i % 100) / 100, 2),
+        'tickers': ['AAPL', 'MSFT'],
+    }
+
+
+def make_payload(payload_bytes):
+    """
+    :return: The JSON body (bytes) of a successful response of about `payload_bytes`.
+    """
+    item_bytes = len(json.dumps(_make_item(0))) + 2
+    n_items = max(1, payload_bytes // item_bytes)
+    return json.dumps({'result': [_make_item(i) for i in range(n_items)]}).encode()
+
+
+class StandInServer:
+    """
+    The stand-in server, on a daemon thread. Use it as a context manager, or call `start` and `stop`.
+
+    :example:
+        with StandInServer(StandInConfig(payload_bytes=100000, latency=0.02)) as server:
+            set_base_url(server.base_url)
+            news_by_ticker(ticker='AAPL', start_date='2023-01-01', end_date='2023-01-31')
+
+    :param config: A `StandInConfig`. Its attributes can be changed between calls.
+    :param certfile: Optional. A PEM certificate (with its key, or see `keyfile`) to serve HTTPS.
+    :param port: 0 for a free port.
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, certfile=None, keyfile=None):
+        self.config = config or StandInConfig()
+        self.host = host
+        self.port = port
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.n_requests = 0
+        self._payloads = {}  # (payload_bytes, gzipped) -> body, built once so that the server adds little time
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self._server = None
+
+    @property
+    def base_url(self):
+        scheme = 'https' if self.certfile else 'http'
+        return f'{scheme}://{self.host}:{self.port}/api'
+
+    def get_body(self, gzipped):
+        key = (self.config.payload_bytes, gzipped)
+        body = self._payloads.get(key)
+        if body is None:
+            body = make_payload(self.config.payload_bytes)
+            if gzipped:
+                body = gzip.compress(body, compresslevel=6)
+            self._payloads[key] = body
+        return body
+
+    def _admit(self):
+        """
+        :return: False if the call is over the QPS limit (counted in one-second windows, as the API does).
+        """
+        with self._lock:
+            self.n_requests += 1
+            if self.config.qps_limit is None:
+                return True
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            return self._window_count <= self.config.qps_limit
+
+    def _make_handler(self):
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # The headers and the body are written separately: without this, Nagle's algorithm and the delayed ACKs
+            # of the client add ~40ms to each response, which a real server does not.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                config = stand_in.config
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                if not query.get('apikey'):
+                    return self._send_json(401, {'error': 'The API key is missing.', 'error_type': 'APIKeysNotFound'})
+                if not stand_in._admit():
+                    return self._send_json(429, {'error': 'Too many calls per second.', 'error_type': 'APIQPSLimitExceed'})
+                delay = config.latency + (random.uniform(0, config.latency_jitter) if config.latency_jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                if config.error_rate and random.random() < config.error_rate:
+                    return self._send_json(503, {'error': 'The service is unavailable.', 'error_type': 'ServiceUnavailableError'})
+                gzipped = config.gzip_responses and 'gzip' in self.headers.get('Accept-Encoding', '')
+                self._send(200, stand_in.get_body(gzipped), 'gzip' if gzipped else None)
+
+            def _send_json(self, status, result_dict):
+                self._send(status, json.dumps(result_dict).encode())
+
+            def _send(self, status, body, content_encoding=None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if content_encoding:
+                    self.send_header('Content-Encoding', content_encoding)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        server = http.server.ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        server.daemon_threads = True
+        if self.certfile:
+            ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ssl_context.load_cert_chain(self.certfile, self.keyfile)
+            server.socket = ssl_context.wrap_socket(server.socket, server_side=True)
+        self.port = server.server_address[1]
+        self._server = server
+        threading.Thread(target=server.serve_forever, name='IntellectFinanceAPI-stand-in', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
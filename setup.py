@@ -4,7 +4,7 @@ from setuptools import setup, find_packages
 def setup_package():
     setup(
         name='IntellectFinanceAPI',
-        packages=find_packages(exclude=('test',)),
+        packages=find_packages(exclude=('test', 'benchmark', 'benchmark.*')),
         description='An open-sourced Python package to access the intellect.finance API (https://www.intellect.finance/API_Document).',
         author='intellect.finance',
         author_email='customer-obsession@intellect.finance',
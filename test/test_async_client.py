@@ -0,0 +1,111 @@
+import asyncio
+import http.server
+import json
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API import AsyncUtility, async_api_functions
+from IntellectFinanceAPI.API.AsyncUtility import AsyncClient
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import disable_disk_cache, enable_disk_cache, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        if 'bad' in self.path:
+            status, body = 400, {'error': 'BAD', 'error_type': ParameterInvalidError.__name__}
+        else:
+            status, body = 200, {'result': self.path, 'port': self.client_address[1]}
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAsyncClient(TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def _generate_url(self, api_name, kargs):
+        return f'{self.base_url}/api/{api_name}?' + '&'.join(f'{k}={v}' for k, v in kargs.items())
+    
+    def test_concurrent_requests_share_connections(self):
+        set_api_key(1)
+        
+        async def main():
+            async with AsyncClient(max_concurrency=4) as client:
+                results = await asyncio.gather(*[
+                    async_api_functions.company_info_by_ticker(ticker=f'T{i}') for i in range(20)])
+                assert len(client._pools) == 1
+                pool = list(client._pools.values())[0]
+                return results, len(pool._idle)
+        
+        with patch('IntellectFinanceAPI.API.AsyncUtility._generate_url', self._generate_url):
+            results, n_idle = asyncio.run(main())
+        assert [r['result'] for r in results] == [f'/api/company_info_by_ticker?ticker=T{i}' for i in range(20)]
+        # Never more connections than the concurrency limit.
+        assert len({r['port'] for r in results}) <= 4
+        assert n_idle <= 4
+        set_api_key(None)
+    
+    def test_error(self):
+        set_api_key(1)
+        
+        async def main():
+            return await async_api_functions.company_info_by_ticker(ticker='bad')
+        
+        with patch('IntellectFinanceAPI.API.AsyncUtility._generate_url', self._generate_url):
+            with self.assertRaises(ParameterInvalidError):
+                asyncio.run(main())
+        set_api_key(None)
+
+    
+    def test_disk_cache_is_read_off_the_loop(self):
+        set_api_key(1)
+        get_cached_result = AsyncUtility._get_cached_result
+        threads = []
+        
+        def spy(api_name, kargs):
+            threads.append(threading.get_ident())
+            return get_cached_result(api_name, kargs)
+        
+        async def main():
+            async with AsyncClient() as client:
+                first = await client.send_http_request('company_info_by_ticker', ticker='AAPL')
+                second = await client.send_http_request('company_info_by_ticker', ticker='AAPL')
+                return first, second
+        
+        with tempfile.TemporaryDirectory() as directory:
+            enable_disk_cache(os.path.join(directory, 'cache.sqlite3'))
+            try:
+                with patch('IntellectFinanceAPI.API.AsyncUtility._generate_url', self._generate_url), \
+                        patch('IntellectFinanceAPI.API.AsyncUtility._get_cached_result', spy):
+                    first, second = asyncio.run(main())
+            finally:
+                disable_disk_cache()
+        assert first == second
+        assert len(threads) == 2 and threading.get_ident() not in threads
+        set_api_key(None)
+
+if __name__ == '__main__':
+    eval_TestCase(TestAsyncClient)
@@ -0,0 +1,49 @@
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.Batch import batch_request, iter_batch_request
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import set_api_key
+from IntellectFinanceAPI.API.api_functions import company_info_by_ticker
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+def call_url(url):
+    time.sleep(0.01)
+    if 'BAD' in url:
+        return {'error': 'BAD', 'error_type': ParameterInvalidError.__name__}
+    return {'result': url}
+
+
+class TestBatch(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+    
+    def tearDown(self):
+        set_api_key(None)
+    
+    def test_batch_request_keeps_order_and_collects_errors(self):
+        tickers = [f'T{i}' for i in range(30)] + ['BAD']
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            results = batch_request(company_info_by_ticker, [{'ticker': t} for t in tickers], max_workers=4)
+        assert [r.kargs['ticker'] for r in results] == tickers
+        assert all(r.ok for r in results[:-1])
+        assert 'ticker=T3&' in results[3].result['result']
+        assert isinstance(results[-1].error, ParameterInvalidError)
+    
+    def test_iter_batch_request_by_api_name(self):
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            results = list(iter_batch_request('company_info_by_ticker', [{'ticker': i} for i in range(10)], max_workers=3))
+        assert sorted(r.index for r in results) == list(range(10))
+    
+    def test_max_qps(self):
+        start_time = time.monotonic()
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            batch_request('company_info_by_ticker', [{'ticker': i} for i in range(6)], max_workers=6, max_qps=50)
+        assert time.monotonic() - start_time >= 0.1
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestBatch)
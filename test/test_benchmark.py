@@ -0,0 +1,73 @@
+import json
+import urllib.error
+import urllib.request
+from unittest import TestCase
+
+from benchmark.run_benchmark import compare_results, run_benchmark
+from benchmark.stand_in_server import StandInConfig, StandInServer
+from IntellectFinanceAPI.API.ConnectionPool import close_connection_pools
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed
+from IntellectFinanceAPI.API.Retry import set_retry_policy
+from IntellectFinanceAPI.API.Utility import DEFAULT_BASE_URL, DICT_GLOBAL_VALUES, _generate_url, send_http_request, \
+    set_api_key, set_base_url
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class TestBenchmark(TestCase):
+
+    def setUp(self):
+        set_api_key(1)
+
+    def tearDown(self):
+        set_base_url(None)
+        set_retry_policy()
+        close_connection_pools()
+        set_api_key(None)
+
+    def test_set_base_url(self):
+        set_base_url('http://127.0.0.1:8080/api/')
+        self.assertEqual(_generate_url('news_by_ticker', {'ticker': 'AAPL'}), 'http://127.0.0.1:8080/api/news_by_ticker?ticker=AAPL&apikey=1')
+        set_base_url(None)
+        self.assertEqual(DICT_GLOBAL_VALUES['base_url'], DEFAULT_BASE_URL)
+
+    def test_stand_in_server(self):
+        config = StandInConfig(payload_bytes=5000, qps_limit=2)
+        with StandInServer(config) as server:
+            set_base_url(server.base_url)
+            result = send_http_request('news_by_ticker', ticker='AAPL')
+            self.assertLess(abs(len(json.dumps(result)) - 5000), 200)
+            with urllib.request.urlopen(f'{server.base_url}/news_by_ticker?apikey=1') as response:
+                self.assertEqual(json.loads(response.read()), result)
+
+            set_retry_policy(max_retries=0)
+            with self.assertRaises(APIQPSLimitExceed):
+                send_http_request('news_by_ticker', ticker='AAPL')
+
+            config.qps_limit, config.error_rate = None, 1.0
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(f'{server.base_url}/news_by_ticker?apikey=1')
+            self.assertEqual(context.exception.code, 503)
+            self.assertEqual(server.n_requests, 4)
+
+    def test_run_benchmark(self):
+        results = run_benchmark(cache_states=('cold', 'memory'), concurrency_levels=(1, 4), payload_sizes=(2000,),
+                                n_requests=20)
+        self.assertEqual(DICT_GLOBAL_VALUES['apikey'], 1)
+        self.assertEqual(DICT_GLOBAL_VALUES['base_url'], DEFAULT_BASE_URL)
+        self.assertEqual(len(results['results']), 8)
+        json.dumps(results)
+        for result in results['results']:
+            self.assertEqual(result['n_errors'], 0)
+            self.assertLessEqual(result['latency']['p50'], result['latency']['p99'])
+            self.assertGreater(result['throughput'], 0)
+            self.assertEqual(result['server_requests'], 20 if result['cache_state'] == 'cold' else 0)
+
+        self.assertEqual(compare_results(results, results), [])
+        slower = json.loads(json.dumps(results))
+        slower['results'][0]['throughput'] /= 2
+        [(scenario, measure, _, _)] = compare_results(results, slower)
+        self.assertEqual((scenario, measure), (('send_http_request', 'cold', 1, 2000), 'throughput'))
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestBenchmark)
@@ -0,0 +1,49 @@
+import io
+import json
+import unittest
+from unittest import TestCase
+
+try:
+    import numpy as np
+    from IntellectFinanceAPI.API.Columnar import to_columns
+except ImportError:
+    np = None
+from IntellectFinanceAPI.API.Streaming import iter_json_array
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestColumnar(TestCase):
+    
+    def test_to_columns(self):
+        items = [
+            {'date': '2022-01-03', 'value': 1.5, 'name': 'a'},
+            {'date': '2022-01-04', 'value': None, 'name': 'b', 'extra': 3},
+            {'date': '2022-01-05', 'value': 2, 'name': None},
+        ]
+        r = to_columns(items, datetime_unit='D')
+        assert len(r) == 3
+        assert r['date'].dtype == np.dtype('datetime64[D]')
+        assert r['date'][0] == np.datetime64('2022-01-03')
+        assert r['value'].dtype == np.float64
+        assert np.isnan(r['value'][1]) and r['value'][2] == 2
+        assert r['name'].dtype == object and list(r['name']) == ['a', 'b', None]
+        assert np.isnan(r['extra'][0]) and r['extra'][1] == 3
+    
+    def test_mixed_types_fall_back_to_object(self):
+        r = to_columns([{'v': 1}, {'v': 'n/a'}])
+        assert r['v'].dtype == object and list(r['v']) == [1.0, 'n/a']
+        r = to_columns([{'pub_t': '2022-06-30 23:22:50'}, {'pub_t': 'unknown'}])
+        assert r['pub_t'].dtype == object
+    
+    def test_from_stream(self):
+        document = {'result': [{'date': f'2022-01-{d:02d}', 'yield': d / 100} for d in range(1, 32)]}
+        r = to_columns(iter_json_array(io.BytesIO(json.dumps(document).encode()), chunk_size=16))
+        assert r['yield'].sum() == sum(d / 100 for d in range(1, 32))
+        assert str(r['date'].dtype) == 'datetime64[s]'
+        df = r.to_pandas()
+        assert list(df.columns) == ['date', 'yield'] and len(df) == 31
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestColumnar)
@@ -0,0 +1,101 @@
+import gzip
+import http.server
+import io
+import json
+import threading
+import zlib
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.Compression import DecodingReader, ResponseTooLargeError, decode_body, \
+    get_last_transfer_stats, set_compression
+from IntellectFinanceAPI.API.Streaming import stream_http_request
+from IntellectFinanceAPI.API.Utility import _call_url, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+RESULT = {'result': [{'h': f'headline {i}', 'p': 'Reuters'} for i in range(2000)]}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        body = json.dumps(RESULT).encode()
+        encoding = None
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body, encoding = gzip.compress(body), 'gzip'
+        self.send_response(200)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class TestCompression(TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}/api/news_by_ticker?ticker=AAPL'
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def test_call_url(self):
+        assert _call_url(self.url) == RESULT
+        stats = get_last_transfer_stats()
+        assert stats.encoding == 'gzip'
+        assert stats.uncompressed_bytes == len(json.dumps(RESULT))
+        assert stats.compressed_bytes < stats.uncompressed_bytes / 5
+    
+    def test_stream(self):
+        set_api_key(1)
+        with patch('IntellectFinanceAPI.API.Streaming._generate_url', lambda api_name, kargs: self.url):
+            r = stream_http_request('news_by_ticker', ticker='AAPL')
+            assert list(r) == RESULT['result']
+        assert r.transfer_stats.encoding == 'gzip'
+        assert r.transfer_stats.uncompressed_bytes == len(json.dumps(RESULT))
+        set_api_key(None)
+    
+    def test_deflate(self):
+        body = b'{"result": 1}'
+        assert decode_body(zlib.compress(body), {'Content-Encoding': 'deflate'}) == body
+        raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        assert decode_body(raw_deflate.compress(body) + raw_deflate.flush(), {'Content-Encoding': 'deflate'}) == body
+        assert decode_body(body, {}) == body
+
+    
+    def test_decoded_size(self):
+        bomb = gzip.compress(b'0' * (20 * 1024 * 1024))  # about 20KB
+        
+        class Response(io.BytesIO):
+            headers = {'Content-Encoding': 'gzip'}
+        
+        # A streamed chunk only inflates to `chunk_size` bytes at a time.
+        reader = DecodingReader(Response(bomb), chunk_size=64 * 1024)
+        assert len(reader.read(10)) == 10
+        assert reader.stats.uncompressed_bytes <= 64 * 1024
+        assert len(reader.read()) == 20 * 1024 * 1024 - 10
+        
+        set_compression(max_decoded_bytes=1024 * 1024)
+        try:
+            with self.assertRaises(ResponseTooLargeError):
+                decode_body(bomb, {'Content-Encoding': 'gzip'})
+            with self.assertRaises(ResponseTooLargeError):
+                DecodingReader(Response(bomb)).read()
+            # The limit is on the decoded size of compressed responses only.
+            assert len(decode_body(b'0' * (2 * 1024 * 1024), {})) == 2 * 1024 * 1024
+        finally:
+            set_compression()
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestCompression)
@@ -0,0 +1,121 @@
+import http.server
+import json
+import socket
+import threading
+import time
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ConnectionPool import HTTPSConnectionPool, get_ssl_context
+from IntellectFinanceAPI.API.Tracing import PhaseRecorder, add_phase_hook, new_trace, remove_phase_hook
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'result': self.path, 'port': self.client_address[1]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestConnectionPool(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _get(self, pool, path):
+        with pool.request('GET', path) as r:
+            return json.loads(r.read())
+
+    def test_reuses_connection(self):
+        pool = HTTPSConnectionPool('127.0.0.1', self.server.server_port, scheme='http')
+        r1 = self._get(pool, '/a')
+        r2 = self._get(pool, '/b')
+        assert r1['result'] == '/a' and r2['result'] == '/b'
+        # Same client port means the same TCP connection.
+        assert r1['port'] == r2['port']
+        assert len(pool) == 1
+        pool.close()
+
+    def test_idle_eviction(self):
+        pool = HTTPSConnectionPool('127.0.0.1', self.server.server_port, scheme='http', idle_timeout=0.05)
+        r1 = self._get(pool, '/a')
+        time.sleep(0.1)
+        r2 = self._get(pool, '/b')
+        assert r1['port'] != r2['port']
+        pool.close()
+
+    def test_stale_socket(self):
+        pool = HTTPSConnectionPool('127.0.0.1', self.server.server_port, scheme='http')
+        self._get(pool, '/a')
+        # Simulate the server closing the kept-alive socket.
+        conn, _ = pool._idle[0]
+        conn.sock.shutdown(2)
+        assert self._get(pool, '/b')['result'] == '/b'
+        pool.close()
+
+    def test_max_size(self):
+        pool = HTTPSConnectionPool('127.0.0.1', self.server.server_port, scheme='http', max_size=2)
+        responses = [pool.request('GET', f'/{i}') for i in range(4)]
+        for r in responses:
+            r.read()
+            r.release()
+        assert len(pool) == 2
+        pool.close()
+
+    def test_ssl_context_is_shared(self):
+        assert get_ssl_context() is get_ssl_context()
+
+    @skipUnless(socket.has_ipv6, 'IPv6 is not supported')
+    def test_traced_connect_keeps_the_resolved_address(self):
+        class IPv6Server(http.server.ThreadingHTTPServer):
+            address_family = socket.AF_INET6
+        try:
+            server = IPv6Server(('::1', 0), KeepAliveHandler)
+        except OSError:
+            self.skipTest('no IPv6 loopback')
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        # The resolved IPv6 address, with its flow info and scope id, is connected to as it is.
+        addresses = [(socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('::1', port, 0, 0))]
+        connected = []
+        connect = socket.socket.connect
+
+        def spy(sock, address):
+            connected.append(address)
+            return connect(sock, address)
+
+        recorder = PhaseRecorder()
+        add_phase_hook(recorder)
+        pool = HTTPSConnectionPool('ipv6.test', port, scheme='http')
+        try:
+            with patch('socket.getaddrinfo', return_value=addresses), patch('socket.socket.connect', spy), new_trace('test'):
+                assert self._get(pool, '/a')['result'] == '/a'
+        finally:
+            pool.close()
+            remove_phase_hook(recorder)
+            server.shutdown()
+            server.server_close()
+        assert connected == [('::1', port, 0, 0)]
+        assert [e.phase for e in recorder.events][:3] == ['dns', 'connect', 'ttfb']
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestConnectionPool)
@@ -0,0 +1,132 @@
+import datetime
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.DateRange import DateRangeStore, fetch_date_range, split_date_range
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class FakeAPI:
+    """
+    A daily series with one item per day, in ascending order.
+    """
+    
+    def __init__(self, date_field='date'):
+        self.date_field = date_field
+        self.calls = []
+    
+    def __call__(self, api_name, start_date, end_date, **kargs):
+        self.calls.append((start_date, end_date))
+        start, end = datetime.date.fromisoformat(start_date), datetime.date.fromisoformat(end_date)
+        days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+        return {'result': [{self.date_field: d.isoformat(), 'value': d.day} for d in days]}
+
+
+class FakeNewsAPI:
+    """
+    `news_per_day` news each day, the latest first, capped at 1000 per call.
+    """
+    
+    def __init__(self, news_per_day):
+        self.news_per_day = news_per_day
+        self.calls = []
+    
+    def __call__(self, api_name, start_date, end_date, **kargs):
+        self.calls.append((start_date, end_date))
+        start, end = datetime.date.fromisoformat(start_date), datetime.date.fromisoformat(end_date)
+        days = [end - datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+        news = [{'pub_t': f'{d.isoformat()}T{23 - i % 24:02d}:00:00Z'} for d in days for i in range(self.news_per_day)]
+        return {'result': news[:1000]}
+
+
+class TestDateRange(TestCase):
+    
+    def test_split_date_range(self):
+        assert split_date_range('2022-01-01', '2022-01-10', 4) == [
+            ('2022-01-01', '2022-01-04'), ('2022-01-05', '2022-01-08'), ('2022-01-09', '2022-01-10')]
+        assert split_date_range('2022-01-01', '2022-01-01', 4) == [('2022-01-01', '2022-01-01')]
+    
+    def test_fetch_date_range(self):
+        api = FakeAPI()
+        with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+            r = fetch_date_range('treasury_yield', '2021-01-01', '2023-12-31', duration='duration_10yr')
+        assert len(api.calls) == 3
+        dates = [i['date'] for i in r['result']]
+        assert dates == sorted(dates) and len(dates) == len(set(dates)) == 1095
+    
+    def test_truncated_chunks_are_split(self):
+        api = FakeNewsAPI(news_per_day=100)
+        with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+            r = fetch_date_range('news_by_ticker', '2021-01-01', '2021-01-31', ticker='AAPL')
+        assert len(r['result']) == 3100
+        dates = [n['pub_t'][:10] for n in r['result']]
+        assert dates == sorted(dates, reverse=True)
+        # The first chunk had 3000 news: it was split until no call reached the cap.
+        assert api.calls[:2] == [('2021-01-01', '2021-01-30'), ('2021-01-31', '2021-01-31')] and len(api.calls) > 4
+        
+        # A single day reaching the cap is kept, but not covered: the store fetches it again.
+        api = FakeNewsAPI(news_per_day=1500)
+        store = DateRangeStore()
+        with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+            store.fetch('news_by_ticker', '2021-01-01', '2021-01-02', ticker='AAPL')
+            assert len(store.fetch('news_by_ticker', '2021-01-01', '2021-01-02', ticker='AAPL')['result']) == 2000
+            assert sorted(api.calls[-2:]) == [('2021-01-01', '2021-01-01'), ('2021-01-02', '2021-01-02')]
+    
+    def test_limit_args_are_not_chunked(self):
+        api = FakeNewsAPI(news_per_day=10)
+        with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+            with self.assertRaises(ParameterInvalidError):
+                fetch_date_range('news_by_ticker', '2021-01-01', '2021-03-31', ticker='AAPL', stop_at_number_of_news=50)
+            with self.assertRaises(ParameterInvalidError):
+                DateRangeStore().fetch('news_by_ticker', '2021-01-01', '2021-01-10', ticker='AAPL', if_most_relevant_news_ind='True')
+            assert api.calls == []
+            fetch_date_range('news_by_ticker', '2021-01-01', '2021-01-10', ticker='AAPL', stop_at_number_of_news=50)
+            fetch_date_range('news_by_ticker', '2021-01-01', '2021-03-31', ticker='AAPL', if_most_relevant_news_ind='False')
+        assert api.calls[0] == ('2021-01-01', '2021-01-10')
+    
+    def test_store_only_fetches_missing_ranges(self):
+        api = FakeAPI()
+        store = DateRangeStore()
+        with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+            store.fetch('treasury_yield', '2021-01-01', '2021-06-30', duration='duration_10yr')
+            store.fetch('treasury_yield', '2021-03-01', '2021-03-31', duration='duration_10yr')
+            assert len(api.calls) == 1
+            r = store.fetch('treasury_yield', '2021-06-01', '2021-07-02', duration='duration_10yr')
+            assert api.calls[-1] == ('2021-07-01', '2021-07-02')
+            assert r['result'][0]['date'] == '2021-06-01' and r['result'][-1]['date'] == '2021-07-02'
+            assert len(r['result']) == 32
+            # Another duration is another series.
+            store.fetch('treasury_yield', '2021-03-01', '2021-03-31', duration='duration_2yr')
+            assert len(api.calls) == 3
+    
+    def test_recent_days_are_fetched_again(self):
+        api = FakeAPI()
+        store = DateRangeStore(grace_days=1)
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        start = (today - datetime.timedelta(days=10)).isoformat()
+        with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+            store.fetch('fed_fund_target_rate', start, today.isoformat())
+            store.fetch('fed_fund_target_rate', start, today.isoformat())
+        # Only the days within the grace period are requested again.
+        assert api.calls[-1] == (today.isoformat(), today.isoformat())
+    
+    def test_save_and_load(self):
+        api = FakeAPI(date_field='pub_t')
+        store = DateRangeStore()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'store.json.z')
+            with patch('IntellectFinanceAPI.API.DateRange.send_http_request', api):
+                r1 = store.fetch('news_by_topic', '2021-01-01', '2021-01-20', topic_name='X')
+                store.save(path)
+                store = DateRangeStore.load(path)
+                r2 = store.fetch('news_by_topic', '2021-01-01', '2021-01-20', topic_name='X')
+        assert len(api.calls) == 3
+        # `news_by_topic` lists the latest items first.
+        assert r1 == r2 and r2['result'][0]['pub_t'] == '2021-01-20'
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestDateRange)
@@ -0,0 +1,87 @@
+import datetime
+import multiprocessing
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.DiskCache import DiskCache, IMMUTABLE, disable_disk_cache, enable_disk_cache, immutable_after_date, \
+    immutable_after_quarter, ttl
+from IntellectFinanceAPI.API.Utility import send_http_request, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+def write_entries(path, start):
+    cache = DiskCache(path, ttl_rules={'one_api': ttl(60)})
+    for i in range(start, start + 50):
+        cache.set('one_api', {'i': i}, {'result': i})
+
+
+class TestDiskCache(TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+    
+    def tearDown(self):
+        disable_disk_cache()
+        self.directory.cleanup()
+    
+    def test_send_http_request_uses_cache_without_apikey(self):
+        enable_disk_cache(self.path, ttl_rules={'one_api': ttl(60)})
+        with patch('IntellectFinanceAPI.API.Utility._call_url') as f:
+            f.return_value = {'result': 1}
+            set_api_key('key_1')
+            assert send_http_request('one_api', ticker='A', date=None) == {'result': 1}
+            set_api_key('key_2')
+            assert send_http_request('one_api', ticker='A') == {'result': 1}
+            assert f.call_count == 1
+            # APIs without a TTL rule are not cached.
+            send_http_request('other_api', ticker='A')
+            send_http_request('other_api', ticker='A')
+            assert f.call_count == 3
+        set_api_key(None)
+    
+    def test_ttl_rules(self):
+        past = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=30)).strftime('%Y-%m-%d')
+        today = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d')
+        assert immutable_after_date('end_date')({'end_date': past}) == IMMUTABLE
+        assert immutable_after_date('end_date', ttl_before=5)({'end_date': today}) == 5
+        assert immutable_after_quarter('year_quarter')({'year_quarter': '2020Q4'}) == IMMUTABLE
+        assert immutable_after_quarter('year_quarter', ttl_before=5)({'year_quarter': f'{today[:4]}Q4'}) == 5
+    
+    def test_expiry_and_invalidate(self):
+        cache = DiskCache(self.path, ttl_rules={'one_api': ttl(-1), 'two_api': ttl(60)})
+        cache.set('one_api', {'i': 1}, {'result': 1})
+        assert cache.get('one_api', {'i': 1}) is None
+        cache.set('two_api', {'i': 1}, {'result': 1})
+        cache.set('two_api', {'i': 2}, {'result': 2})
+        cache.invalidate('two_api', i=1)
+        assert cache.get('two_api', {'i': 1}) is None
+        assert cache.get('two_api', {'i': 2}) == {'result': 2}
+        cache.invalidate('two_api')
+        assert len(cache) == 0 and cache.total_size() == 0
+    
+    def test_lru_eviction(self):
+        cache = DiskCache(self.path, max_bytes=2000, ttl_rules={'one_api': ttl(60)})
+        cache.ACCESS_RESOLUTION = 0
+        for i in range(100):
+            cache.set('one_api', {'i': i}, {'result': [i] * 50})
+            cache.get('one_api', {'i': 0})
+        assert cache.total_size() <= 2000
+        assert cache.get('one_api', {'i': 0}) is not None
+        assert cache.get('one_api', {'i': 1}) is None
+    
+    def test_shared_across_processes(self):
+        processes = [multiprocessing.Process(target=write_entries, args=(self.path, i * 50)) for i in range(3)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        cache = DiskCache(self.path, ttl_rules={'one_api': ttl(60)})
+        assert len(cache) == 150
+        assert cache.get('one_api', {'i': 120}) == {'result': 120}
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestDiskCache)
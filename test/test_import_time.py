@@ -0,0 +1,77 @@
+import os
+import re
+import subprocess
+import sys
+from unittest import TestCase, skipUnless
+
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+# Budget for `import IntellectFinanceAPI` in a fresh interpreter, as reported by `python -X importtime` (best of a few
+# runs). It is about 70ms on a laptop. A wall-clock budget fails at random on loaded machines, so it is only checked
+# when `IntellectFinanceAPI_TIMING_TESTS=1` is set; the eager imports themselves are always checked.
+IMPORT_TIME_BUDGET_US = 250_000
+N_RUNS = 3
+
+# Modules which must only be imported when they are actually needed.
+LAZY_MODULES = ('asyncio', 'sqlite3', 'concurrent.futures', 'numpy', 'pandas', 'PyHelpers', 'WarrensDataAccess')
+
+_CODE = 'import sys, IntellectFinanceAPI; print(",".join(m for m in %r if m in sys.modules))' % (LAZY_MODULES,)
+
+
+def measure_import_time():
+    """
+    :return: The cumulative import time of `IntellectFinanceAPI` in microseconds, and the lazy modules it loaded.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', _CODE], capture_output=True, text=True, check=True)
+    match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| IntellectFinanceAPI$', process.stderr, re.MULTILINE)
+    loaded_modules = [m for m in process.stdout.strip().split(',') if m]
+    return int(match.group(1)), loaded_modules
+
+
+class TestImportTime(TestCase):
+    
+    def test_no_eager_imports(self):
+        _, loaded_modules = measure_import_time()
+        assert loaded_modules == [], f'Imported eagerly: {loaded_modules}'
+    
+    @skipUnless(os.environ.get('IntellectFinanceAPI_TIMING_TESTS') == '1', 'set IntellectFinanceAPI_TIMING_TESTS=1 to run')
+    def test_import_time(self):
+        best_time_us = min(measure_import_time()[0] for _ in range(N_RUNS))
+        assert best_time_us < IMPORT_TIME_BUDGET_US, f'{best_time_us / 1000:.1f}ms > {IMPORT_TIME_BUDGET_US / 1000:.0f}ms'
+    
+    def test_lazy_attributes(self):
+        import IntellectFinanceAPI
+        from IntellectFinanceAPI import AsyncClient, TopicNotFoundError, stream_http_request
+        from IntellectFinanceAPI.API.ErrorTypes import APIError, get_error_class
+        assert IntellectFinanceAPI.async_api_functions.news_by_ticker
+        assert 'AsyncClient' in dir(IntellectFinanceAPI)
+        assert issubclass(TopicNotFoundError, APIError)
+        assert get_error_class('TopicNotFoundError') is TopicNotFoundError
+        assert get_error_class('NotAnError') is None
+        with self.assertRaises(AttributeError):
+            IntellectFinanceAPI.not_an_attribute
+    
+    def test_lazy_numpy_attributes(self):
+        import IntellectFinanceAPI
+        from IntellectFinanceAPI.API.Columnar import columnar_http_request
+        from IntellectFinanceAPI.API.VectorIndex import VectorIndex
+        assert {'VectorIndex', 'RelevanceMatrix', 'Screener', 'RatesWarehouse', 'columnar_http_request'} <= set(dir(IntellectFinanceAPI))
+        assert IntellectFinanceAPI.columnar_http_request is columnar_http_request
+        assert IntellectFinanceAPI.VectorIndex is VectorIndex
+        assert IntellectFinanceAPI.RatesWarehouse.__name__ == 'RatesWarehouse'
+        assert callable(IntellectFinanceAPI.get_metrics)
+
+    
+    def test_classes_named_like_their_module(self):
+        # In a fresh interpreter, each order of imports: the submodule stays a module, and the package exports the class.
+        for name in ('TextPipeline', 'SecMirror', 'VectorIndex', 'RelevanceMatrix', 'Screener', 'RatesWarehouse'):
+            for code in [f'import IntellectFinanceAPI.API.{name} as m; from IntellectFinanceAPI import {name} as c',
+                         f'from IntellectFinanceAPI import {name} as c; import IntellectFinanceAPI.API.{name} as m',
+                         f'from IntellectFinanceAPI.API import {name} as m; from IntellectFinanceAPI import {name} as c']:
+                code += (f'; import inspect, IntellectFinanceAPI.API as api'
+                         f'; assert inspect.ismodule(m) and api.{name} is m and c is m.{name} and inspect.isclass(c)')
+                subprocess.run([sys.executable, '-c', code], check=True)
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestImportTime)
@@ -0,0 +1,98 @@
+import copy
+import pickle
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.DiskCache import ttl
+from IntellectFinanceAPI.API.MemoryCache import MemoryCache, bypass_memory_cache, disable_memory_cache, enable_memory_cache, \
+    invalidate_memory_cache
+from IntellectFinanceAPI.API.Utility import send_http_request, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class TestMemoryCache(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+    
+    def tearDown(self):
+        disable_memory_cache()
+        set_api_key(None)
+    
+    def test_send_http_request(self):
+        enable_memory_cache(ttl_rules={'one_api': ttl(60)})
+        with patch('IntellectFinanceAPI.API.Utility._call_url') as f:
+            f.return_value = {'result': [1, 2]}
+            r = send_http_request('one_api', ticker='A')
+            r['result'].append(3)
+            assert send_http_request('one_api', ticker='A') == {'result': [1, 2]}
+            assert f.call_count == 1
+            
+            with bypass_memory_cache():
+                send_http_request('one_api', ticker='A')
+            assert f.call_count == 2
+            
+            invalidate_memory_cache('one_api', ticker='A')
+            send_http_request('one_api', ticker='A')
+            assert f.call_count == 3
+    
+    def test_copies_are_independent(self):
+        cache = MemoryCache(ttl_rules={'one_api': ttl(60)})
+        cache.set('one_api', {'a': 1}, {'result': [{'x': 1}]})
+        r = cache.get('one_api', {'a': 1})
+        r['result'][0]['x'] = 2
+        assert cache.get('one_api', {'a': 1}) == {'result': [{'x': 1}]}
+    
+    def test_read_only(self):
+        cache = MemoryCache(ttl_rules={'one_api': ttl(60)}, read_only=True)
+        cache.set('one_api', {'a': 1}, {'result': [{'x': 1}]})
+        r = cache.get('one_api', {'a': 1})
+        assert r is cache.get('one_api', {'a': 1})
+        with self.assertRaises(TypeError):
+            r['result'][0]['x'] = 2
+        with self.assertRaises(TypeError):
+            r['result'].append(1)
+    
+    def test_read_only_copies(self):
+        cache = MemoryCache(ttl_rules={'one_api': ttl(60)}, read_only=True)
+        cache.set('one_api', {'a': 1}, {'result': [{'x': 1}]})
+        r = cache.get('one_api', {'a': 1})
+        
+        shallow = copy.copy(r)
+        assert type(shallow) is dict and shallow == r
+        shallow['extra'] = 1
+        
+        deep = copy.deepcopy(r)
+        assert type(deep) is dict and type(deep['result']) is list and type(deep['result'][0]) is dict
+        deep['result'][0]['x'] = 2
+        deep['result'].append(3)
+        assert copy.copy(r['result']) == [{'x': 1}]
+        
+        unpickled = pickle.loads(pickle.dumps(r))
+        assert unpickled == {'result': [{'x': 1}]}
+        unpickled['result'][0]['x'] = 2
+        assert r == {'result': [{'x': 1}]}
+    
+    def test_bounds_and_ttl(self):
+        cache = MemoryCache(max_entries=3, ttl_rules={'one_api': ttl(60), 'short_api': ttl(0.01)})
+        for i in range(5):
+            cache.set('one_api', {'i': i}, {'result': i})
+            cache.get('one_api', {'i': 0})
+        assert len(cache) == 3
+        assert cache.get('one_api', {'i': 0}) == {'result': 0}
+        assert cache.get('one_api', {'i': 1}) is None
+        
+        cache = MemoryCache(max_bytes=1000, ttl_rules={'one_api': ttl(60)})
+        for i in range(100):
+            cache.set('one_api', {'i': i}, {'result': 'x' * 100})
+        assert 0 < cache.n_bytes <= 1000
+        
+        cache = MemoryCache(ttl_rules={'short_api': ttl(0.01)})
+        cache.set('short_api', {}, {'result': 1})
+        time.sleep(0.02)
+        assert cache.get('short_api', {}) is None
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestMemoryCache)
@@ -0,0 +1,131 @@
+import logging
+import time
+import urllib.request
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed, ParameterInvalidError
+from IntellectFinanceAPI.API.Metrics import Metrics, disable_metrics, enable_metrics
+from IntellectFinanceAPI.API.Retry import set_retry_policy
+from IntellectFinanceAPI.API.Utility import disable_memory_cache, enable_memory_cache, redact_url, send_http_request, \
+    set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class FakeAPI:
+
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+
+    def __call__(self, url):
+        time.sleep(0.002)
+        if self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return {'result': 1}
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        set_api_key(1)
+        set_retry_policy(max_retries=2, base_delay=0.001, max_delay=0.01, failure_threshold=None)
+        self.metrics = enable_metrics()
+        self.metrics.reset()
+
+    def tearDown(self):
+        disable_metrics()
+        disable_memory_cache()
+        set_retry_policy()
+        set_api_key(None)
+
+    def test_requests_retries_and_errors(self):
+        api = FakeAPI([TimeoutError(), {'error': 'slow down', 'error_type': APIQPSLimitExceed.__name__}, {'result': 1},
+                       {'error': 'bad', 'error_type': ParameterInvalidError.__name__}])
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            send_http_request('news_by_ticker', ticker='AAPL')
+            with self.assertRaises(ParameterInvalidError):
+                send_http_request('news_by_ticker', ticker='MSFT')
+            api.responses = [ConnectionResetError()] * 3
+            with self.assertRaises(ConnectionResetError):
+                send_http_request('treasury_yield', duration='duration_10yr')
+
+        snapshot = self.metrics.snapshot()
+        news = snapshot['news_by_ticker']
+        self.assertEqual(news['requests'], 4)
+        self.assertEqual(news['retries'], 2)
+        self.assertEqual(news['errors'], {'ParameterInvalidError': 1})
+        self.assertEqual(news['latency']['count'], 4)
+        self.assertEqual(news['latency']['buckets'][float('inf')], 4)
+        self.assertGreater(news['latency']['sum'], 0.006)
+        self.assertLess(0, news['latency']['p50'])
+        self.assertEqual(snapshot['treasury_yield']['errors'], {'ConnectionResetError': 1})
+        self.assertEqual(snapshot['treasury_yield']['retries'], 2)
+
+    def test_cache_hits_and_misses(self):
+        enable_memory_cache(ttl_rules={'company_info_by_ticker': lambda kargs: 60})
+        with patch('IntellectFinanceAPI.API.Utility._call_url', FakeAPI()):
+            for _ in range(3):
+                send_http_request('company_info_by_ticker', ticker='AAPL')
+        company = self.metrics.snapshot()['company_info_by_ticker']
+        self.assertEqual(company['cache_hits'], {'memory': 2, 'disk': 0})
+        self.assertEqual(company['cache_misses'], 1)
+        self.assertEqual(company['requests'], 1)
+
+    def test_disabled(self):
+        disable_metrics()
+        with patch('IntellectFinanceAPI.API.Utility._call_url', FakeAPI()):
+            send_http_request('news_by_ticker', ticker='AAPL')
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_latency_quantile(self):
+        metrics = Metrics()
+        for seconds in [0.02] * 98 + [3.0, 3.0]:
+            metrics.observe_request('one_api', seconds)
+        endpoint = metrics.snapshot()['one_api']
+        self.assertTrue(0.01 < endpoint['latency']['p50'] <= 0.025)
+        self.assertTrue(2.5 < endpoint['latency']['p99'] <= 5.0)
+
+    def test_prometheus(self):
+        metrics = Metrics()
+        metrics.observe_request('news_by_ticker', 0.03, response_bytes=1200)
+        metrics.observe_request('news_by_ticker', 12.0, response_bytes=800)
+        metrics.observe_error('news_by_ticker', ParameterInvalidError('bad'))
+        metrics.observe_cache('news_by_ticker', 'disk')
+        text = metrics.to_prometheus()
+        lines = text.splitlines()
+        self.assertIn('# TYPE intellect_finance_request_duration_seconds histogram', lines)
+        self.assertIn('intellect_finance_requests_total{api_name="news_by_ticker"} 2', lines)
+        self.assertIn('intellect_finance_request_duration_seconds_bucket{api_name="news_by_ticker",le="0.05"} 1', lines)
+        self.assertIn('intellect_finance_request_duration_seconds_bucket{api_name="news_by_ticker",le="+Inf"} 2', lines)
+        self.assertIn('intellect_finance_request_duration_seconds_count{api_name="news_by_ticker"} 2', lines)
+        self.assertIn('intellect_finance_response_bytes_total{api_name="news_by_ticker"} 2000', lines)
+        self.assertIn('intellect_finance_errors_total{api_name="news_by_ticker",error_type="ParameterInvalidError"} 1', lines)
+        self.assertIn('intellect_finance_cache_hits_total{api_name="news_by_ticker",cache="disk"} 1', lines)
+
+        server = metrics.start_http_server(port=0)
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+                self.assertEqual(response.read().decode(), text)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_api_key_not_logged(self):
+        self.assertEqual(redact_url('https://www.intellect.finance/api/x?ticker=AAPL&apikey=SECRET'),
+                         'https://www.intellect.finance/api/x?ticker=AAPL&apikey=***')
+        with self.assertLogs('IntellectFinanceAPI.API.Utility', level=logging.DEBUG) as logs:
+            set_api_key('SECRET')
+            pool = Mock()
+            pool.request.side_effect = ConnectionRefusedError()
+            with patch('IntellectFinanceAPI.API.Utility.get_connection_pool', return_value=pool):
+                with self.assertRaises(ConnectionRefusedError):
+                    send_http_request('news_by_ticker', ticker='AAPL')
+        self.assertTrue(any('apikey=***' in line for line in logs.output))
+        self.assertFalse(any('SECRET' in line for line in logs.output))
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestMetrics)
@@ -0,0 +1,72 @@
+import copy
+import pickle
+import tracemalloc
+from unittest import TestCase
+
+from IntellectFinanceAPI.API.NewsRecords import NewsItem, to_news_items
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+def make_news(i):
+    return {
+        'emo': -0.36,
+        'h': f'BNPL firm Openpay pauses U.S. operations, to focus on Australia {i}',
+        'i': 'https://www.reuters.com/pf/resources/images/reuters/reuters-default.png?d=100',
+        'landing_index': 24.0,
+        'len': 1310.0,
+        'len_by_p': 7.0,
+        'other_tickers': {'AAPL': {'cos': 0.363, 'paragraph_index': 2.0}, 'OPY.AX': {'paragraph_index': 0.0}},
+        'p': ''.join(['Reu', 'ters']),
+        'pub_t': '2022-06-30 23:22:50',
+        's': ['Australian buy-now-pay-later firm Openpay Group Ltd said on Friday it will "indefinitely" pause its operations.'],
+        'sub_p': [''.join(['Fin', 'ance']), 'Business', 'Sustainable Business', 'Government', 'Legal', 'Tech'],
+        'u': f'https://www.reuters.com/business/finance/bnpl-firm-openpay-pauses-us-operations-{i}',
+    }
+
+
+class TestNewsRecords(TestCase):
+    
+    def test_behaves_like_the_dictionary(self):
+        news = make_news(1)
+        news['new_key'] = 1
+        item = NewsItem.from_dict(news)
+        assert item == news
+        assert dict(item) == news
+        assert item['other_tickers']['AAPL']['cos'] == 0.363
+        assert item.get('missing') is None and 'missing' not in item and 'new_key' in item
+        assert len(item) == len(news)
+        with self.assertRaises(KeyError):
+            item['missing']
+        assert pickle.loads(pickle.dumps(item)) == news
+        assert copy.copy(item) == news
+    
+    def test_read_only(self):
+        item = NewsItem.from_dict(make_news(1))
+        with self.assertRaises(TypeError):
+            item.h = 'x'
+        with self.assertRaises(TypeError):
+            item['h'] = 'x'
+        item['sub_p'].append('x')
+        assert 'x' not in item['sub_p']
+    
+    def test_shared_strings(self):
+        items = to_news_items([make_news(1), make_news(2)])
+        assert items[0]._p is items[1]._p
+        assert items[0]._sub_p[0] is items[1]._sub_p[0]
+    
+    def test_memory(self):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        dicts = [make_news(i) for i in range(2000)]
+        dict_size = tracemalloc.get_traced_memory()[0] - before
+        del dicts
+        before = tracemalloc.get_traced_memory()[0]
+        items = to_news_items(make_news(i) for i in range(2000))
+        item_size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        assert len(items) == 2000
+        assert item_size < dict_size * 0.7
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestNewsRecords)
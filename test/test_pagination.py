@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Pagination import async_iter_pages, iter_pages
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+def fake_search(n_results, delay=0.0, calls=None):
+    def send_http_request(api_name, **kargs):
+        if calls is not None:
+            calls.append(kargs['offset'])
+        time.sleep(delay)
+        start = max(kargs['offset'], 1)
+        return {'result': [{'rank': i} for i in range(start, min(start + 10, n_results + 1))]}
+    
+    return send_http_request
+
+
+def fake_news(news_per_day):
+    # `news_per_day` news per day in January 2022, latest first, as `news_by_ticker` returns them.
+    calls = []
+    
+    def send_http_request(api_name, **kargs):
+        calls.append((kargs['start_date'], kargs['end_date']))
+        news = [{'pub_t': f'{kargs["end_date"][:8]}{day:02d} 12:{59 - i:02d}:00', 'h': f'{day}-{i}', 'u': ''}
+                for day in range(int(kargs['end_date'][8:]), int(kargs['start_date'][8:]) - 1, -1) for i in range(news_per_day)]
+        return {'result': news[:kargs['stop_at_number_of_news']]}
+    
+    return send_http_request, calls
+
+
+class TestPagination(TestCase):
+    
+    def test_offset_pages(self):
+        calls = []
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', fake_search(35, calls=calls)):
+            pages = list(iter_pages('search_for_llm', query='Nvidia', prefetch=2))
+        assert [len(p) for p in pages] == [10, 10, 10, 5]
+        assert [item['rank'] for p in pages for item in p] == list(range(1, 36))
+        assert calls[:5] == [0, 11, 21, 31, 41]
+    
+    def test_prefetch_hides_latency(self):
+        # 6 pages of 0.1s each, processed in 0.1s each: about 0.7s with prefetching, instead of 1.2s.
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', fake_search(60, delay=0.1)):
+            start_time = time.monotonic()
+            for _ in iter_pages('search_for_llm', query='Nvidia', prefetch=2):
+                time.sleep(0.1)
+            elapsed = time.monotonic() - start_time
+        assert elapsed < 1.0, elapsed
+    
+    def test_max_items_and_timeout(self):
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', fake_search(1000)):
+            paginator = iter_pages('search_for_llm', query='Nvidia', max_items=25)
+            assert len(list(paginator.items())) == 25
+            assert paginator.n_pages == 3
+        
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', fake_search(1000, delay=0.1)):
+            paginator = iter_pages('search_for_llm', query='Nvidia', timeout=0.35, prefetch=0)
+            start_time = time.monotonic()
+            n_pages = len(list(paginator))
+            assert 2 <= n_pages <= 4
+            assert paginator.timed_out
+            assert time.monotonic() - start_time < 0.6
+    
+    def test_close_early(self):
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', fake_search(1000)):
+            with iter_pages('search_for_llm', query='Nvidia') as paginator:
+                next(paginator)
+            assert next(paginator, None) is None
+    
+    def test_news_by_ticker(self):
+        send_http_request, calls = fake_news(news_per_day=30)
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', send_http_request):
+            news = list(iter_pages('news_by_ticker', ticker='AAPL', start_date='2022-01-01', end_date='2022-01-31',
+                                   stop_at_number_of_news=100).items())
+        assert len(news) == 31 * 30
+        assert len({n['h'] for n in news}) == len(news)
+        assert [n['pub_t'] for n in news] == sorted((n['pub_t'] for n in news), reverse=True)
+        assert calls[:2] == [('2022-01-01', '2022-01-31'), ('2022-01-01', '2022-01-28')]
+        
+        with self.assertRaises(ParameterInvalidError):
+            iter_pages('news_by_ticker', ticker='AAPL', start_date='2022-01-01', end_date='2022-01-31', if_most_relevant_news_ind=True)
+        with self.assertRaises(ParameterInvalidError):
+            iter_pages('company_info_by_ticker', ticker='AAPL')
+    
+    def test_errors(self):
+        def send_http_request(api_name, **kargs):
+            if kargs['offset'] > 20:
+                raise ParameterInvalidError('offset')
+            return {'result': [{}] * 10}
+        
+        with patch('IntellectFinanceAPI.API.Pagination.send_http_request', send_http_request):
+            paginator = iter_pages('search_for_llm', query='Nvidia')
+            assert len(next(paginator)) == 10
+            assert len(next(paginator)) == 10
+            with self.assertRaises(ParameterInvalidError):
+                next(paginator)
+    
+    def test_async(self):
+        in_flight = []
+        
+        async def async_send_http_request(api_name, **kargs):
+            in_flight.append(kargs['offset'])
+            await asyncio.sleep(0.01)
+            return fake_search(45)(api_name, **kargs)
+        
+        async def run():
+            pages = []
+            async for page in async_iter_pages('search_for_llm', query='Nvidia', prefetch=1):
+                pages.append(page)
+            items = [item async for item in async_iter_pages('search_for_llm', query='Nvidia', max_items=12).items()]
+            return pages, items
+        
+        with patch('IntellectFinanceAPI.API.AsyncUtility.async_send_http_request', async_send_http_request):
+            pages, items = asyncio.run(run())
+        assert [len(p) for p in pages] == [10, 10, 10, 10, 5]
+        assert len(items) == 12
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestPagination)
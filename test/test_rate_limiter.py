@@ -0,0 +1,55 @@
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed
+from IntellectFinanceAPI.API.RateLimiter import AdaptiveRateLimiter, RateLimiter, get_rate_limiter, set_rate_limit
+from IntellectFinanceAPI.API.Retry import set_retry_policy
+from IntellectFinanceAPI.API.Utility import send_http_request, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class TestRateLimiter(TestCase):
+    
+    def test_token_bucket_across_threads(self):
+        limiter = RateLimiter(100, burst=1)
+        start_time = time.monotonic()
+        threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(5)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 20 tokens at 100 per second, with 1 available upfront.
+        assert time.monotonic() - start_time >= 0.18
+    
+    def test_adaptive_rate(self):
+        limiter = AdaptiveRateLimiter(10, min_qps=1, success_threshold=3, increase_step=1)
+        limiter.on_throttled()
+        assert limiter.qps == 5
+        # A second rejection from the same burst does not slow down again.
+        limiter.on_throttled()
+        assert limiter.qps == 5
+        for _ in range(3):
+            limiter.on_success()
+        assert limiter.qps == 6
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.qps == 10
+    
+    def test_send_http_request_feeds_the_limiter(self):
+        set_api_key(1)
+        set_rate_limit(10, success_threshold=1)
+        set_retry_policy(max_retries=0)
+        with patch('IntellectFinanceAPI.API.Utility._call_url') as f:
+            f.return_value = {'error': 'Too fast', 'error_type': APIQPSLimitExceed.__name__}
+            with self.assertRaises(APIQPSLimitExceed):
+                send_http_request('one_api', ticker=1)
+        assert get_rate_limiter().qps == 5
+        set_rate_limit(None)
+        set_retry_policy()
+        set_api_key(None)
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestRateLimiter)
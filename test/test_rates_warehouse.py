@@ -0,0 +1,148 @@
+import datetime
+import os
+import tempfile
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError, ParameterMissingError
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class FakeAPI:
+    """
+    A daily rate on the business days, equal to the day of the month (plus 0.5 for `duration_2yr`).
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, api_name, start_date, end_date, **kargs):
+        self.calls.append((start_date, end_date))
+        start, end = datetime.date.fromisoformat(start_date), datetime.date.fromisoformat(end_date)
+        days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+        offset = 0.5 if kargs.get('duration') == 'duration_2yr' else 0
+        return {'result': [{'date': d.isoformat(), 'value': d.day + offset} for d in days if d.weekday() < 5]}
+
+
+@skipIf(np is None, 'numpy is not installed')
+class TestRatesWarehouse(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.api = FakeAPI()
+        self.patcher = patch('IntellectFinanceAPI.API.DateRange.send_http_request', self.api)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.directory.cleanup()
+
+    def make_warehouse(self, **kargs):
+        from IntellectFinanceAPI.API.RatesWarehouse import RatesWarehouse
+        return RatesWarehouse(self.directory.name, **kargs)
+
+    def test_reads_are_local_views(self):
+        warehouse = self.make_warehouse()
+        dates, values = warehouse.treasury_yield('duration_10yr', '2021-03-01', '2021-03-31')
+        self.assertEqual(len(dates), 23)
+        self.assertEqual(str(dates[0]), '2021-03-01')
+        self.assertEqual(values[-1], 31)
+        self.assertEqual(self.api.calls, [('2021-03-01', '2021-03-31')])
+
+        dates, values = warehouse.treasury_yield('duration_10yr', '2021-03-06', '2021-03-10')
+        self.assertEqual(self.api.calls, [('2021-03-01', '2021-03-31')])
+        self.assertEqual(dates.tolist(), [datetime.date(2021, 3, d) for d in (8, 9, 10)])
+        self.assertIsInstance(values, np.memmap)
+        self.assertFalse(values.flags.writeable)
+
+        # Another duration is another series.
+        _, values = warehouse.treasury_yield('duration_2yr', '2021-03-08', '2021-03-08')
+        self.assertEqual(values.tolist(), [8.5])
+
+    def test_only_new_days_are_fetched(self):
+        warehouse = self.make_warehouse()
+        warehouse.treasury_yield('duration_10yr', '2021-03-01', '2021-03-31')
+        dates, _ = warehouse.treasury_yield('duration_10yr', '2021-03-15', '2021-04-15')
+        self.assertEqual(self.api.calls[1:], [('2021-04-01', '2021-04-15')])
+        self.assertEqual(str(dates[-1]), '2021-04-15')
+
+        # Before the first stored day.
+        dates, values = warehouse.treasury_yield('duration_10yr', '2021-02-25', '2021-03-02')
+        self.assertEqual(self.api.calls[2:], [('2021-02-25', '2021-02-28')])
+        self.assertEqual(values.tolist(), [25, 26, 1, 2])
+
+        # A new warehouse on the same directory reads the files.
+        self.api.calls.clear()
+        warehouse = self.make_warehouse()
+        dates, values = warehouse.treasury_yield('duration_10yr', '2021-02-01', '2021-04-15')
+        self.assertEqual(self.api.calls, [('2021-02-01', '2021-02-24')])
+        self.assertEqual(len(dates), 54)
+        self.assertTrue((np.diff(dates.astype(np.int64)) > 0).all())
+
+    def test_recent_days_stay_in_memory(self):
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        start = (today - datetime.timedelta(days=20)).isoformat()
+        warehouse = self.make_warehouse(grace_days=3)
+        dates, _ = warehouse.fed_fund_target_rate(start, today.isoformat())
+        self.assertEqual(len(self.api.calls), 1)
+        warehouse.fed_fund_target_rate(start, today.isoformat())
+        self.assertEqual(len(self.api.calls), 1)
+
+        # Only the final days are on disk.
+        stored = os.path.getsize(os.path.join(self.directory.name, 'fed_fund_target_rate.values')) // 8
+        self.assertEqual(stored, sum(1 for d in dates.tolist() if d <= today - datetime.timedelta(days=3)))
+
+        warehouse.recent_ttl = 0
+        warehouse.fed_fund_target_rate(start, today.isoformat())
+        final_until = today - datetime.timedelta(days=3)
+        self.assertEqual(self.api.calls[1], ((final_until + datetime.timedelta(days=1)).isoformat(), today.isoformat()))
+
+    def test_rate_on(self):
+        warehouse = self.make_warehouse()
+        self.assertEqual(warehouse.rate_on('treasury_real_yield', '2021-03-07', duration='duration_10yr'), 5)  # a Sunday
+        self.assertEqual(warehouse.rate_on('treasury_real_yield', '2021-03-08', duration='duration_10yr'), 8)
+
+    def test_truncated_write(self):
+        warehouse = self.make_warehouse()
+        warehouse.treasury_yield('duration_10yr', '2021-03-01', '2021-03-31')
+        with open(os.path.join(self.directory.name, 'treasury_yield.duration_10yr.values'), 'ab') as f:
+            f.write(b'\0' * 12)
+        _, values = self.make_warehouse().treasury_yield('duration_10yr', '2021-03-01', '2021-03-31')
+        self.assertEqual(len(values), 23)
+        self.assertEqual(len(self.api.calls), 1)
+
+    def test_crash_while_prepending(self):
+        warehouse = self.make_warehouse()
+        warehouse.treasury_yield('duration_10yr', '2021-03-01', '2021-03-31')
+        with patch('IntellectFinanceAPI.API.RatesWarehouse._Series._save_meta', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                warehouse.treasury_yield('duration_10yr', '2021-02-01', '2021-03-31')
+
+        # The new generation was never committed: the stored columns are whole and aligned.
+        warehouse = self.make_warehouse()
+        dates, values = warehouse.treasury_yield('duration_10yr', '2021-03-01', '2021-03-31')
+        self.assertEqual(len(self.api.calls), 2)
+        self.assertEqual(values.tolist(), [d.day for d in dates.tolist()])
+
+        dates, values = warehouse.treasury_yield('duration_10yr', '2021-02-01', '2021-03-31')
+        self.assertEqual(len(dates), 43)
+        self.assertEqual(values.tolist(), [d.day for d in dates.tolist()])
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['treasury_yield.duration_10yr.1.dates',
+                                                                   'treasury_yield.duration_10yr.1.values',
+                                                                   'treasury_yield.duration_10yr.json'])
+
+    def test_errors(self):
+        warehouse = self.make_warehouse()
+        with self.assertRaises(ParameterInvalidError):
+            warehouse.read('news_by_topic', '2021-03-01', '2021-03-31')
+        with self.assertRaises(ParameterMissingError):
+            warehouse.read('treasury_yield', '2021-03-01', '2021-03-31')
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestRatesWarehouse)
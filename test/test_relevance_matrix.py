@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import urllib.parse
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+try:
+    import numpy as np
+    from IntellectFinanceAPI.API.RelevanceMatrix import RelevanceMatrix
+except ImportError:
+    np = None
+
+from IntellectFinanceAPI.API.ErrorTypes import ExceptionNoTickerFound
+from IntellectFinanceAPI.API.Utility import set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+TICKERS = [f'T{i}' for i in range(12)]
+
+
+def true_score(t1, t2):
+    i, j = sorted((int(t1[1:]), int(t2[1:])))
+    return round(1 / (1 + j - i), 4)
+
+
+def nearest_tickers(ticker, n=2):
+    return sorted((t for t in TICKERS if t != ticker), key=lambda t: -true_score(ticker, t))[:n]
+
+
+class FakeAPI:
+    
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, url):
+        parsed_url = urllib.parse.urlsplit(url)
+        api_name = parsed_url.path.rsplit('/', 1)[-1]
+        query = dict(urllib.parse.parse_qsl(parsed_url.query))
+        with self.lock:
+            self.calls.append((api_name, query))
+        if 'BAD' in query.values():
+            return {'error': 'BAD', 'error_type': ExceptionNoTickerFound.__name__}
+        if api_name == 'relevant_tickers_by_ticker':
+            # Plus a ticker outside the matrix.
+            return {'result': [{'ticker': t, 'relevance_score': true_score(query['ticker'], t)} for t in nearest_tickers(query['ticker'])] +
+                              [{'ticker': 'OTHER', 'relevance_score': 0.9}]}
+        return {'result': true_score(query['ticker_1'], query['ticker_2'])}
+
+
+@skipIf(np is None, 'numpy is not installed')
+class TestRelevanceMatrix(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+    
+    def tearDown(self):
+        set_api_key(None)
+    
+    def test_build(self):
+        api = FakeAPI()
+        matrix = RelevanceMatrix(TICKERS)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            matrix.build(max_workers=4)
+        n = len(TICKERS)
+        # The pairs of the last ticker are all covered by the calls of the others.
+        assert matrix.stats['n_neighbor_calls'] == n - 1
+        neighbor_pairs = {frozenset((q['ticker'], t)) for name, q in api.calls if name == 'relevant_tickers_by_ticker'
+                          for t in nearest_tickers(q['ticker'])}
+        assert matrix.stats['n_pair_calls'] == n * (n - 1) // 2 - len(neighbor_pairs)
+        assert len(api.calls) == n - 1 + matrix.stats['n_pair_calls']
+        # Each pair is fetched once, whatever the order of its tickers.
+        pairs = [frozenset(q.values()) for name, q in api.calls if name == 'relevance_score_between_two_tickers']
+        assert len(set(pairs)) == len(pairs)
+        
+        expected = np.array([[true_score(a, b) if a != b else 1 for b in TICKERS] for a in TICKERS], dtype=np.float32)
+        assert np.allclose(matrix.to_dense(), expected)
+        assert np.allclose(matrix.scores, matrix.scores.T)
+        assert matrix.score('T3', 'T5') == np.float32(true_score('T3', 'T5'))
+        
+        # Nothing left to fetch.
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            matrix.build()
+        assert len(api.calls) == n - 1 + matrix.stats['n_pair_calls']
+    
+    def test_incremental(self):
+        api = FakeAPI()
+        matrix = RelevanceMatrix(TICKERS[:5])
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            matrix.build()
+            n_calls = len(api.calls)
+            matrix.add_tickers(['T5', 'T0', 'BAD'])
+            assert len(matrix) == 7
+            matrix.build(fetch_missing_pairs=False)
+        # Only the new tickers are fetched, and the failure does not stop the others.
+        assert {q['ticker'] for _, q in api.calls[n_calls:]} == {'T5', 'BAD'}
+        assert matrix.score('T4', 'T5') == np.float32(true_score('T4', 'T5'))
+        assert np.isnan(matrix.score('T0', 'T5'))
+        assert matrix.stats['n_errors'] == 1
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'relevance.npz')
+            matrix.save(path)
+            loaded = RelevanceMatrix.load(path)
+        assert loaded.tickers == matrix.tickers
+        assert np.array_equal(loaded.scores, matrix.scores, equal_nan=True)
+        
+        # Refresh the scores older than a given age.
+        api = FakeAPI()
+        loaded.updated_at[:] = 0
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            loaded.build(max_age=3600)
+        assert (loaded.updated_at[:6, :6][~np.eye(6, dtype=bool)] > 0).all()
+        assert np.isnan(loaded.scores[:6, 6]).all()
+
+if __name__ == '__main__':
+    eval_TestCase(TestRelevanceMatrix)
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed, CircuitBreakerOpenError, ParameterInvalidError, ServiceUnavailableError
+from IntellectFinanceAPI.API.Retry import CircuitBreaker, RetryPolicy, get_retry_policy, set_retry_policy, use_retry_policy
+from IntellectFinanceAPI.API.Utility import _parse_response, send_http_request, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class FlakyURL:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.n_calls = 0
+    
+    def __call__(self, url):
+        self.n_calls += 1
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        return {'result': 1}
+
+
+class TestRetry(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+        set_retry_policy(max_retries=3, base_delay=0.001, max_delay=0.01, failure_threshold=3, recovery_timeout=0.05)
+    
+    def tearDown(self):
+        set_retry_policy()
+        set_api_key(None)
+    
+    def test_retry_then_succeed(self):
+        call_url = FlakyURL([TimeoutError(), ConnectionResetError(), {'error': 'slow down', 'error_type': APIQPSLimitExceed.__name__}])
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            assert send_http_request('one_api', ticker=1) == {'result': 1}
+        assert call_url.n_calls == 4
+    
+    def test_give_up_after_max_retries(self):
+        call_url = FlakyURL([{'error': 'slow down', 'error_type': APIQPSLimitExceed.__name__}] * 10)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            with self.assertRaises(APIQPSLimitExceed):
+                send_http_request('one_api', ticker=1)
+        assert call_url.n_calls == 4
+    
+    def test_no_retry_for_parameter_errors(self):
+        call_url = FlakyURL([{'error': 'bad', 'error_type': ParameterInvalidError.__name__}])
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            with self.assertRaises(ParameterInvalidError):
+                send_http_request('one_api', ticker=1)
+        assert call_url.n_calls == 1
+    
+    def test_gateway_errors(self):
+        assert _parse_response(503, b'<html>Service Unavailable</html>')['error_type'] == ServiceUnavailableError.__name__
+        assert _parse_response(500, b'{"ERROR": 1}') == {'ERROR': 1}
+    
+    def test_circuit_breaker(self):
+        call_url = FlakyURL([ConnectionResetError()] * 3)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            with self.assertRaises(CircuitBreakerOpenError):
+                send_http_request('down_api', ticker=1)
+            assert call_url.n_calls == 3
+            # Fails fast while open, and other APIs are not affected.
+            with self.assertRaises(CircuitBreakerOpenError):
+                send_http_request('down_api', ticker=1)
+            assert call_url.n_calls == 3
+            assert send_http_request('other_api', ticker=1) == {'result': 1}
+            time.sleep(0.06)
+            assert send_http_request('down_api', ticker=1) == {'result': 1}
+    
+    def test_half_open_allows_one_probe(self):
+        circuit_breaker = CircuitBreaker('one_api', failure_threshold=1, recovery_timeout=0)
+        circuit_breaker.record_failure()
+        circuit_breaker.before_request()
+        with self.assertRaises(CircuitBreakerOpenError):
+            circuit_breaker.before_request()
+        circuit_breaker.record_success()
+        circuit_breaker.before_request()
+        
+        # A probe which ended without a record lets another call probe.
+        circuit_breaker.record_failure()
+        assert circuit_breaker.before_request()
+        circuit_breaker.release_probe()
+        assert circuit_breaker.before_request()
+    
+    def test_cancelled_probe_is_released(self):
+        from IntellectFinanceAPI.API.AsyncUtility import AsyncClient
+        set_retry_policy(max_retries=0, failure_threshold=1, recovery_timeout=0)
+        
+        async def hang(url):
+            await asyncio.sleep(10)
+        
+        async def succeed(url):
+            return {'result': 1}
+        
+        async def main():
+            client = AsyncClient()
+            client.retry_policy = None
+            get_retry_policy().get_circuit_breaker('one_api').record_failure()
+            with patch.object(client, 'call_url', hang):
+                probe = asyncio.ensure_future(client.send_http_request('one_api', ticker=1))
+                await asyncio.sleep(0.01)
+                probe.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await probe
+            with patch.object(client, 'call_url', succeed):
+                return await client.send_http_request('one_api', ticker=1)
+        
+        assert asyncio.run(main()) == {'result': 1}
+    
+    def test_use_retry_policy(self):
+        process_policy = get_retry_policy()
+        call_url = FlakyURL([TimeoutError()] * 10)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            with use_retry_policy(max_retries=1, base_delay=0.001) as retry_policy:
+                assert get_retry_policy() is retry_policy
+                with self.assertRaises(TimeoutError):
+                    send_http_request('one_api', ticker=1)
+        assert call_url.n_calls == 2
+        assert get_retry_policy() is process_policy
+        
+        # A block is scoped to its own task.
+        async def call(max_retries):
+            with use_retry_policy(max_retries=max_retries):
+                await asyncio.sleep(0.01)
+                return get_retry_policy().max_retries
+        
+        async def main():
+            return await asyncio.gather(call(1), call(2))
+        
+        assert asyncio.run(main()) == [1, 2]
+    
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+        assert [policy.get_delay(i) for i in range(5)] == [1, 2, 4, 5, 5]
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        assert all(0 <= policy.get_delay(3) <= 5 for _ in range(100))
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestRetry)
@@ -0,0 +1,121 @@
+import threading
+import time
+import urllib.parse
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+try:
+    import numpy as np
+    from IntellectFinanceAPI.API.Screener import Condition, Screener, _percentiles
+except ImportError:
+    np = None
+
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Utility import set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+# ticker -> (SIC code, PS, Dividend-Yield)
+STOCKS = {
+    'AAPL': ('3571', 7.5, 0.005),
+    'DELL': ('3571', 0.6, 0.02),
+    'HPQ': ('3571', 0.5, 0.035),
+    'IBM': ('3570', 2.0, 0.045),
+    'XOM': ('2911', 1.2, 0.033),
+    'CVX': ('2911', 1.5, 0.04),
+    'KO': ('2080', 6.0, 0.03),
+    'NEW': ('2080', None, 0.01),
+}
+
+
+class FakeAPI:
+    
+    def __init__(self, with_sic_codes=True):
+        self.with_sic_codes = with_sic_codes
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, url):
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        with self.lock:
+            self.calls.append(query)
+        column = {'PS': 1, 'Dividend-Yield': 2}[query['screening_metric']]
+        stocks = {t: s for t, s in STOCKS.items() if s[0].startswith(query.get('sic_code_prefix', ''))}
+        values = np.array([np.nan if s[column] is None else s[column] for s in stocks.values()])
+        items = []
+        for (ticker, stock), percentile in zip(stocks.items(), _percentiles(values)):
+            item = {'ticker': ticker, 'value': stock[column], 'percentile': None if np.isnan(percentile) else float(percentile)}
+            if self.with_sic_codes:
+                item['sic_code'] = stock[0]
+            items.append(item)
+        return {'result': items}
+
+
+@skipIf(np is None, 'numpy is not installed')
+class TestScreener(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+    
+    def tearDown(self):
+        set_api_key(None)
+    
+    def test_screen_matches_the_api(self):
+        for with_sic_codes in (True, False):
+            api = FakeAPI(with_sic_codes)
+            screener = Screener('SP500')
+            with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+                for filters in [{}, {'min_value': 1.2, 'max_value': 6}, {'min_percentile': 0.5}, {'max_percentile': 0.5, 'sic_code_prefix': 35},
+                                {'sic_code_prefix': '357', 'min_percentile': 0.3, 'max_value': 7}]:
+                    local = screener.screen('PS', **filters)
+                    kargs = dict(filters)
+                    sic_code_prefix = kargs.pop('sic_code_prefix', None)
+                    # The API applies the same filters server-side.
+                    url = f'https://x/api/stocker_screener?screening_metric=PS&sic_code_prefix={sic_code_prefix or ""}'
+                    expected = [i for i in FakeAPI()(url)['result']
+                                if i['value'] is not None and (kargs.get('min_value') is None or i['value'] >= kargs['min_value'])
+                                and (kargs.get('max_value') is None or i['value'] < kargs['max_value'])
+                                and (kargs.get('min_percentile') is None or i['percentile'] >= kargs['min_percentile'])
+                                and (kargs.get('max_percentile') is None or i['percentile'] < kargs['max_percentile'])]
+                    assert [i['ticker'] for i in local['result']] == [i['ticker'] for i in expected], (filters, local)
+                # A refresh keeps the snapshots of the SIC prefixes.
+                screener.refresh()
+                assert len(screener.screen('PS', sic_code_prefix=35)['result']) == 4
+            # One snapshot, plus one per SIC prefix when the API does not return the SIC codes; and the refresh.
+            assert len(api.calls) == (2 if with_sic_codes else 6)
+    
+    def test_screen_many(self):
+        api = FakeAPI()
+        screener = Screener('SP500')
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            cheap = Condition('PS', max_value=1.6)
+            high_yield = Condition('Dividend-Yield', min_value=0.035)
+            assert list(screener.screen_many([cheap, high_yield], how='and')) == ['CVX', 'HPQ']
+            assert list(screener.screen_many([cheap, high_yield], how='or')) == ['CVX', 'DELL', 'HPQ', 'IBM', 'XOM']
+            result = screener.screen_many([cheap, high_yield], sic_code_prefix='29')
+            assert result == {'CVX': {'PS': 1.5, 'Dividend-Yield': 0.04}}
+            with self.assertRaises(ParameterInvalidError):
+                screener.screen_many([cheap], how='xor')
+        assert len(api.calls) == 2
+    
+    def test_refresh(self):
+        api = FakeAPI()
+        screener = Screener('SP500', refresh_interval=0.2)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            screener.screen('PS', max_value=1)
+            screener.screen('PS', max_value=2)
+            assert len(api.calls) == 1
+            time.sleep(0.25)
+            screener.screen('PS', max_value=2)
+            assert len(api.calls) == 2
+            
+            screener.start_refresh(interval=0.05)
+            time.sleep(0.18)
+            screener.stop_refresh()
+            n_calls = len(api.calls)
+            assert n_calls >= 4
+            time.sleep(0.1)
+            assert len(api.calls) == n_calls
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestScreener)
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import threading
+import urllib.parse
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ErrorTypes import ExceptionNoTickerFound, ParameterInvalidError, ServiceUnavailableError
+from IntellectFinanceAPI.API.SecMirror import SecMirror, form_category
+from IntellectFinanceAPI.API.Utility import set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+FORM_TYPES = ['8-K', '10-Q', '4', 'S-1', '6-K/A', 'SC 13G', '10-K']
+
+
+def make_filings(date):
+    # 7 filings a day, from 3 companies; the third page of each day carries a filing of the day before.
+    filings = [{'cik': str(1000 + i % 3).zfill(10), 'form_type': form_type, 'date_filed': date,
+                'accession_number': f'{date}-{i}'} for i, form_type in enumerate(FORM_TYPES)]
+    filings[-1]['date_filed'] = '2022-01-31'
+    return filings
+
+
+class FakeAPI:
+
+    def __init__(self, page_size=3, failing_dates=()):
+        self.page_size = page_size
+        self.failing_dates = set(failing_dates)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        api_name = urllib.parse.urlsplit(url).path.rsplit('/', 1)[-1]
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        with self.lock:
+            self.calls.append((api_name, query))
+        if api_name == 'company_info_by_ticker':
+            if query['ticker'] == 'GOOGL':
+                return {'result': [{'ticker': 'GOOGL', 'cik': '0000001001'}]}
+            return {'error': 'No ticker', 'error_type': ExceptionNoTickerFound.__name__}
+        if query['date'] in self.failing_dates:
+            return {'error': 'Down', 'error_type': ServiceUnavailableError.__name__}
+        start = int(query.get('_NEXT_TOKEN_', 0))
+        filings = make_filings(query['date'])
+        result = {'result': filings[start:start + self.page_size]}
+        if start + self.page_size < len(filings):
+            result['_NEXT_TOKEN_'] = str(start + self.page_size)
+        return result
+
+    def day_calls(self):
+        return [q['date'] for api_name, q in self.calls if api_name == 'list_sec_daily_filings' and '_NEXT_TOKEN_' not in q]
+
+
+class TestSecMirror(TestCase):
+
+    def setUp(self):
+        set_api_key(1)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'sec.sqlite3')
+
+    def tearDown(self):
+        set_api_key(None)
+        self.directory.cleanup()
+
+    def test_form_category(self):
+        self.assertEqual(form_category('8-K'), 'sec_8k_6k')
+        self.assertEqual(form_category('6-K/A'), 'sec_8k_6k')
+        self.assertEqual(form_category('10-K405'), 'sec_10k_10q_20f_40f')
+        self.assertEqual(form_category('40-F'), 'sec_10k_10q_20f_40f')
+        self.assertEqual(form_category('4/A'), 'sec_345')
+        self.assertEqual(form_category('S-1'), 'sec_other')
+        self.assertIsNone(form_category('SC 13D/A'))
+
+    def test_sync_follows_next_token(self):
+        api = FakeAPI()
+        mirror = SecMirror(self.path, max_workers=4)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            self.assertEqual(mirror.sync('2022-02-01', '2022-02-04'), 4)
+        self.assertEqual(len(mirror), 4 * 7)
+        self.assertEqual(len(api.calls), 4 * 3)  # 3 pages a day
+        self.assertEqual(mirror.missing_days('2022-02-01', '2022-02-04'), [])
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            r = mirror.list_sec_daily_filings('2022-02-02', cik='1001')
+        self.assertEqual([f['accession_number'] for f in r['result']], ['2022-02-02-1', '2022-02-02-4'])
+
+    def test_queries_are_local_once_synced(self):
+        api = FakeAPI()
+        mirror = SecMirror(self.path, max_workers=4)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            r = mirror.filings_8k_6k(cik_or_ticker='1000', start_date='2022-02-01', end_date='2022-02-03')
+            self.assertEqual([f['accession_number'] for f in r['result']], ['2022-02-01-0', '2022-02-02-0', '2022-02-03-0'])
+            self.assertEqual(sorted(api.day_calls()), ['2022-02-01', '2022-02-02', '2022-02-03'])
+
+            # An overlapping window only fetches the new days.
+            r = mirror.filings_10k_10q_20f_40f(cik_or_ticker='GOOGL', start_date='2022-02-02', end_date='2022-02-05')
+            self.assertEqual([f['form_type'] for f in r['result']], ['10-Q'] * 4)
+            self.assertEqual(sorted(api.day_calls())[3:], ['2022-02-04', '2022-02-05'])
+
+            n_calls = len(api.calls)
+            self.assertEqual(len(mirror.filings_345('GOOGL', '2022-02-01', '2022-02-05')['result']), 0)
+            self.assertEqual(len(mirror.filings_345('1002', '2022-02-01', '2022-02-05')['result']), 5)
+            self.assertEqual([f['form_type'] for f in mirror.filings_other('1000', '2022-02-01', '2022-02-05')['result']], ['S-1'] * 5)
+            # SC 13 has its own APIs.
+            self.assertEqual(mirror.filings_other('1002', '2022-02-01', '2022-02-05')['result'], [])
+            self.assertEqual(len(api.calls), n_calls)
+
+            # The filings are queried by the day SEC indexed them, which is the day synced: a filing indexed later than
+            # its filing date is not on its filing date.
+            r = mirror.filings_10k_10q_20f_40f('1000', '2022-01-31', '2022-01-31')
+            self.assertEqual([f['accession_number'] for f in r['result']], ['2022-01-31-6'])
+            self.assertEqual(len(api.calls), n_calls + 3)  # the pages of 2022-01-31
+            r = mirror.filings_10k_10q_20f_40f('1000', '2022-02-05', '2022-02-05')
+            self.assertEqual([(f['accession_number'], f['date_filed']) for f in r['result']], [('2022-02-05-6', '2022-01-31')])
+
+        # The ticker is resolved once.
+        self.assertEqual([q['ticker'] for api_name, q in api.calls if api_name == 'company_info_by_ticker'], ['GOOGL'])
+
+    def test_resume_after_errors(self):
+        api = FakeAPI(failing_dates={'2022-02-03'})
+        mirror = SecMirror(self.path, max_workers=2)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            with self.assertRaises(ServiceUnavailableError):
+                mirror.sync('2022-02-01', '2022-02-05')
+        self.assertEqual(mirror.missing_days('2022-02-01', '2022-02-05'), ['2022-02-03'])
+
+        # A new mirror on the same file picks up where the last one stopped.
+        api = FakeAPI()
+        mirror = SecMirror(self.path)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            self.assertEqual(mirror.sync('2022-02-01', '2022-02-05'), 1)
+        self.assertEqual(api.day_calls(), ['2022-02-03'])
+        self.assertEqual(len(mirror), 5 * 7)
+
+    def test_errors(self):
+        mirror = SecMirror(self.path)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', FakeAPI()):
+            with self.assertRaises(ExceptionNoTickerFound):
+                mirror.filings_8k_6k('NOPE', '2022-02-01', '2022-02-01')
+            with self.assertRaises(ParameterInvalidError):
+                mirror.filings_8k_6k('1000', '2022-02-05', '2022-02-01')
+
+    def test_recent_days_are_synced_again(self):
+        api = FakeAPI()
+        mirror = SecMirror(self.path, recent_ttl=0)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            mirror.sync('2022-02-01', '2022-02-01')
+            mirror.grace_days = 100000
+            self.assertEqual(mirror.missing_days('2022-02-01', '2022-02-01'), ['2022-02-01'])
+            mirror.sync('2022-02-01', '2022-02-01')
+        self.assertEqual(api.day_calls(), ['2022-02-01'] * 2)
+        self.assertEqual(len(mirror), 7)
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestSecMirror)
@@ -1,7 +1,6 @@
 import json
 from unittest import TestCase
 from unittest.mock import patch
-from urllib.error import HTTPError
 
 from IntellectFinanceAPI.API.ErrorTypes import APIKeysNotFound, APIError
 from IntellectFinanceAPI.API.Utility import _call_url, _generate_url, set_api_key, send_http_request
@@ -9,28 +8,46 @@ from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
 
 
 class HTTPResponse:
+    status = 200
+    headers = {}
+    body = {'RESULT': 1}
+    
     def read(self):
-        return json.dumps({'RESULT': 1})
+        return json.dumps(self.body)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
 
 
-class HTTPResponseWithError(HTTPError):
-    def read(self):
-        return json.dumps({'ERROR': 1})
+class HTTPResponseWithError(HTTPResponse):
+    status = 500
+    body = {'ERROR': 1}
+
+
+class ConnectionPool:
+    def __init__(self, response):
+        self.response = response
+        self.paths = []
+    
+    def request(self, method, path, headers=None):
+        self.paths.append(path)
+        return self.response
 
 
 class TestSendHTTPRequest(TestCase):
     
     def test_call_url(self):
-        with patch('urllib.request.urlopen') as f:
-            f.return_value = HTTPResponse()
-            r = _call_url('url')
+        with patch('IntellectFinanceAPI.API.Utility.get_connection_pool') as f:
+            f.return_value = pool = ConnectionPool(HTTPResponse())
+            r = _call_url('https://A_RANDOM_URL/api/one_api?ticker=1')
             assert r == {'RESULT': 1}
+            assert pool.paths == ['/api/one_api?ticker=1']
         
-        def raise_error(x):
-            raise HTTPResponseWithError(url='url', code=500, hdrs=None, fp=None, msg=json.dumps({1: 2}))
-        
-        with patch('urllib.request.urlopen') as f:
-            f.side_effect = raise_error
+        with patch('IntellectFinanceAPI.API.Utility.get_connection_pool') as f:
+            f.return_value = ConnectionPool(HTTPResponseWithError())
             r = _call_url('https://A_RANDOM_URL')
             assert r == {'ERROR': 1}
     
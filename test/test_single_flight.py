@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.SingleFlight import AsyncSingleFlight, SingleFlight
+from IntellectFinanceAPI.API.Utility import send_http_request, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class SlowURL:
+    def __init__(self, result_dict):
+        self.result_dict = result_dict
+        self.n_calls = 0
+    
+    def __call__(self, url):
+        self.n_calls += 1
+        time.sleep(0.1)
+        return dict(self.result_dict)
+
+
+def run_in_threads(func, n_threads):
+    results = [None] * n_threads
+    
+    def run(i):
+        try:
+            results[i] = func()
+        except Exception as e:
+            results[i] = e
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestSingleFlight(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+    
+    def tearDown(self):
+        set_api_key(None)
+    
+    def test_identical_calls_are_coalesced(self):
+        call_url = SlowURL({'result': [1]})
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            results = run_in_threads(lambda: send_http_request('big_index_holdings', index_name='SP500'), 8)
+        assert call_url.n_calls == 1
+        assert all(r == {'result': [1]} for r in results)
+        # Each caller has its own copy.
+        assert len({id(r) for r in results}) == 8
+    
+    def test_different_calls_are_not_coalesced(self):
+        call_url = SlowURL({'result': [1]})
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            run_in_threads(lambda: send_http_request('big_index_holdings', index_name=threading.get_ident()), 4)
+        assert call_url.n_calls == 4
+    
+    def test_errors_reach_all_waiters(self):
+        call_url = SlowURL({'error': 'bad', 'error_type': ParameterInvalidError.__name__})
+        with patch('IntellectFinanceAPI.API.Utility._call_url', call_url):
+            results = run_in_threads(lambda: send_http_request('big_index_holdings', index_name='X'), 5)
+        assert call_url.n_calls == 1
+        assert all(isinstance(r, ParameterInvalidError) for r in results)
+    
+    def test_single_flight_is_reusable(self):
+        single_flight = SingleFlight()
+        assert single_flight.do('k', lambda: 1) == 1
+        assert single_flight.do('k', lambda: 2) == 2
+        assert len(single_flight) == 0
+    
+    def test_unserializable_result(self):
+        single_flight = SingleFlight()
+        result = object()
+        
+        def slow():
+            time.sleep(0.1)
+            return result
+        
+        results = run_in_threads(lambda: single_flight.do('k', slow), 3)
+        # The leader gets its result; the waiters get the error instead of blocking forever.
+        assert results.count(result) == 1
+        assert sum(isinstance(r, ValueError) for r in results) == 2
+        assert len(single_flight) == 0
+        
+        async def main():
+            async_single_flight = AsyncSingleFlight()
+            
+            async def fetch():
+                await asyncio.sleep(0.05)
+                return result
+            
+            return await asyncio.gather(*[async_single_flight.do('k', fetch) for _ in range(3)], return_exceptions=True)
+        
+        results = asyncio.run(main())
+        assert results[0] is result and all(isinstance(r, ValueError) for r in results[1:])
+    
+    def test_async(self):
+        n_calls = []
+        
+        async def fetch():
+            n_calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'result': 1}
+        
+        async def main():
+            single_flight = AsyncSingleFlight()
+            return await asyncio.gather(*[single_flight.do('k', fetch) for _ in range(10)])
+        
+        results = asyncio.run(main())
+        assert len(n_calls) == 1 and all(r == {'result': 1} for r in results)
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestSingleFlight)
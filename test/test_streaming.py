@@ -0,0 +1,149 @@
+import http.server
+import io
+import json
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed, CircuitBreakerOpenError, ParameterInvalidError, ServiceUnavailableError
+from IntellectFinanceAPI.API.RateLimiter import get_rate_limiter, set_rate_limit
+from IntellectFinanceAPI.API.Retry import set_retry_policy
+from IntellectFinanceAPI.API.Streaming import iter_json_array, stream_http_request
+from IntellectFinanceAPI.API.Transport import RecordingTransport, ReplayTransport, use_transport
+from IntellectFinanceAPI.API.Utility import disable_metrics, enable_metrics, get_metrics, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+NEWS = [{'h': f'headline {i} ☃', 'emo': i / 10, 'n': i, 'sub_p': ['A', 'B'], 'other_tickers': {'AAPL': {'cos': 0.5}}} for i in range(500)]
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        if 'bad' in self.path:
+            status, body = 400, {'error': 'BAD', 'error_type': ParameterInvalidError.__name__}
+        elif 'throttled' in self.path:
+            status, body = 429, {'error': 'SLOW DOWN', 'error_type': APIQPSLimitExceed.__name__}
+        elif 'down' in self.path:
+            status, body = 503, {'error': 'DOWN', 'error_type': ServiceUnavailableError.__name__}
+        else:
+            status, body = 200, {'result': NEWS, '_NEXT_TOKEN_': 'abc'}
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(0, len(body), 1000):
+            chunk = body[i:i + 1000]
+            self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStreaming(TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def _generate_url(self, api_name, kargs):
+        return f'http://127.0.0.1:{self.server.server_port}/api/{api_name}?ticker={kargs["ticker"]}'
+    
+    def test_iter_json_array(self):
+        documents = [
+            {'result': NEWS, 'count': 12345, 'next': None},
+            {'before': {'a': [1, 2, {'b': '}]'}]}, 'result': [1, 22, 333, -4.5e3, 'x', None, True, [], {}], 'after': 'y'},
+            {'result': []},
+            {},
+            {'other': 1},
+        ]
+        for document in documents:
+            for chunk_size in [1, 2, 7, 4096]:
+                extra = {}
+                text = json.dumps(document, indent=1, ensure_ascii=False).encode()
+                items = list(iter_json_array(io.BytesIO(text), extra=extra, chunk_size=chunk_size))
+                assert items == document.get('result', [])
+                assert extra == {k: v for k, v in document.items() if k != 'result'}
+    
+    def test_malformed(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.BytesIO(b'{"result": [1, 2'), chunk_size=3))
+    
+    def test_stream_http_request(self):
+        set_api_key(1)
+        with patch('IntellectFinanceAPI.API.Streaming._generate_url', self._generate_url):
+            r = stream_http_request('news_by_ticker', ticker='AAPL')
+            assert list(r) == NEWS
+            assert r.extra == {'_NEXT_TOKEN_': 'abc'}
+            
+            # Stop early.
+            r = stream_http_request('news_by_ticker', ticker='AAPL')
+            assert next(r) == NEWS[0]
+            r.close()
+            
+            with self.assertRaises(ParameterInvalidError):
+                list(stream_http_request('news_by_ticker', ticker='bad'))
+        set_api_key(None)
+    
+    def test_failures_reach_the_circuit_breaker(self):
+        set_api_key(1)
+        set_retry_policy(failure_threshold=2, recovery_timeout=60)
+        enable_metrics()
+        try:
+            with patch('IntellectFinanceAPI.API.Streaming._generate_url', self._generate_url):
+                # A bad parameter is not a failure of the service.
+                for _ in range(3):
+                    with self.assertRaises(ParameterInvalidError):
+                        list(stream_http_request('news_by_ticker', ticker='bad'))
+                for _ in range(2):
+                    with self.assertRaises(ServiceUnavailableError):
+                        list(stream_http_request('news_by_ticker', ticker='down'))
+                with self.assertRaises(CircuitBreakerOpenError):
+                    list(stream_http_request('news_by_ticker', ticker='AAPL'))
+            endpoint = get_metrics().snapshot()['news_by_ticker']
+            self.assertEqual(endpoint['requests'], 5)
+            self.assertEqual(endpoint['errors'], {'ParameterInvalidError': 3, 'ServiceUnavailableError': 2, 'CircuitBreakerOpenError': 1})
+        finally:
+            disable_metrics()
+            set_retry_policy()
+            set_api_key(None)
+    
+    def test_throttling_reaches_the_rate_limiter(self):
+        set_api_key(1)
+        set_rate_limit(100, success_threshold=1)
+        try:
+            with patch('IntellectFinanceAPI.API.Streaming._generate_url', self._generate_url):
+                with self.assertRaises(APIQPSLimitExceed):
+                    list(stream_http_request('news_by_ticker', ticker='throttled'))
+                self.assertEqual(get_rate_limiter().qps, 50)
+                list(stream_http_request('news_by_ticker', ticker='AAPL'))
+                self.assertGreater(get_rate_limiter().qps, 50)
+        finally:
+            set_rate_limit(None)
+            set_api_key(None)
+    
+    def test_stream_through_transport(self):
+        set_api_key(1)
+        with tempfile.TemporaryDirectory() as path:
+            with patch('IntellectFinanceAPI.API.Streaming._generate_url', self._generate_url):
+                with use_transport(RecordingTransport(path)):
+                    assert list(stream_http_request('news_by_ticker', ticker='AAPL')) == NEWS
+                with use_transport(ReplayTransport(path)), \
+                        patch('IntellectFinanceAPI.API.Utility._call_url', side_effect=AssertionError('network')):
+                    r = stream_http_request('news_by_ticker', ticker='AAPL')
+                    assert list(r) == NEWS
+                    assert r.extra == {'_NEXT_TOKEN_': 'abc'}
+        set_api_key(None)
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestStreaming)
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.DiskCache import IMMUTABLE, ttl
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.TextPipeline import TextPipeline, content_hash, normalize_topics
+from IntellectFinanceAPI.API.Utility import disable_memory_cache, enable_memory_cache, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class FakeAPI:
+    
+    def __init__(self):
+        self.urls = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, url):
+        time.sleep(0.05)
+        with self.lock:
+            self.urls.append(url)
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        text = query.get('input') or query.get('inputted_paragraph')
+        if text == 'BAD':
+            return {'error': 'BAD', 'error_type': ParameterInvalidError.__name__}
+        return {'result': {'text': text, 'topics': query.get('list_topics')}}
+
+
+class TestTextPipeline(TestCase):
+    
+    def setUp(self):
+        set_api_key(1)
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.directory.name, 'text.sqlite3')
+    
+    def tearDown(self):
+        set_api_key(None)
+        self.directory.cleanup()
+    
+    def test_dedupe_and_order(self):
+        texts = ['Tesla earnings fall.', 'Boilerplate disclaimer.', 'Boilerplate  disclaimer.\n', 'Oil prices rise.', 'BAD'] * 4
+        api = FakeAPI()
+        pipeline = TextPipeline(cache_path=self.cache_path, max_workers=4)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            start_time = time.monotonic()
+            results = pipeline.sentiment_overall(texts)
+            elapsed = time.monotonic() - start_time
+        assert len(api.urls) == 4
+        assert elapsed < 0.15  # 0.2s one at a time
+        assert [r.index for r in results] == list(range(len(texts)))
+        assert results[0].result['result']['text'] == 'Tesla earnings fall.'
+        assert results[2].result == results[1].result and results[2].result is not results[1].result
+        assert not results[4].ok and isinstance(results[4].error, ParameterInvalidError)
+        assert pipeline.stats == {'n_inputs': 20, 'n_unique': 4, 'n_cache_hits': 0, 'n_calls': 4}
+        
+        # A new pipeline reads the cache; only the failed paragraph is sent again.
+        api = FakeAPI()
+        pipeline = TextPipeline(cache_path=self.cache_path)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            results = pipeline.sentiment_overall(texts + ['New paragraph.'])
+        assert len(api.urls) == 2
+        assert results[-1].result['result']['text'] == 'New paragraph.'
+        assert results[3].result['result']['text'] == 'Oil prices rise.'
+        
+        # Another API does not share the results.
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            pipeline.short_summary(['Oil prices rise.'])
+        assert len(api.urls) == 3
+    
+    def test_zero_shot_classifier_topics(self):
+        api = FakeAPI()
+        pipeline = TextPipeline(cache_path=self.cache_path)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            r1 = pipeline.zero_shot_classifier(['Pfizer prices Paxlovid.'], list_topics='Politics; Healthcare')
+            r2 = pipeline.zero_shot_classifier(['Pfizer prices Paxlovid.'], list_topics=['Healthcare', 'Politics '])
+            r3 = pipeline.zero_shot_classifier(['Pfizer prices Paxlovid.'], list_topics='Politics; Retail')
+        assert len(api.urls) == 2
+        assert r1[0].result == r2[0].result
+        assert r3[0].result['result']['topics'] == 'Politics; Retail'
+        with self.assertRaises(ParameterInvalidError):
+            pipeline.zero_shot_classifier(['x'], list_topics=' ; ')
+    
+    def test_without_cache(self):
+        api = FakeAPI()
+        pipeline = TextPipeline(cache_path=False)
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            pipeline.estimate_embedding_vector(['GOOGL', 'GOOGL'])
+            pipeline.estimate_embedding_vector(['GOOGL'])
+        assert len(api.urls) == 2
+    
+    def test_helpers(self):
+        assert content_hash('a  b\n') == content_hash('a b')
+        assert content_hash('a  b', normalize=False) != content_hash('a b')
+        assert normalize_topics('Retail;Politics; Retail') == 'Politics; Retail'
+        with self.assertRaises(ParameterInvalidError):
+            TextPipeline(cache_path=False).run('news_by_ticker', ['x'])
+
+    
+    def test_read_only_memory_cache(self):
+        enable_memory_cache(ttl_rules={'sentiment_overall': ttl(IMMUTABLE)}, read_only=True)
+        pipeline = TextPipeline(cache_path=False)
+        try:
+            with patch('IntellectFinanceAPI.API.Utility._call_url', FakeAPI()):
+                for _ in range(2):
+                    results = pipeline.sentiment_overall(['Oil prices rise.', 'Oil prices rise.'])
+                    assert all(r.ok for r in results), [r.error for r in results]
+                    assert results[1].result == results[0].result == {'result': {'text': 'Oil prices rise.', 'topics': None}}
+        finally:
+            disable_memory_cache()
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestTextPipeline)
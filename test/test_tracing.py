@@ -0,0 +1,136 @@
+import asyncio
+import http.server
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.ConnectionPool import close_connection_pools
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.API.Tracing import PhaseHook, PhaseRecorder, add_phase_hook, get_current_trace, remove_phase_hook
+from IntellectFinanceAPI.API.Utility import send_http_request, set_api_key
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+RESULT = {'result': [{'h': f'headline {i}', 'p': 'Reuters'} for i in range(500)]}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps(RESULT).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingHook(PhaseHook):
+
+    def __init__(self):
+        self.n_starts = 0
+        self.n_ends = 0
+
+    def on_start(self, event):
+        self.n_starts += 1
+        raise RuntimeError('A broken hook must not break the call.')
+
+    def on_end(self, event):
+        self.n_ends += 1
+
+
+class TestTracing(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        # `localhost`, so that the connection needs a DNS lookup.
+        cls.url = f'http://localhost:{cls.server.server_port}/api/news_by_ticker?ticker=AAPL'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        set_api_key(1)
+        close_connection_pools()
+        self.recorder = PhaseRecorder()
+        add_phase_hook(self.recorder)
+        self.patcher = patch('IntellectFinanceAPI.API.Utility._generate_url', lambda api_name, kargs: self.url)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        remove_phase_hook(self.recorder)
+        close_connection_pools()
+        set_api_key(None)
+
+    def test_phases(self):
+        assert send_http_request('news_by_ticker', ticker='AAPL') == RESULT
+        assert send_http_request('news_by_ticker', ticker='MSFT') == RESULT
+        events = list(self.recorder.events)
+        first = [e.phase for e in events if e.request_id == events[0].request_id]
+        second = [e.phase for e in events if e.request_id == events[-1].request_id]
+        assert first == ['dns', 'connect', 'ttfb', 'download', 'decompress', 'json_decode', 'request']
+        # The second call reuses the kept-alive connection.
+        assert second == ['ttfb', 'download', 'decompress', 'json_decode', 'request']
+
+        by_phase = {e.phase: e for e in events if e.request_id == events[0].request_id}
+        body_size = len(json.dumps(RESULT))
+        assert by_phase['download'].nbytes == body_size
+        assert by_phase['json_decode'].nbytes == body_size
+        assert by_phase['ttfb'].info == {'host': 'localhost', 'reused': False, 'status': 200}
+        assert by_phase['request'].api_name == 'news_by_ticker'
+        request = by_phase['request']
+        for event in events[:6]:
+            assert request.start <= event.start <= event.end <= request.end
+        assert set(self.recorder.summary()) == {'request', 'dns', 'connect', 'ttfb', 'download', 'decompress', 'json_decode'}
+        assert get_current_trace() is None
+
+    def test_sampling_and_broken_hooks(self):
+        remove_phase_hook(self.recorder)
+        hook = CountingHook()
+        add_phase_hook(hook, sample_rate=0.5)
+        try:
+            with patch('IntellectFinanceAPI.API.Tracing.random.random', return_value=0.7):
+                send_http_request('news_by_ticker', ticker='AAPL')
+            assert hook.n_starts == 0
+            with patch('IntellectFinanceAPI.API.Tracing.random.random', return_value=0.2):
+                assert send_http_request('news_by_ticker', ticker='AAPL') == RESULT
+            assert hook.n_starts == hook.n_ends == 5
+        finally:
+            remove_phase_hook(hook)
+
+    def test_errors(self):
+        with patch('IntellectFinanceAPI.API.Utility._call_url', lambda url: {'error': 'bad', 'error_type': ParameterInvalidError.__name__}):
+            with self.assertRaises(ParameterInvalidError):
+                send_http_request('news_by_ticker', ticker='AAPL')
+        [event] = self.recorder.events
+        assert event.phase == 'request'
+        assert isinstance(event.error, ParameterInvalidError)
+
+    def test_async_phases(self):
+        from IntellectFinanceAPI.API.AsyncUtility import AsyncClient
+
+        async def main():
+            async with AsyncClient() as client:
+                assert await client.send_http_request('news_by_ticker', ticker='AAPL') == RESULT
+                assert await client.send_http_request('news_by_ticker', ticker='MSFT') == RESULT
+
+        with patch('IntellectFinanceAPI.API.AsyncUtility._generate_url', lambda api_name, kargs: self.url):
+            asyncio.run(main())
+        events = list(self.recorder.events)
+        assert [e.phase for e in events] == ['connect', 'ttfb', 'download', 'decompress', 'json_decode', 'request',
+                                             'ttfb', 'download', 'decompress', 'json_decode', 'request']
+        assert events[1].info['reused'] is False and events[6].info['reused'] is True
+        assert events[2].nbytes == len(json.dumps(RESULT))
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestTracing)
@@ -0,0 +1,147 @@
+import asyncio
+import glob
+import gzip
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from IntellectFinanceAPI.API.AsyncUtility import AsyncClient
+from IntellectFinanceAPI.API.ErrorTypes import APIQPSLimitExceed, ParameterInvalidError, RecordingNotFoundError
+from IntellectFinanceAPI.API.Retry import set_retry_policy
+from IntellectFinanceAPI.API.Transport import RecordingTransport, ReplayTransport, get_transport, parse_request, \
+    set_transport, use_transport
+from IntellectFinanceAPI.API.Utility import send_http_request, set_api_key
+from IntellectFinanceAPI.API.api_functions import news_by_ticker
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+class FakeAPI:
+
+    def __init__(self, responses=(), delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.urls = []
+
+    def __call__(self, url):
+        self.urls.append(url)
+        time.sleep(self.delay)
+        if self.responses:
+            return self.responses.pop(0)
+        api_name, kargs = parse_request(url)
+        return {'result': [{'api_name': api_name, **kargs}]}
+
+
+def no_network(url):
+    raise AssertionError(f'The network was called: {url}')
+
+
+class TestTransport(TestCase):
+
+    def setUp(self):
+        set_api_key('SECRET')
+        set_retry_policy(max_retries=2, base_delay=0.001, max_delay=0.01, failure_threshold=None)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        set_transport(None)
+        set_retry_policy()
+        set_api_key(None)
+        self.directory.cleanup()
+
+    def record(self, api=None):
+        set_transport(RecordingTransport(self.path))
+        with patch('IntellectFinanceAPI.API.Utility._call_url', api or FakeAPI()):
+            news_by_ticker(ticker='AAPL', start_date='2023-01-01', end_date='2023-01-31')
+            send_http_request('treasury_yield', duration='duration_10yr')
+        set_transport(None)
+
+    def test_record_and_replay(self):
+        api = FakeAPI([{'error': 'slow down', 'error_type': APIQPSLimitExceed.__name__}], delay=0.02)
+        self.record(api)
+        self.assertEqual(len(api.urls), 3)
+        files = sorted(glob.glob(os.path.join(self.path, '*', '*.json.gz')))
+        self.assertEqual([os.path.basename(os.path.dirname(f)) for f in files], ['news_by_ticker', 'treasury_yield'])
+        for file in files:
+            with gzip.open(file, 'rt') as f:
+                self.assertNotIn('SECRET', f.read())
+
+        set_transport(ReplayTransport(self.path))
+        with patch('IntellectFinanceAPI.API.Utility._call_url', no_network):
+            # The order of the parameters does not matter.
+            result = send_http_request('news_by_ticker', end_date='2023-01-31', ticker='AAPL', start_date='2023-01-01')
+            self.assertEqual(result['result'][0]['ticker'], 'AAPL')
+            result['result'].clear()
+            self.assertEqual(send_http_request('treasury_yield', duration='duration_10yr'),
+                             {'result': [{'api_name': 'treasury_yield', 'duration': 'duration_10yr'}]})
+            self.assertEqual(len(news_by_ticker(ticker='AAPL', start_date='2023-01-01', end_date='2023-01-31')['result']), 1)
+            with self.assertRaises(RecordingNotFoundError):
+                send_http_request('treasury_yield', duration='duration_2yr')
+
+    def test_replay_errors(self):
+        set_transport(RecordingTransport(self.path))
+        with patch('IntellectFinanceAPI.API.Utility._call_url', FakeAPI([{'error': 'bad', 'error_type': ParameterInvalidError.__name__}])):
+            with self.assertRaises(ParameterInvalidError):
+                send_http_request('news_by_ticker', ticker='NOPE')
+        set_transport(ReplayTransport(self.path))
+        with patch('IntellectFinanceAPI.API.Utility._call_url', no_network):
+            with self.assertRaises(ParameterInvalidError):
+                send_http_request('news_by_ticker', ticker='NOPE')
+
+    def test_missing_recordings_do_not_open_the_circuit_breaker(self):
+        set_retry_policy(max_retries=0, failure_threshold=5, recovery_timeout=30)
+        set_transport(ReplayTransport(self.path))
+        with patch('IntellectFinanceAPI.API.Utility._call_url', no_network):
+            for _ in range(8):
+                with self.assertRaises(RecordingNotFoundError):
+                    send_http_request('treasury_yield', duration='duration_10yr')
+
+        async def main():
+            async with AsyncClient(transport=ReplayTransport(self.path)) as client:
+                for _ in range(8):
+                    with self.assertRaises(RecordingNotFoundError):
+                        await client.send_http_request('treasury_yield', duration='duration_2yr')
+
+        with patch.object(AsyncClient, 'call_url', no_network):
+            asyncio.run(main())
+
+    def test_latency(self):
+        self.record(FakeAPI(delay=0.05))
+        with patch('IntellectFinanceAPI.API.Utility._call_url', no_network):
+            for transport, min_seconds, max_seconds in [(ReplayTransport(self.path), 0, 0.04),
+                                                        (ReplayTransport(self.path, latency=0.02), 0.02, 0.045),
+                                                        (ReplayTransport(self.path, latency='recorded'), 0.05, 1)]:
+                with use_transport(transport):
+                    start = time.perf_counter()
+                    send_http_request('treasury_yield', duration='duration_10yr')
+                    self.assertTrue(min_seconds <= time.perf_counter() - start < max_seconds)
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.path, latency='slow')
+
+    def test_fallback_records_the_missing_requests(self):
+        self.record()
+        replay = ReplayTransport(self.path, fallback=RecordingTransport(self.path))
+        api = FakeAPI()
+        with use_transport(replay), patch('IntellectFinanceAPI.API.Utility._call_url', api):
+            send_http_request('treasury_yield', duration='duration_10yr')
+            send_http_request('treasury_yield', duration='duration_2yr')
+            send_http_request('treasury_yield', duration='duration_2yr')
+        self.assertEqual(len(api.urls), 1)
+        self.assertIsNone(get_transport())
+
+    def test_async_client(self):
+        self.record()
+
+        async def main():
+            async with AsyncClient(transport=ReplayTransport(self.path, latency=0.01)) as client:
+                return await asyncio.gather(*[client.send_http_request('treasury_yield', duration='duration_10yr') for _ in range(3)])
+
+        with patch.object(AsyncClient, 'call_url', no_network):
+            results = asyncio.run(main())
+        self.assertEqual(results[0], {'result': [{'api_name': 'treasury_yield', 'duration': 'duration_10yr'}]})
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestTransport)
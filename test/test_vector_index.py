@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+try:
+    import numpy as np
+    from IntellectFinanceAPI.API.VectorIndex import VectorIndex
+except ImportError:
+    np = None
+
+from IntellectFinanceAPI.API.ErrorTypes import ParameterInvalidError
+from IntellectFinanceAPI.CommonUtility.test_utility import eval_TestCase
+
+
+def fake_send_http_request(api_name, **kargs):
+    rng = np.random.default_rng(abs(hash(kargs.get('topic_name') or kargs.get('input'))) % 2 ** 32)
+    if api_name == 'estimate_embedding_vector':
+        return {'result': {'input': kargs['input'], 'embedding': rng.normal(size=8).tolist()}}
+    return {'result': [{'date': f'2022-01-{day:02d}', 'embedding': rng.normal(size=8).tolist()} for day in (23, 16, 9, 2)]}
+
+
+@skipIf(np is None, 'numpy is not installed')
+class TestVectorIndex(TestCase):
+    
+    def test_search(self):
+        index = VectorIndex(dim=3)
+        index.add([('a', '2022-01-02'), ('b', '2022-01-02'), ('c', '2022-01-02'), ('a', '2022-01-09')],
+                  [[1, 0, 0], [0.9, 0.1, 0], [0, 0, 1], [0.5, 0.5, 0]])
+        result = index.search(('a', '2022-01-02'), k=2)
+        assert [id_ for id_, _ in result] == [('b', '2022-01-02'), ('a', '2022-01-09')]
+        assert abs(result[0][1] - 0.9 / np.linalg.norm([0.9, 0.1])) < 1e-6
+        assert [id_ for id_, _ in index.search([0, 0, 2], k=1)] == [('c', '2022-01-02')]
+        assert [id_[0] for id_, _ in index.search(('a', '2022-01-02'), k=10, date='2022-01-02')] == ['b', 'c']
+        
+        # Replace a vector.
+        index.add([('c', '2022-01-02')], [[1, 0, 0]])
+        assert len(index) == 4
+        assert index.search(('a', '2022-01-02'), k=1)[0][0] == ('c', '2022-01-02')
+        
+        with self.assertRaises(ParameterInvalidError):
+            index.add([('d', None)], [[1, 0]])
+    
+    def test_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as path:
+            with patch('IntellectFinanceAPI.API.VectorIndex.send_http_request', fake_send_http_request):
+                index = VectorIndex(path)
+                assert index.add_topic_embeddings('President Biden', '2022-01-01', '2022-01-31') == 4
+                index.add_topic_embeddings('Inflation', '2022-01-01', '2022-01-31')
+                vector = index.add_estimated_embedding('GOOGL')
+            assert isinstance(index.matrix, np.memmap)
+            assert len(index) == 9
+            
+            index = VectorIndex(path)
+            assert len(index) == 9 and index.dim == 8
+            assert np.allclose(index.get(('GOOGL', None)), vector)
+            assert index.search(vector, k=1)[0][0] == ('GOOGL', None)
+            
+            # Incremental appends, and a row without id (as after a crash) is ignored.
+            index.add([('Oil', '2022-01-02')], [np.ones(8)])
+            with open(f'{path}/vectors.f32', 'ab') as f:
+                f.write(np.zeros(8, np.float32).tobytes())
+            index = VectorIndex(path)
+            assert len(index) == 10
+            index.add([('Gold', '2022-01-02')], [-np.ones(8)])
+            index = VectorIndex(path)
+            assert index.search(np.ones(8), k=1)[0][0] == ('Oil', '2022-01-02')
+            assert index.search(-np.ones(8), k=1)[0][0] == ('Gold', '2022-01-02')
+    
+    def test_load_only_reads(self):
+        with tempfile.TemporaryDirectory() as path:
+            index = VectorIndex(path)
+            index.add([('Oil', '2022-01-02'), ('Gold', '2022-01-02')], [np.ones(8), -np.ones(8)])
+            with patch('os.truncate') as truncate:
+                index = VectorIndex(path)
+            truncate.assert_not_called()
+            assert len(index) == 2
+            assert index.search(np.ones(8), k=1)[0][0] == ('Oil', '2022-01-02')
+            
+            os.remove(f'{path}/meta.json')
+            with self.assertRaisesRegex(ParameterInvalidError, 'meta.json'):
+                VectorIndex(path)
+    
+    def test_speed(self):
+        rng = np.random.default_rng(0)
+        index = VectorIndex()
+        index.add([(f'topic {i}', f'2022-{1 + i % 12:02d}-01') for i in range(20000)], rng.normal(size=(20000, 768)))
+        start_time = time.perf_counter()
+        results = index.search_many([(f'topic {i}', f'2022-{1 + i % 12:02d}-01') for i in range(10)], k=10)
+        assert time.perf_counter() - start_time < 0.5
+        assert all(len(r) == 10 for r in results)
+
+
+if __name__ == '__main__':
+    eval_TestCase(TestVectorIndex)